@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark the cache-key content hash (SHA-256) on 1-10 MB payloads.
+
+Usage:
+    python scripts/bench_content_hash.py                  # 1, 2, 5, 10 MB random payloads
+    python scripts/bench_content_hash.py --threads 4      # also measure 4 concurrent hashers
+    python scripts/bench_content_hash.py posters/*.jpg    # your own images
+
+For each payload size this reports the per-request cost of
+``content_digest``, and the cost of building the string cache key and
+looking it up in a dict, for comparison.  Each request hashes its payload
+exactly once, so the digest column is the whole hashing cost of a cache
+miss.  With --threads it hashes the same payload on N threads at once;
+because hashlib releases the GIL for large buffers, aggregate throughput
+should scale with cores.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from image_embedder.cache import EmbeddingLRUCache  # noqa: E402
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _threaded(data: bytes, threads: int, repeat: int) -> float:
+    """Aggregate MB/s of *threads* workers hashing *data* concurrently."""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda _i: EmbeddingLRUCache.content_digest(data), range(threads * repeat)))
+        elapsed = time.perf_counter() - start
+    return len(data) * threads * repeat / elapsed / 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="files to hash (default: random 1, 2, 5, 10 MB payloads)")
+    parser.add_argument("--repeat", type=int, default=10, help="repetitions (best time is reported)")
+    parser.add_argument("--threads", type=int, default=0, help="also measure N concurrent hashers")
+    args = parser.parse_args()
+
+    if args.images:
+        payloads = [(os.path.basename(p), Path(p).read_bytes()) for p in args.images]
+    else:
+        payloads = [(f"{mb} MB", os.urandom(mb * 1024 * 1024)) for mb in (1, 2, 5, 10)]
+
+    header = f"{'payload':<16} {'sha256 ms':>12} {'key+lookup us':>14}"
+    if args.threads:
+        header += f" {f'x{args.threads} MB/s':>14}"
+    print(header)
+    cache: dict = {}
+    for name, data in payloads:
+        digest = EmbeddingLRUCache.content_digest(data)
+        seconds = _best_of(lambda: EmbeddingLRUCache.content_digest(data), args.repeat)
+        row = f"{name:<16} {seconds * 1000:12.2f}"
+
+        def _key_and_lookup() -> None:
+            for _ in range(1000):
+                cache.get(EmbeddingLRUCache.make_key_from_digest(digest, "ViT-L-14", 224, True))
+
+        row += f" {_best_of(_key_and_lookup, args.repeat) * 1000:14.3f}"  # per call: ms / 1000 runs = us
+        if args.threads:
+            row += f" {_threaded(data, args.threads, 2):14.0f}"
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
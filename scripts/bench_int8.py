@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Compare a dynamic int8 catalog model (e.g. ViT-L-14-int8) against its fp32 base on CPU.
+
+Usage:
+    python scripts/bench_int8.py                             # ViT-L-14, synthetic posters
+    python scripts/bench_int8.py --model ViT-B-16            # the smaller model
+    python scripts/bench_int8.py posters/*.jpg               # your own posters
+
+Both variants embed the same images with DEVICE=cpu (requires torch +
+transformers).  The script reports per-image cosine similarity between the
+fp32 and int8 embeddings, then images/sec for each variant at --batch-size.
+It exits with status 1 if any image falls below --min-cosine.
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from bench_jpeg_draft import synthetic_posters  # noqa: E402
+from image_embedder.config import Settings  # noqa: E402
+from image_embedder.embedder import BatchItem, ImageEmbedder, MODEL_CATALOG  # noqa: E402
+
+
+def _embed_all(embedder: ImageEmbedder, model: str, blobs: list[bytes], batch_size: int) -> np.ndarray:
+    spec = MODEL_CATALOG[model]
+    encoded = [base64.b64encode(data).decode() for data in blobs]
+    vectors = []
+    for start in range(0, len(encoded), batch_size):
+        items = [BatchItem(image_url=None, image_base64=b64, normalize=True) for b64 in encoded[start:start + batch_size]]
+        for result in embedder.embed_batch(spec, spec.image_size, items):
+            if isinstance(result, Exception):
+                raise result
+            vectors.append(result[0])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _throughput(embedder: ImageEmbedder, model: str, blobs: list[bytes], batch_size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _embed_all(embedder, model, blobs, batch_size)
+        best = min(best, time.perf_counter() - start)
+    return len(blobs) / best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="image files (default: synthetic posters)")
+    parser.add_argument("--model", default="ViT-L-14", help="fp32 catalog model; its -int8 variant is compared")
+    parser.add_argument("--count", type=int, default=16, help="synthetic posters to generate")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per variant (best is reported)")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    quantized = f"{args.model}-int8"
+    if args.model not in MODEL_CATALOG or quantized not in MODEL_CATALOG:
+        parser.error(f"{args.model} has no int8 variant in the catalog")
+
+    blobs = [Path(p).read_bytes() for p in args.images] or synthetic_posters(args.count, 1000, 1500)
+    names = [os.path.basename(p) for p in args.images] or [f"synthetic-{i}" for i in range(len(blobs))]
+
+    # No caches, so every pass runs the model.
+    embedder = ImageEmbedder(settings=Settings(device="cpu", embed_cache_size=0, failure_cache_size=0))
+    reference = _embed_all(embedder, args.model, blobs, args.batch_size)
+    candidate = _embed_all(embedder, quantized, blobs, args.batch_size)
+    cosines = np.sum(reference * candidate, axis=1)
+
+    print(f"{'image':<24} {'cosine':>8}")
+    for name, value in zip(names, cosines):
+        print(f"{name:<24} {value:8.5f}")
+    print(f"{'min / mean':<24} {cosines.min():8.5f} / {cosines.mean():.5f}")
+
+    fp32_ips = _throughput(embedder, args.model, blobs, args.batch_size, args.repeat)
+    int8_ips = _throughput(embedder, quantized, blobs, args.batch_size, args.repeat)
+    print(f"\n{'model':<24} {'images/s':>9}")
+    print(f"{args.model:<24} {fp32_ips:9.2f}")
+    print(f"{quantized:<24} {int8_ips:9.2f}  ({int8_ips / fp32_ips:.2f}x)")
+
+    return 1 if cosines.min() < args.min_cosine else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
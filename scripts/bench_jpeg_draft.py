@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark JPEG draft-mode decoding (IMAGE_JPEG_DRAFT_DECODE) against full decodes.
+
+Usage:
+    python scripts/bench_jpeg_draft.py                       # synthetic 2000x3000 posters
+    python scripts/bench_jpeg_draft.py posters/*.jpg         # your own posters
+    python scripts/bench_jpeg_draft.py --model ViT-B-16      # also compare embeddings
+
+For each image this reports decode time, decoded pixel buffer size (a proxy
+for peak decode memory) and drift after CLIP preprocessing.  With --model
+(requires torch + transformers) it also embeds both decodes and reports the
+cosine similarity.  The script exits with status 1 if any image falls below
+--min-cosine, or above --max-pixel-drift when no model is given.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from image_embedder.config import Settings  # noqa: E402
+from image_embedder.embedder import ImageEmbedder  # noqa: E402
+from image_embedder.preprocess import ClipPreprocessor  # noqa: E402
+
+
+def synthetic_posters(count: int, width: int = 2000, height: int = 3000) -> list[bytes]:
+    """Poster-like JPEGs: smooth gradients, hard-edged shapes, text-sized detail."""
+    rng = np.random.default_rng(0)
+    posters = []
+    for _ in range(count):
+        y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+        base = np.stack(
+            [
+                128 + 100 * np.sin(x / rng.uniform(80, 400) + rng.uniform(0, 6)),
+                128 + 100 * np.cos(y / rng.uniform(80, 400) + rng.uniform(0, 6)),
+                128 + 100 * np.sin((x + y) / rng.uniform(80, 400)),
+            ],
+            axis=-1,
+        )
+        image = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), "RGB")
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x0, y0 = int(rng.uniform(0, width)), int(rng.uniform(0, height))
+            x1, y1 = x0 + int(rng.uniform(20, 600)), y0 + int(rng.uniform(4, 400))
+            draw.rectangle((x0, y0, x1, y1), fill=tuple(int(c) for c in rng.integers(0, 256, 3)))
+        image = image.filter(ImageFilter.GaussianBlur(0.6))
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=90)
+        posters.append(buf.getvalue())
+    return posters
+
+
+def _time_decode(embedder: ImageEmbedder, data: bytes, min_size, repeat: int) -> tuple[float, Image.Image]:
+    best = float("inf")
+    image = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = embedder._image_from_bytes(data, min_size)
+        best = min(best, time.perf_counter() - start)
+    assert image is not None
+    return best, image
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="JPEG files (default: synthetic 2000x3000 posters)")
+    parser.add_argument("--count", type=int, default=4, help="synthetic posters to generate")
+    parser.add_argument("--size", type=int, default=224, help="model image_size")
+    parser.add_argument("--repeat", type=int, default=5, help="decode repetitions (best time is reported)")
+    parser.add_argument("--model", default=None, help="catalog model to compare embeddings with")
+    parser.add_argument("--min-cosine", type=float, default=0.995)
+    parser.add_argument("--max-pixel-drift", type=float, default=0.05, help="max mean |delta| of pixel values")
+    args = parser.parse_args()
+
+    blobs = [Path(p).read_bytes() for p in args.images] or synthetic_posters(args.count)
+    names = [os.path.basename(p) for p in args.images] or [f"synthetic-{i}" for i in range(len(blobs))]
+
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, failure_cache_size=0))
+    preprocess = ClipPreprocessor()
+    spec = embedder.resolve_model(args.model) if args.model else None
+
+    failed = False
+    print(f"{'image':<16} {'full decode':>20} {'draft decode':>20} {'speedup':>8} {'mem':>6} {'px drift':>9} {'cosine':>8}")
+    for name, data in zip(names, blobs):
+        full_s, full = _time_decode(embedder, data, None, args.repeat)
+        draft_s, draft = _time_decode(embedder, data, args.size, args.repeat)
+
+        full_px = preprocess([full], args.size).copy()
+        draft_px = preprocess([draft], args.size)
+        drift = float(np.mean(np.abs(full_px - draft_px)))
+
+        cosine = ""
+        if spec is not None:
+            vectors = []
+            for image in (full, draft):
+                vec, *_ = embedder._embed_uncached(spec, spec.image_size, _encode_png(image), True)
+                vectors.append(np.asarray(vec))
+            value = float(np.dot(vectors[0], vectors[1]))
+            cosine = f"{value:.5f}"
+            failed |= value < args.min_cosine
+        else:
+            failed |= drift > args.max_pixel_drift
+
+        print(
+            f"{name:<16} {full.size[0]:>5}x{full.size[1]:<5} {full_s * 1000:7.1f}ms"
+            f" {draft.size[0]:>5}x{draft.size[1]:<5} {draft_s * 1000:7.1f}ms"
+            f" {full_s / draft_s:7.1f}x {full.size[0] * full.size[1] / (draft.size[0] * draft.size[1]):5.0f}x"
+            f" {drift:9.5f} {cosine:>8}"
+        )
+
+    return 1 if failed else 0
+
+
+def _encode_png(image: Image.Image) -> bytes:
+    # Lossless round-trip so the embedding sees exactly the decoded pixels.
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
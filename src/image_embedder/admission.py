@@ -0,0 +1,189 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""W-TinyLFU admission for the in-memory embedding cache (``EMBED_CACHE_POLICY=tinylfu``).
+
+A full-library rescan touches every poster once, which flushes a plain LRU
+and evicts the posters that daily traffic actually reuses.  W-TinyLFU keeps
+recency for new items but makes them earn a place in the main cache:
+
+- new entries land in a small *window* LRU (1% of capacity);
+- entries leaving the window compete with the main cache's eviction victim;
+  a count-min sketch estimates how often each key was seen recently and the
+  more frequent one stays, so one-off scan items are rejected;
+- the main cache is a segmented LRU: *probation* (20%) for admitted entries,
+  *protected* (80%) for entries hit again while in probation.
+
+The sketch holds 4-bit counters in four rows and halves them all after
+``10 x width`` increments, so old popularity fades.
+
+The policy only tracks keys and weights; ``EmbeddingLRUCache`` owns storage
+and calls it under its own lock.
+"""
+
+import zlib
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+# Odd 64-bit multipliers; one independent-ish hash per sketch row.
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+
+class FrequencySketch:
+    """Count-min sketch of 4-bit counters with periodic halving (aging)."""
+
+    def __init__(self, expected_entries: int) -> None:
+        width = 1 << max(4, (max(expected_entries, 1) * 4 - 1).bit_length())
+        self._mask = width - 1
+        # One counter per byte; rows are bytearrays so single-counter access stays cheap.
+        self._table = [bytearray(width) for _ in _SEEDS]
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        # Not hash(): str hashes are salted per process, so admission would vary between runs.
+        h = zlib.crc32(key.encode())
+        return [((h * seed) & _MASK64) >> 40 & self._mask for seed in _SEEDS]
+
+    def frequency(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._table, self._indexes(key)))
+
+    def increment(self, key: str) -> None:
+        idx = self._indexes(key)
+        low = min(row[i] for row, i in zip(self._table, idx))
+        if low >= 15:
+            return
+        # Conservative update: only the smallest counters grow.
+        for row, i in zip(self._table, idx):
+            if row[i] == low:
+                row[i] = low + 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            for row in self._table:
+                counters = np.frombuffer(row, dtype=np.uint8)
+                counters >>= 1
+            self._additions //= 2
+
+
+class TinyLfuPolicy:
+    """Window LRU + segmented main LRU with TinyLFU admission.
+
+    *capacity* is in the same unit as the weights passed to ``add()``:
+    entries (weight 1) for count-bounded caches, bytes for byte-budgeted ones.
+    """
+
+    def __init__(self, capacity: int, expected_entries: int) -> None:
+        self._capacity = capacity
+        self._window_cap = capacity // 100
+        self._main_cap = capacity - self._window_cap
+        self._protected_cap = self._main_cap * 8 // 10
+        self._window: "OrderedDict[str, int]" = OrderedDict()
+        self._probation: "OrderedDict[str, int]" = OrderedDict()
+        self._protected: "OrderedDict[str, int]" = OrderedDict()
+        self._window_weight = 0
+        self._probation_weight = 0
+        self._protected_weight = 0
+        self._sketch = FrequencySketch(expected_entries)
+        self.admitted = 0
+        self.rejected = 0
+
+    def on_hit(self, key: str) -> None:
+        """Record a cache hit; a second hit in probation promotes the key to protected."""
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            weight = self._probation.pop(key)
+            self._probation_weight -= weight
+            self._protected[key] = weight
+            self._protected_weight += weight
+            while self._protected_weight > self._protected_cap and len(self._protected) > 1:
+                demoted, w = self._protected.popitem(last=False)
+                self._protected_weight -= w
+                self._probation[demoted] = w
+                self._probation_weight += w
+
+    def add(self, key: str, weight: int) -> Tuple[bool, List[str]]:
+        """Insert a new *key*; return ``(admitted, keys_to_evict)``.
+
+        *keys_to_evict* never contains *key*; when *admitted* is False the
+        caller must not store it.  Evicted keys are already forgotten here.
+        """
+        self._sketch.increment(key)
+        self._window[key] = weight
+        self._window_weight += weight
+        evict: List[str] = []
+        admitted = True
+        while self._window_weight > self._window_cap and self._window:
+            candidate, w = self._window.popitem(last=False)
+            self._window_weight -= w
+            if not self._admit(candidate, w, evict):
+                self.rejected += 1
+                if candidate == key:
+                    admitted = False
+                else:
+                    evict.append(candidate)
+        return admitted, evict
+
+    def remove(self, key: str) -> None:
+        """Forget *key* (evicted by the cache itself: quota, trim or clear)."""
+        for segment, attr in (
+            (self._window, "_window_weight"),
+            (self._probation, "_probation_weight"),
+            (self._protected, "_protected_weight"),
+        ):
+            weight = segment.pop(key, None)
+            if weight is not None:
+                setattr(self, attr, getattr(self, attr) - weight)
+                return
+
+    def clear(self) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            segment.clear()
+        self._window_weight = self._probation_weight = self._protected_weight = 0
+
+    def info(self) -> dict:
+        return {
+            "policy": "tinylfu",
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "window": len(self._window),
+            "probation": len(self._probation),
+            "protected": len(self._protected),
+        }
+
+    def _admit(self, candidate: str, weight: int, evict: List[str]) -> bool:
+        """Move a window *candidate* into probation if it beats the main victims it displaces."""
+        if weight > self._main_cap:
+            return False
+        freq = self._sketch.frequency(candidate)
+        # Make room first from probation, then protected; bail out on the first stronger victim.
+        victims: List[Tuple[str, int, "OrderedDict[str, int]"]] = []
+        room = self._main_cap - self._probation_weight - self._protected_weight
+        for segment in (self._probation, self._protected):
+            for victim, w in segment.items():
+                if room >= weight:
+                    break
+                if self._sketch.frequency(victim) >= freq:
+                    return False
+                victims.append((victim, w, segment))
+                room += w
+        if room < weight:
+            return False
+        for victim, w, segment in victims:
+            del segment[victim]
+            if segment is self._probation:
+                self._probation_weight -= w
+            else:
+                self._protected_weight -= w
+            evict.append(victim)
+        self._probation[candidate] = weight
+        self._probation_weight += weight
+        self.admitted += 1
+        return True
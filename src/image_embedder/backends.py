@@ -0,0 +1,479 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Inference backends returned by ``ImageEmbedder._load_model``.
+
+A backend wraps one loaded vision model and maps a preprocessed
+``{"pixel_values": (N, 3, S, S)}`` batch to raw ``(N, dims)`` float32 image
+embeddings.  Everything above ``run()`` is shared: ``embed`` and
+``embed_batch`` build inputs in the backend's ``input_format``, and the
+embedder does batching, caching, output-shape checks and L2 normalization
+once for every backend.
+
+- ``TorchBackend`` (``DEVICE=cpu|cuda|rocm|auto``): HuggingFace
+  ``CLIPVisionModelWithProjection``, optionally dynamic-int8 quantized.
+- ``OpenVinoBackend`` (``DEVICE=openvino[:X]``): OpenVINO IR exported once
+  under ``OV_MODEL_CACHE``, then compiled for the device.  Compiled device
+  blobs are cached next to the IR, so restarts skip the device compile.  With
+  ``OV_PERFORMANCE_HINT=THROUGHPUT`` batches are split across the parallel
+  infer requests of an ``AsyncInferQueue``.
+- ``OnnxRuntimeBackend`` (``DEVICE=onnx``) exports each catalog model to
+  ONNX once, with a dynamic batch axis, under ``ONNX_MODEL_CACHE`` and
+  serves it from an ONNX Runtime CPU session.
+
+torch is only needed by the torch backend and for the first OpenVINO/ONNX
+export.  A new backend subclasses ``InferenceBackend``, implements ``load()``
+and ``run()`` (plus ``device_info()``, ``device_memory()`` and ``info()`` if
+it has more to report on ``GET /health``) and gets a branch in
+``backend_class()``; ``ImageEmbedder._load_model`` loads every backend the
+same way.
+"""
+
+import json
+import os
+import pathlib
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .config import Settings
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .embedder import ModelSpec
+
+logger = get_logger(__name__)
+
+ONNX_OPSET = 17
+# Accepted OV_PERFORMANCE_HINT values; "" compiles with the plugin defaults.
+OV_PERFORMANCE_HINTS = ("", "LATENCY", "THROUGHPUT", "CUMULATIVE_THROUGHPUT")
+
+
+def ov_performance_hint(settings: Settings) -> str:
+    """Normalized ``OV_PERFORMANCE_HINT``; raises ValueError for a value OpenVINO does not accept."""
+    hint = (settings.ov_performance_hint or "").strip().upper()
+    if hint not in OV_PERFORMANCE_HINTS:
+        raise ValueError(f"Unsupported OV_PERFORMANCE_HINT value: {settings.ov_performance_hint}")
+    return hint
+
+
+class InferenceBackend:
+    """Base class for loaded models; subclasses implement ``run()``."""
+
+    # Human-readable engine name, used in error messages.
+    label = "backend"
+    # Tensor type the embedder builds model inputs as: "np" or "pt".
+    input_format = "np"
+
+    def __init__(self, device: str) -> None:
+        self.device = device
+        # Per-phase load times and cache outcomes, reported under ``startup`` on GET /health.
+        self.load_timings: Dict[str, Any] = {}
+
+    @classmethod
+    def load(cls, spec: "ModelSpec", device: Any, settings: Settings) -> "InferenceBackend":
+        """Load catalog model *spec* on *device*, with engine options taken from *settings*."""
+        raise NotImplementedError
+
+    def run(self, inputs: Dict[str, Any]) -> np.ndarray:
+        """Return raw (unnormalized) image embeddings, one row per input image."""
+        raise NotImplementedError
+
+    def warmup(self, image_size: int) -> None:
+        """Run one blank image so lazy kernel selection and allocation happen before traffic."""
+        pixel_values = np.zeros((1, 3, image_size, image_size), dtype=np.float32)
+        if self.input_format == "pt":
+            import torch
+
+            pixel_values = torch.from_numpy(pixel_values)
+        self.run({"pixel_values": pixel_values})
+
+    @staticmethod
+    def device_info(device: Any) -> dict:
+        """``device`` section of ``GET /health``; needs no loaded model."""
+        return {"type": str(device).split(":")[0]}
+
+    @staticmethod
+    def device_memory(device: Any) -> Optional[dict]:
+        """Accelerator memory stats for *device*, or None when the engine has none to report."""
+        return None
+
+    def info(self) -> dict:
+        """Per-model entry under ``device.backends`` on ``GET /health``."""
+        return {"device": self.device}
+
+
+class TorchBackend(InferenceBackend):
+    """A HuggingFace ``CLIPVisionModelWithProjection`` on a torch device."""
+
+    label = "PyTorch"
+    input_format = "pt"
+
+    def __init__(self, model: Any, device: Any) -> None:
+        super().__init__(str(device))
+        self.model = model
+        self._torch_device = device
+
+    @classmethod
+    def load(cls, spec: "ModelSpec", device: Any, settings: Settings) -> "TorchBackend":
+        from transformers import CLIPVisionModelWithProjection
+
+        model = CLIPVisionModelWithProjection.from_pretrained(spec.hf_id)
+        model.to(device)  # type: ignore[arg-type]
+        model.eval()  # type: ignore[union-attr]
+        if spec.precision == "int8":
+            model = quantize_dynamic_int8(model)
+        return cls(model, device)
+
+    def run(self, inputs: Dict[str, Any]) -> np.ndarray:
+        import torch
+
+        inputs = {k: v.to(self._torch_device) for k, v in inputs.items()}
+        with torch.no_grad():
+            features = self.model(**inputs).image_embeds  # type: ignore[operator]
+        return np.asarray(features.detach().cpu().numpy(), dtype=np.float32)
+
+    @staticmethod
+    def device_info(device: Any) -> dict:
+        info = InferenceBackend.device_info(device)
+        if str(device).startswith("cuda"):
+            try:
+                import torch
+
+                if torch.cuda.is_available():
+                    info["name"] = torch.cuda.get_device_name(device)
+                    if getattr(torch.version, "hip", None) is not None:
+                        info["type"] = "rocm"
+                        info["hip_version"] = torch.version.hip
+            except Exception:
+                pass
+        return info
+
+    @staticmethod
+    def device_memory(device: Any) -> Optional[dict]:
+        import torch
+
+        if str(device).startswith("cuda") and torch.cuda.is_available():
+            return {
+                "allocated_mb": torch.cuda.memory_allocated(device) / (1024 * 1024),
+                "reserved_mb": torch.cuda.memory_reserved(device) / (1024 * 1024),
+            }
+        return None
+
+
+def quantize_dynamic_int8(model: Any) -> Any:
+    """Swap every ``nn.Linear`` for a dynamically quantized int8 equivalent.
+
+    Weights are quantized once here; activations are quantized per batch at
+    run time, so no calibration data is needed.  Attention and MLP
+    projections carry nearly all of a ViT's FLOPs, which is where the CPU
+    speedup comes from; convolutions and LayerNorm stay fp32.
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OpenVinoBackend(InferenceBackend):
+    """An ``openvino.CompiledModel``; output 0 is ``image_embeds``.
+
+    Without *infer_queue* every ``run()`` is one synchronous call on the
+    compiled model's default infer request.  With one, the batch is split
+    into at most ``len(infer_queue)`` contiguous chunks that run on separate
+    infer requests (and so separate CPU streams or GPU queues) in parallel;
+    completion callbacks resolve a future per chunk.  Concurrent ``run()``
+    calls share the queue, and each waits only for its own chunks.
+    """
+
+    label = "OpenVINO"
+
+    def __init__(self, compiled: Any, device: str, infer_queue: Any = None, performance_hint: str = "") -> None:
+        super().__init__(device)
+        self.compiled = compiled
+        self.performance_hint = performance_hint
+        self._queue = infer_queue
+        self._submit_lock = threading.Lock()
+        if infer_queue is not None:
+            infer_queue.set_callback(self._on_done)
+
+    @classmethod
+    def load(cls, spec: "ModelSpec", device: str, settings: Settings) -> "OpenVinoBackend":
+        """Load (or export-then-cache) a CLIP model for OpenVINO inference.
+
+        On the first call the HuggingFace model is loaded via PyTorch, converted
+        to OpenVINO IR format (.xml + .bin) with ``openvino.convert_model()``,
+        saved to *OV_MODEL_CACHE*, and compiled for the requested device.
+        Subsequent calls find the cached IR on disk and skip the export step,
+        so torch is not needed on the hot path after the first startup.
+
+        A THROUGHPUT (or CUMULATIVE_THROUGHPUT) ``OV_PERFORMANCE_HINT``
+        compiles for parallel streams and creates an ``AsyncInferQueue`` of
+        ``OV_INFER_REQUESTS`` requests, or the plugin's
+        ``OPTIMAL_NUMBER_OF_INFER_REQUESTS`` when that is 0.
+
+        With ``OV_COMPILE_CACHE``, OpenVINO's ``CACHE_DIR`` points at
+        ``<OV_MODEL_CACHE>/<model>/compiled/<device>-<openvino version>``, so
+        the compiled device blob is imported on later starts instead of being
+        rebuilt.  The version and device in the path mean an upgrade or a
+        device change never reads a stale blob; directories left by other
+        versions for the same device are deleted.
+        """
+        import openvino as ov
+
+        performance_hint = ov_performance_hint(settings)
+        ov_device = device[len("ov:"):]
+        cache_dir = pathlib.Path(
+            os.environ.get("OV_MODEL_CACHE", "/app/.cache/ov_ir")
+        ) / spec.name.replace("/", "_")
+        xml_path = cache_dir / "model.xml"
+        blob_dir = _ov_blob_dir(ov, cache_dir, ov_device) if settings.ov_compile_cache else None
+        timings: Dict[str, Any] = {"ir": "cached" if xml_path.exists() else "exported"}
+        started = time.perf_counter()
+
+        if not xml_path.exists():
+            # Export: load PyTorch model, trace + convert to OV IR, save to disk.
+            import torch
+            from transformers import CLIPVisionModelWithProjection
+
+            torch_model = CLIPVisionModelWithProjection.from_pretrained(spec.hf_id)
+            torch_model.eval()
+
+            dummy_input = {"pixel_values": torch.zeros(1, 3, spec.image_size, spec.image_size)}
+            ov_model = ov.convert_model(torch_model, example_input=dummy_input)
+
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            ov.save_model(ov_model, str(xml_path))
+        elif blob_dir is None:
+            core_tmp = ov.Core()
+            ov_model = core_tmp.read_model(str(xml_path))
+        timings["ir_seconds"] = round(time.perf_counter() - started, 3)
+
+        config: Dict[str, Any] = {}
+        if performance_hint:
+            config["PERFORMANCE_HINT"] = performance_hint
+        core = ov.Core()
+        started = time.perf_counter()
+        if blob_dir is not None:
+            blobs = _blob_files(blob_dir)
+            config["CACHE_DIR"] = str(blob_dir)
+            # Compiling from the path lets a blob hit skip reading the IR altogether.
+            compiled = core.compile_model(str(xml_path), ov_device, config)
+            # A blob left by another IR or config does not count: a hit writes nothing new.
+            hit = bool(blobs) and _blob_files(blob_dir) == blobs
+        else:
+            hit = None
+            compiled = core.compile_model(ov_model, ov_device, config) if config else core.compile_model(ov_model, ov_device)
+        timings["compile_seconds"] = round(time.perf_counter() - started, 3)
+        timings.update(_compile_cache_outcome(blob_dir, hit, timings["compile_seconds"]))
+        logger.info(
+            f"OpenVINO compiled {spec.name} for {ov_device} in {timings['compile_seconds']}s "
+            f"(blob cache {timings['compile_cache']}"
+            + (f", saved {timings['saved_seconds']}s" if "saved_seconds" in timings else "")
+            + ")"
+        )
+
+        queue = None
+        if performance_hint not in ("", "LATENCY"):
+            jobs = settings.ov_infer_requests or int(compiled.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS"))
+            queue = ov.AsyncInferQueue(compiled, max(1, jobs))
+        backend = cls(compiled, device, queue, performance_hint)
+        backend.load_timings = timings
+        return backend
+
+    @staticmethod
+    def device_info(device: Any) -> dict:
+        info: dict = {"type": "openvino", "ov_device": str(device)[len("ov:"):]}
+        try:
+            import openvino as ov
+
+            info["available_devices"] = ov.Core().available_devices
+        except Exception:
+            pass
+        return info
+
+    @property
+    def infer_requests(self) -> int:
+        return len(self._queue) if self._queue is not None else 1
+
+    def run(self, inputs: Dict[str, Any]) -> np.ndarray:
+        if self._queue is None:
+            return np.asarray(self.compiled(dict(inputs))[0], dtype=np.float32)
+        pixel_values = np.ascontiguousarray(inputs["pixel_values"], dtype=np.float32)
+        chunks = np.array_split(pixel_values, min(len(pixel_values), self.infer_requests))
+        futures: List[Future] = [Future() for _ in chunks]
+        # start_async blocks until a request is idle; one submitter at a time keeps
+        # a caller's chunks together instead of interleaving with another batch.
+        with self._submit_lock:
+            for chunk, future in zip(chunks, futures):
+                self._queue.start_async({"pixel_values": chunk}, future)
+        return np.concatenate([future.result() for future in futures])
+
+    @staticmethod
+    def _on_done(request: Any, future: Future) -> None:
+        try:
+            # Copy: the output tensor belongs to the request and is reused by its next job.
+            future.set_result(np.array(request.get_output_tensor(0).data, dtype=np.float32))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    def info(self) -> dict:
+        info = {"device": self.device, "infer_requests": self.infer_requests}
+        if self.performance_hint:
+            info["performance_hint"] = self.performance_hint
+        return info
+
+
+def _ov_blob_dir(ov: Any, cache_dir: pathlib.Path, ov_device: str) -> Optional[pathlib.Path]:
+    """Compiled-blob directory for this device and OpenVINO version; None if the version is unknown."""
+    get_version = getattr(ov, "get_version", None)
+    if get_version is None:
+        return None
+    version = re.sub(r"[^A-Za-z0-9._-]", "_", str(get_version()))
+    device = re.sub(r"[^A-Za-z0-9._-]", "_", ov_device)
+    root = cache_dir / "compiled"
+    blob_dir = root / f"{device}-{version}"
+    if root.is_dir():
+        for stale in root.glob(f"{device}-*"):
+            if stale != blob_dir and stale.is_dir():
+                shutil.rmtree(stale, ignore_errors=True)
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    return blob_dir
+
+
+def _blob_files(blob_dir: pathlib.Path) -> Dict[str, Tuple[int, int]]:
+    """``{name: (size, mtime_ns)}`` of the compiled blobs in *blob_dir*."""
+    files = {}
+    for path in blob_dir.glob("*.blob"):
+        stat = path.stat()
+        files[path.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _compile_cache_outcome(blob_dir: Optional[pathlib.Path], hit: Optional[bool], seconds: float) -> Dict[str, Any]:
+    """Cache outcome for a compile; a miss records its time so later hits can report the saving."""
+    if blob_dir is None:
+        return {"compile_cache": "disabled"}
+    record = blob_dir / "cold_compile.json"
+    if not hit:
+        record.write_text(json.dumps({"seconds": seconds}), encoding="utf-8")
+        return {"compile_cache": "miss"}
+    outcome: Dict[str, Any] = {"compile_cache": "hit"}
+    try:
+        cold = float(json.loads(record.read_text(encoding="utf-8"))["seconds"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return outcome
+    outcome["cold_compile_seconds"] = cold
+    outcome["saved_seconds"] = round(max(0.0, cold - seconds), 3)
+    return outcome
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """An ``onnxruntime.InferenceSession`` over an exported vision model."""
+
+    label = "ONNX Runtime"
+
+    def __init__(self, session: Any, device: str = "ort:CPU") -> None:
+        super().__init__(device)
+        self._session = session
+        self._input = session.get_inputs()[0].name
+        self._output = session.get_outputs()[0].name
+
+    @classmethod
+    def load(cls, spec: "ModelSpec", device: str, settings: Settings) -> "OnnxRuntimeBackend":
+        """Export (first run only) and open an ONNX Runtime CPU session for a catalog model.
+
+        ``ONNX_INTRA_OP_THREADS`` = 0 lets ONNX Runtime use one thread per
+        physical core.  With ``ONNX_INTER_OP_THREADS`` > 1 independent graph
+        branches also run in parallel; the CLIP vision graph is mostly a
+        single chain, so the default of 1 keeps execution sequential.
+        """
+        import onnxruntime as ort
+
+        path = onnx_cache_path(spec.name)
+        if not path.exists():
+            export_onnx(spec.hf_id, spec.image_size, path)
+
+        inter_op_threads = settings.onnx_inter_op_threads
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = max(0, settings.onnx_intra_op_threads)
+        options.inter_op_num_threads = max(1, inter_op_threads)
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        session = ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+        return cls(session, device)
+
+    def run(self, inputs: Dict[str, Any]) -> np.ndarray:
+        pixel_values = np.ascontiguousarray(inputs["pixel_values"], dtype=np.float32)
+        (embeds,) = self._session.run([self._output], {self._input: pixel_values})
+        return np.asarray(embeds, dtype=np.float32)
+
+    @staticmethod
+    def device_info(device: Any) -> dict:
+        return {"type": "onnxruntime"}
+
+    def info(self) -> dict:
+        options = self._session.get_session_options()
+        return {
+            "device": self.device,
+            "providers": list(self._session.get_providers()),
+            "intra_op_threads": options.intra_op_num_threads,
+            "inter_op_threads": options.inter_op_num_threads,
+        }
+
+
+def onnx_cache_path(model_name: str) -> pathlib.Path:
+    root = pathlib.Path(os.environ.get("ONNX_MODEL_CACHE", "/app/.cache/onnx"))
+    return root / model_name.replace("/", "_") / "model.onnx"
+
+
+def export_onnx(hf_id: str, image_size: int, path: pathlib.Path) -> None:
+    """Export ``CLIPVisionModelWithProjection`` to *path* with a dynamic batch axis.
+
+    Only ``image_embeds`` is kept as an output, so the graph does not carry
+    the hidden states.  The file is written under a temporary name and
+    renamed, so a crashed export never leaves a half-written model behind.
+    """
+    import torch
+    from transformers import CLIPVisionModelWithProjection
+
+    class _ImageEmbeds(torch.nn.Module):
+        def __init__(self, model: Any) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, pixel_values):  # type: ignore[override]
+            return self.model(pixel_values=pixel_values).image_embeds
+
+    model = _ImageEmbeds(CLIPVisionModelWithProjection.from_pretrained(hf_id)).eval()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (torch.zeros(1, 3, image_size, image_size),),
+            str(tmp),
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+        )
+    os.replace(tmp, path)
+
+
+def backend_class(device: Any) -> Type[InferenceBackend]:
+    """The backend type that serves a resolved ``ImageEmbedder._resolve_device()`` value."""
+    device_str = str(device)
+    if device_str.startswith("ov:"):
+        return OpenVinoBackend
+    if device_str.startswith("ort:"):
+        return OnnxRuntimeBackend
+    return TorchBackend
+
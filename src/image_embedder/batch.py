@@ -6,11 +6,24 @@
 
 When ``embed_batch_window_ms > 0``, incoming embed requests are collected for
 up to that many milliseconds (or until ``embed_batch_max_size`` is reached),
-then dispatched together.  Requests sharing the same ``(model, image_size)``
+then dispatched together.  Jobs normally arrive already *prepared* (image
+bytes resolved and cache checked on the I/O pool), so the dispatcher only
+holds an ``EmbedQueue`` slot for inference.  Requests sharing the same ``(model, image_size)``
 bucket are sent to the model as a single batched tensor call; ``normalize`` is
 applied per-item post-forward so requests with different settings can coexist
 in the same window.
 
+Dispatch is pipelined (``batch_pipeline_depth``, default 1): a collector
+task decodes and preprocesses each window on its own staging thread
+(``ImageEmbedder.stage_prepared_batch``) and hands it to an inference task,
+so batch N+1 is being staged while batch N is on the model.  Staging does
+not go back through the I/O admission these jobs already passed, and holds
+the shared model lock so it waits out an exclusive model update.  A group
+that fails to stage is decoded under the slot instead.  At most
+``depth + 1`` decoded batches exist at once (double buffering at depth 1).
+``stats()`` reports per-stage occupancy for sizing the depth; ``depth = 0``
+collects, decodes and infers each window serially under the slot.
+
 When ``batch_window_ms == 0`` (default) the ``BatchWindow`` is disabled and
 ``app.state.batch_window`` is ``None``; the route falls back to the standard
 single-request path.
@@ -19,6 +32,9 @@ single-request path.
 from __future__ import annotations
 
 import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
@@ -27,7 +43,7 @@ import anyio
 from .logging_config import get_logger
 
 if TYPE_CHECKING:
-    from .embedder import BatchItem, ImageEmbedder, ModelSpec
+    from .embedder import BatchItem, ImageEmbedder, ModelSpec, PreparedEmbed, StagedBatch
     from .queue import EmbedQueue
 
 logger = get_logger(__name__)
@@ -45,6 +61,8 @@ class EmbedJob:
     model: Optional[str]
     normalize: bool
     image_size: Optional[int]
+    # Output of ImageEmbedder.prepare(); None when the embedder has no I/O stage.
+    prepared: Optional["PreparedEmbed"] = None
     # Set by bind(); not part of __init__ so callers don't have to provide it.
     _future: "asyncio.Future[EmbedResult]" = field(default=None, init=False, repr=False)  # type: ignore[assignment]
 
@@ -53,12 +71,43 @@ class EmbedJob:
         return self._future
 
 
+@dataclass
+class _StageClock:
+    """Occupancy of one pipeline stage."""
+
+    active: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    _since: float = 0.0
+
+    def enter(self) -> None:
+        self.active += 1
+        self._since = time.monotonic()
+
+    def leave(self) -> None:
+        self.active -= 1
+        self.batches += 1
+        self.busy_seconds += time.monotonic() - self._since
+
+    def info(self, uptime: float) -> dict:
+        return {
+            "active": self.active,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "utilization": round(self.busy_seconds / uptime, 3) if uptime > 0 else 0.0,
+        }
+
+
+# (model_name, image_size, jobs, staged) waiting for the inference stage.
+_ReadyGroup = Tuple[str, int, List[EmbedJob], Optional["StagedBatch"]]
+
+
 class BatchWindow:
     """Async batch-window coalescer sitting in front of EmbedQueue.
 
     Usage::
 
-        bw = BatchWindow(embedder, queue, batch_window_ms=50, batch_max_size=8)
+        bw = BatchWindow(embedder, queue, batch_window_ms=50, batch_max_size=8, pipeline_depth=1)
         await bw.start()
         result = await bw.submit(job)   # raises on embed/queue errors
         await bw.stop()
@@ -70,29 +119,51 @@ class BatchWindow:
         queue: "EmbedQueue",
         batch_window_ms: int,
         batch_max_size: int,
+        pipeline_depth: int = 1,
     ) -> None:
         self._embedder = embedder
         self._queue = queue
         self._window_ms = batch_window_ms
         self._max_size = max(1, batch_max_size)
+        self._depth = max(0, pipeline_depth)
         self._pending: asyncio.Queue[EmbedJob] = asyncio.Queue()
+        self._ready: asyncio.Queue[_ReadyGroup] = asyncio.Queue()
+        # One buffer on the model plus `depth` staged ones.
+        self._buffers = asyncio.Semaphore(self._depth + 1)
         self._task: asyncio.Task | None = None
+        self._infer_task: asyncio.Task | None = None
+        self._stager: ThreadPoolExecutor | None = None
+        self._stage_clock = _StageClock()
+        self._infer_clock = _StageClock()
+        self._stage_blocked = 0
+        self._infer_starved = 0
+        self._started_at = time.monotonic()
 
     async def start(self) -> None:
+        self._started_at = time.monotonic()
         self._task = asyncio.create_task(self._run(), name="batch-window")
+        if self._depth > 0:
+            # One thread: the collector stages a single group at a time.
+            self._stager = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-stage")
+            self._infer_task = asyncio.create_task(self._infer_loop(), name="batch-window-infer")
         logger.info(
-            f"BatchWindow started: window_ms={self._window_ms}, max_size={self._max_size}"
+            f"BatchWindow started: window_ms={self._window_ms}, max_size={self._max_size}, "
+            f"pipeline_depth={self._depth}"
         )
 
     async def stop(self) -> None:
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except (asyncio.CancelledError, Exception):
-                pass
-
-        # Cancel any jobs still waiting in the queue.
+        for task in (self._task, self._infer_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        if self._stager is not None:
+            self._stager.shutdown(wait=False, cancel_futures=True)
+            self._stager = None
+
+        # Cancel any jobs still waiting in the queue or staged for inference.
         while True:
             try:
                 job = self._pending.get_nowait()
@@ -100,6 +171,14 @@ class BatchWindow:
                     job._future.cancel()
             except asyncio.QueueEmpty:
                 break
+        while True:
+            try:
+                _name, _size, jobs, _staged = self._ready.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            for job in jobs:
+                if not job._future.done():
+                    job._future.cancel()
 
         logger.info("BatchWindow stopped")
 
@@ -109,6 +188,21 @@ class BatchWindow:
         await self._pending.put(job)
         return await future
 
+    def stats(self) -> dict:
+        """Pipeline occupancy: a high ``infer_starved`` count with a busy
+        ``stage`` means decoding is the bottleneck; a high ``stage_blocked``
+        count means the model is, and more depth will not help."""
+        uptime = time.monotonic() - self._started_at
+        return {
+            "pipeline_depth": self._depth,
+            "pending_jobs": self._pending.qsize(),
+            "staged_batches": self._ready.qsize(),
+            "stage": self._stage_clock.info(uptime),
+            "infer": self._infer_clock.info(uptime),
+            "stage_blocked": self._stage_blocked,
+            "infer_starved": self._infer_starved,
+        }
+
     # ------------------------------------------------------------------
     # Internal loop
     # ------------------------------------------------------------------
@@ -139,68 +233,148 @@ class BatchWindow:
             if len(batch) > 1:
                 logger.debug(f"BatchWindow dispatching {len(batch)} requests")
 
-            await self._dispatch(batch)
+            if self._depth > 0:
+                await self._stage(batch)
+            else:
+                await self._dispatch(batch)
 
-    async def _dispatch(self, batch: List[EmbedJob]) -> None:
-        """Group batch by (resolved_model, image_size) then embed each group."""
-        # Group jobs by (resolved model name, resolved image_size).
+    def _group(self, batch: List[EmbedJob]) -> dict[tuple, list[EmbedJob]]:
+        """Group jobs by (resolved model name, resolved image_size)."""
         groups: dict[tuple, list[EmbedJob]] = {}
         for job in batch:
             spec: ModelSpec = self._embedder.resolve_model(job.model)
             target_size: int = spec.image_size if job.image_size is None else job.image_size
             key = (spec.name, target_size)
             groups.setdefault(key, []).append(job)
-
-        for (model_name, image_size), jobs in groups.items():
-            acquired = False
-            shared = False
+        return groups
+
+    async def _stage(self, batch: List[EmbedJob]) -> None:
+        """Collector side of the pipeline: decode each group, then queue it for inference."""
+        for (model_name, image_size), jobs in self._group(batch).items():
+            if self._buffers.locked():
+                self._stage_blocked += 1
+            await self._buffers.acquire()
+            staged: Optional["StagedBatch"] = None
+            if all(j.prepared is not None for j in jobs):
+                self._stage_clock.enter()
+                try:
+                    staged = await self._stage_group(image_size, jobs)
+                except Exception as exc:
+                    # The inference stage decodes an unstaged group itself.
+                    logger.warning(f"BatchWindow staging failed, decoding under the slot: {exc}")
+                finally:
+                    self._stage_clock.leave()
+            self._ready.put_nowait((model_name, image_size, jobs, staged))
+
+    async def _stage_group(self, image_size: int, jobs: List[EmbedJob]) -> "StagedBatch":
+        """Run ``stage_prepared_batch`` on the staging thread under the shared model lock."""
+        spec = self._embedder.resolve_model(jobs[0].model)
+        stage = functools.partial(
+            self._embedder.stage_prepared_batch, spec, image_size, [j.prepared for j in jobs]
+        )
+        await self._queue.acquire_shared()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._stager, stage)
+        finally:
+            await self._queue.release_shared()
+
+    async def _infer_loop(self) -> None:
+        """Inference side of the pipeline: run staged groups under a compute slot, in order."""
+        while True:
+            if self._ready.empty():
+                self._infer_starved += 1
             try:
-                await self._queue.acquire()
-                acquired = True
-                await self._queue.acquire_shared()
-                shared = True
-
-                if len(jobs) == 1:
-                    j = jobs[0]
-                    result: EmbedResult = await anyio.to_thread.run_sync(
-                        self._embedder.embed,
-                        j.image_url,
-                        j.image_base64,
-                        j.model,
-                        j.normalize,
-                        j.image_size,
-                    )
-                    if not j._future.done():
-                        j._future.set_result(result)
-                else:
-                    from .embedder import BatchItem  # local import avoids circular at module level
-
-                    spec = self._embedder.resolve_model(jobs[0].model)
-                    batch_items: List[BatchItem] = [
-                        BatchItem(j.image_url, j.image_base64, j.normalize)
-                        for j in jobs
-                    ]
-                    per_item = await anyio.to_thread.run_sync(
-                        self._embedder.embed_batch, spec, image_size, batch_items
-                    )
-                    if len(per_item) != len(jobs):
-                        raise RuntimeError(
-                            "embed_batch returned "
-                            f"{len(per_item)} results for {len(jobs)} jobs"
-                        )
-                    for job, outcome in zip(jobs, per_item):
-                        if not job._future.done():
-                            if isinstance(outcome, Exception):
-                                job._future.set_exception(outcome)
-                            else:
-                                job._future.set_result(outcome)
-
-            except Exception as exc:
-                for job in jobs:
-                    if not job._future.done():
-                        job._future.set_exception(exc)
+                model_name, image_size, jobs, staged = await self._ready.get()
+            except asyncio.CancelledError:
+                return
+            self._infer_clock.enter()
+            try:
+                await self._dispatch_group(model_name, image_size, jobs, staged)
             finally:
-                if shared:
-                    await self._queue.release_shared()
-                if acquired:
-                    await self._queue.release()
+                self._infer_clock.leave()
+                self._buffers.release()
+
+    async def _dispatch(self, batch: List[EmbedJob]) -> None:
+        """Group batch by (resolved_model, image_size) then embed each group."""
+        for (model_name, image_size), jobs in self._group(batch).items():
+            await self._dispatch_group(model_name, image_size, jobs)
+
+    async def _dispatch_group(
+        self,
+        model_name: str,
+        image_size: int,
+        jobs: List[EmbedJob],
+        staged: Optional["StagedBatch"] = None,
+    ) -> None:
+        """Embed one (model, image_size) group while holding a compute slot."""
+        acquired = False
+        shared = False
+        try:
+            await self._queue.acquire()
+            acquired = True
+            await self._queue.acquire_shared()
+            shared = True
+
+            if all(j.prepared is not None for j in jobs):
+                spec = self._embedder.resolve_model(jobs[0].model)
+                prepared = [j.prepared for j in jobs]
+                if staged is not None:
+                    per_item = await anyio.to_thread.run_sync(
+                        functools.partial(
+                            self._embedder.embed_prepared_batch, spec, image_size, prepared, staged=staged
+                        )
+                    )
+                else:
+                    per_item = await anyio.to_thread.run_sync(
+                        self._embedder.embed_prepared_batch, spec, image_size, prepared
+                    )
+                self._resolve_jobs(jobs, per_item)
+            elif len(jobs) == 1:
+                j = jobs[0]
+                result: EmbedResult = await anyio.to_thread.run_sync(
+                    self._embedder.embed,
+                    j.image_url,
+                    j.image_base64,
+                    j.model,
+                    j.normalize,
+                    j.image_size,
+                )
+                if not j._future.done():
+                    j._future.set_result(result)
+            else:
+                from .embedder import BatchItem  # local import avoids circular at module level
+
+                spec = self._embedder.resolve_model(jobs[0].model)
+                batch_items: List[BatchItem] = [
+                    BatchItem(j.image_url, j.image_base64, j.normalize)
+                    for j in jobs
+                ]
+                per_item = await anyio.to_thread.run_sync(
+                    self._embedder.embed_batch, spec, image_size, batch_items
+                )
+                self._resolve_jobs(jobs, per_item)
+
+        except Exception as exc:
+            for job in jobs:
+                if not job._future.done():
+                    job._future.set_exception(exc)
+        finally:
+            if shared:
+                await self._queue.release_shared()
+            if acquired:
+                await self._queue.release()
+
+    @staticmethod
+    def _resolve_jobs(jobs: List[EmbedJob], per_item: list) -> None:
+        """Hand each per-item outcome (result or ``Exception``) to its job's future."""
+        if len(per_item) != len(jobs):
+            raise RuntimeError(
+                "embed_batch returned "
+                f"{len(per_item)} results for {len(jobs)} jobs"
+            )
+        for job, outcome in zip(jobs, per_item):
+            if not job._future.done():
+                if isinstance(outcome, Exception):
+                    job._future.set_exception(outcome)
+                else:
+                    job._future.set_result(outcome)
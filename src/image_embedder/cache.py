@@ -0,0 +1,552 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""In-memory embedding cache backed by per-model float32 slabs.
+
+Each ``(model, dims)`` width owns one preallocated ``float32`` matrix (a slab).
+Cache entries only hold a row index into their slab; evicted rows go back on
+the slab's free list and are recycled by the next insert.  A 768-dim vector
+therefore costs 3 KiB of slab space instead of ~20 KiB as a tuple of Python
+floats.
+
+The cache can be bounded by entry count, by a total byte budget, and by
+optional per-model byte quotas.  A slab never grows past the rows its budget
+or quota can hold, and ``trim()`` hands unused slab capacity back to the
+allocator when the process is under memory pressure.
+
+With ``policy="tinylfu"`` new entries must win W-TinyLFU admission
+(``admission.py``) before they can displace entries that are hit more often,
+so a one-off library rescan does not flush the hot set.
+
+``ShardedEmbeddingLRUCache`` splits those bounds across independently locked
+segments chosen by key hash, so concurrent compute slots, batch fan-out and
+the prepare stage do not serialize on a single lock.
+
+``SingleFlight`` sits in front of the cache: concurrent misses on the same
+key share one computation instead of each running a forward pass.
+"""
+
+import hashlib
+import math
+import string
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .admission import TinyLfuPolicy
+
+# Eviction/admission policies accepted by ``EMBED_CACHE_POLICY``.
+CACHE_POLICIES = ("lru", "tinylfu")
+
+# (embedding, dims, provider, model_name, image_size)
+EmbedResult = Tuple[List[float], int, str, str, int]
+
+_HEX = frozenset(string.hexdigits.lower())
+
+# Rows allocated when a slab is first created; slabs grow by doubling.
+_INITIAL_SLAB_ROWS = 64
+
+# Smallest segment worth splitting off: below this, per-shard LRU order drifts
+# too far from a global LRU (and tiny test caches stay single-segment).
+_MIN_SHARD_ENTRIES = 64
+_MIN_SHARD_BYTES = 1024 * 1024
+
+
+class _Slab:
+    """Growable float32 matrix with a free list of recyclable rows."""
+
+    def __init__(self, dims: int, capacity: int) -> None:
+        self.dims = dims
+        self.rows = np.empty((capacity, dims), dtype=np.float32)
+        # Reversed so pop() hands out low rows first.
+        self.free: List[int] = list(range(capacity - 1, -1, -1))
+
+    @property
+    def capacity(self) -> int:
+        return self.rows.shape[0]
+
+    def alloc(self, max_rows: int) -> int:
+        if not self.free:
+            old = self.capacity
+            new = min(max(old * 2, 1), max(max_rows, old + 1))
+            grown = np.empty((new, self.dims), dtype=np.float32)
+            grown[:old] = self.rows
+            self.rows = grown
+            self.free = list(range(new - 1, old - 1, -1))
+        return self.free.pop()
+
+    def release(self, row: int) -> None:
+        self.free.append(row)
+
+    def shrink(self, entries: List["_SlabEntry"]) -> None:
+        """Reallocate to exactly ``len(entries)`` rows, renumbering *entries* in place."""
+        idx = np.fromiter((e.row for e in entries), dtype=np.intp, count=len(entries))
+        self.rows = self.rows[idx]
+        for new_row, entry in enumerate(entries):
+            entry.row = new_row
+        self.free = []
+
+
+@dataclass(slots=True)
+class _SlabEntry:
+    """Cache entry metadata; the vector itself lives in ``slab.rows[row]``."""
+
+    slab: _Slab
+    row: int
+    source: str
+    model: str
+    image_size: int
+
+    def snapshot(self) -> Tuple[np.ndarray, int, str, str, int]:
+        """Copy the row out of the slab (cheap, under the cache lock).
+
+        The copy detaches the vector from row recycling, so the caller can
+        build the ``EmbedResult`` after releasing the lock.
+        """
+        return (self.slab.rows[self.row].copy(), self.slab.dims, self.source, self.model, self.image_size)
+
+
+def _to_result(snapshot: Tuple[np.ndarray, int, str, str, int]) -> EmbedResult:
+    # tolist() is the one conversion per hit and always yields a fresh list,
+    # so callers may mutate results without touching the slab.
+    vector, dims, source, model, image_size = snapshot
+    return (vector.tolist(), dims, source, model, image_size)
+
+
+class EmbeddingLRUCache:
+    """Thread-safe in-memory LRU cache for computed embeddings.
+
+    Cache keys encode all axes that affect the output:
+    ``sha256(image_bytes) | model_name | image_size | normalize``
+    where *image_bytes* is the effective image content embedded by the service.
+
+    *maxsize* bounds the number of entries and *max_bytes* the total vector
+    bytes; ``0`` leaves that bound off.  *model_quota_bytes* additionally caps
+    the bytes held for individual models, evicting that model's LRU entries.
+    *policy* ``"tinylfu"`` puts W-TinyLFU admission in front of the bound
+    (entries when *maxsize* is set, else bytes).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        max_bytes: int = 0,
+        model_quota_bytes: Optional[Dict[str, int]] = None,
+        policy: str = "lru",
+    ) -> None:
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unsupported cache policy: {policy}")
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._quotas: Dict[str, int] = dict(model_quota_bytes or {})
+        self._cache: "OrderedDict[str, _SlabEntry]" = OrderedDict()
+        self._model_lru: Dict[str, "OrderedDict[str, None]"] = {}
+        self._model_bytes: Dict[str, int] = {}
+        self._slabs: Dict[Tuple[str, int], _Slab] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes = 0
+        self._policy: Optional[TinyLfuPolicy] = None
+        if policy == "tinylfu" and (maxsize or max_bytes):
+            # Weights are 1 per entry when count-bounded, row bytes when byte-budgeted.
+            self._policy = TinyLfuPolicy(maxsize or max_bytes, maxsize or max_bytes // 2048)
+
+    @staticmethod
+    def make_key(
+        image_bytes: bytes,
+        model_name: str,
+        image_size: int,
+        normalize: bool,
+    ) -> str:
+        """Return a deterministic, hashable cache key for the given request."""
+        return EmbeddingLRUCache.make_key_from_digest(
+            EmbeddingLRUCache.content_digest(image_bytes), model_name, image_size, normalize
+        )
+
+    @staticmethod
+    def content_digest(image_bytes: bytes) -> str:
+        """Hex SHA-256 of the image content; the first component of every cache key.
+
+        hashlib releases the GIL while hashing buffers larger than 2 KiB.
+        """
+        return hashlib.sha256(image_bytes, usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def make_key_from_digest(
+        digest: str,
+        model_name: str,
+        image_size: int,
+        normalize: bool,
+    ) -> str:
+        """Build a cache key from a ``content_digest()`` computed earlier."""
+        return f"{digest}|{model_name}|{image_size}|{normalize}"
+
+    @staticmethod
+    def split_key(key: str) -> Optional[Tuple[str, str, int, bool]]:
+        """Inverse of ``make_key_from_digest``; None unless *key* is well formed.
+
+        Returns ``(digest, model_name, image_size, normalize)``.  The digest
+        must be 64 lowercase hex characters.
+        """
+        parts = key.split("|")
+        if len(parts) != 4:
+            return None
+        digest, model_name, image_size, normalize = parts
+        if (
+            len(digest) != 64
+            or not _HEX.issuperset(digest)
+            or not image_size.isdigit()
+            or normalize not in ("True", "False")
+        ):
+            return None
+        return digest, model_name, int(image_size), normalize == "True"
+
+    def get(self, key: str) -> Optional[EmbedResult]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._model_lru[entry.model].move_to_end(key)
+            self._hits += 1
+            if self._policy is not None:
+                self._policy.on_hit(key)
+            snapshot = entry.snapshot()
+        return _to_result(snapshot)
+
+    def put(self, key: str, value: EmbedResult) -> None:
+        embedding, dims, source, model, image_size = value
+        row_bytes = dims * 4
+        quota = self._quotas.get(model, 0)
+        if (self._max_bytes and row_bytes > self._max_bytes) or (quota and row_bytes > quota):
+            return
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._model_lru[model].move_to_end(key)
+                if self._policy is not None:
+                    self._policy.on_hit(key)
+                return
+            # Admission first: a rejected entry must not cost anyone their slot.
+            if self._policy is not None:
+                admitted, victims = self._policy.add(key, 1 if self._maxsize else row_bytes)
+                for victim in victims:
+                    self._evict(victim)
+                if not admitted:
+                    return
+            if quota:
+                lru = self._model_lru.get(model)
+                while lru and self._model_bytes[model] + row_bytes > quota:
+                    self._evict(next(iter(lru)))
+            while self._cache and (
+                (self._maxsize and len(self._cache) >= self._maxsize)
+                or (self._max_bytes and self._bytes + row_bytes > self._max_bytes)
+            ):
+                self._evict(next(iter(self._cache)))
+
+            slab = self._slabs.get((model, dims))
+            max_rows = self._max_rows(model, row_bytes)
+            if slab is None:
+                slab = _Slab(dims, min(max_rows, _INITIAL_SLAB_ROWS))
+                self._slabs[(model, dims)] = slab
+            row = slab.alloc(max_rows)
+            slab.rows[row] = embedding
+            self._cache[key] = _SlabEntry(slab, row, source, model, image_size)
+            self._model_lru.setdefault(model, OrderedDict())[key] = None
+            self._model_bytes[model] = self._model_bytes.get(model, 0) + row_bytes
+            self._bytes += row_bytes
+
+    def entries(self) -> List[Tuple[str, np.ndarray, str, str, int]]:
+        """Copy out ``(key, vector, source, model, image_size)`` for every entry, least recent first."""
+        with self._lock:
+            snapshots = [(key, entry.snapshot()) for key, entry in self._cache.items()]
+        return [(key, vector, source, model, size) for key, (vector, _dims, source, model, size) in snapshots]
+
+    def trim(self, fraction: float) -> int:
+        """Evict the least recently used *fraction* of cached bytes and shrink slabs.
+
+        Intended as a memory-pressure response; returns the number of bytes
+        released (live rows plus reclaimed slab capacity).
+        """
+        with self._lock:
+            reserved_before = self._reserved_bytes()
+            target = int(self._bytes * (1.0 - min(max(fraction, 0.0), 1.0)))
+            while self._cache and self._bytes > target:
+                self._evict(next(iter(self._cache)))
+            self._shrink_slabs()
+            return reserved_before - self._reserved_bytes()
+
+    def info(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            models: Dict[str, dict] = {}
+            for (model, _dims), slab in self._slabs.items():
+                stats = models.setdefault(model, {
+                    "size": len(self._model_lru.get(model, ())),
+                    "bytes": self._model_bytes.get(model, 0),
+                    "reserved_bytes": 0,
+                    "quota_bytes": self._quotas.get(model, 0),
+                })
+                stats["reserved_bytes"] += slab.rows.nbytes
+            return {
+                "size": len(self._cache),
+                "maxsize": self._maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / total, 4) if total > 0 else 0.0,
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "reserved_bytes": self._reserved_bytes(),
+                "models": models,
+                **({"admission": self._policy.info()} if self._policy is not None else {}),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._model_lru.clear()
+            self._model_bytes.clear()
+            self._slabs.clear()
+            if self._policy is not None:
+                self._policy.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _evict(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        if self._policy is not None:
+            self._policy.remove(key)
+        del self._model_lru[entry.model][key]
+        entry.slab.release(entry.row)
+        row_bytes = entry.slab.dims * 4
+        self._model_bytes[entry.model] -= row_bytes
+        self._bytes -= row_bytes
+        self._evictions += 1
+
+    def _max_rows(self, model: str, row_bytes: int) -> int:
+        """Largest slab the configured bounds can ever fill for *model*."""
+        limits = [
+            limit // row_bytes
+            for limit in (self._max_bytes, self._quotas.get(model, 0))
+            if limit
+        ]
+        if self._maxsize:
+            limits.append(self._maxsize)
+        return max(1, min(limits)) if limits else 1 << 31
+
+    def _reserved_bytes(self) -> int:
+        return sum(slab.rows.nbytes for slab in self._slabs.values())
+
+    def _shrink_slabs(self) -> None:
+        by_slab: Dict[int, List[_SlabEntry]] = {}
+        for entry in self._cache.values():
+            by_slab.setdefault(id(entry.slab), []).append(entry)
+        for slab_key, slab in list(self._slabs.items()):
+            entries = by_slab.get(id(slab))
+            if entries:
+                slab.shrink(entries)
+            else:
+                del self._slabs[slab_key]
+
+
+class ShardedEmbeddingLRUCache:
+    """``EmbeddingLRUCache`` split into independently locked segments.
+
+    Each key lives in segment ``crc32(key) % shards``.  Entry, byte and
+    per-model quota bounds are divided evenly between segments; with keys
+    spread uniformly by their content hash, per-segment LRU eviction tracks a
+    global LRU closely.  The segment count is reduced when a segment would
+    hold fewer than ``_MIN_SHARD_ENTRIES`` entries or ``_MIN_SHARD_BYTES``.
+    """
+
+    make_key = staticmethod(EmbeddingLRUCache.make_key)
+    content_digest = staticmethod(EmbeddingLRUCache.content_digest)
+    make_key_from_digest = staticmethod(EmbeddingLRUCache.make_key_from_digest)
+
+    def __init__(
+        self,
+        shards: int,
+        maxsize: int,
+        max_bytes: int = 0,
+        model_quota_bytes: Optional[Dict[str, int]] = None,
+        policy: str = "lru",
+    ) -> None:
+        quotas = dict(model_quota_bytes or {})
+        limits = [shards]
+        if maxsize:
+            limits.append(maxsize // _MIN_SHARD_ENTRIES)
+        limits.extend(limit // _MIN_SHARD_BYTES for limit in [max_bytes, *quotas.values()] if limit)
+        n = max(1, min(limits))
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._quotas = quotas
+        self._shards = [
+            EmbeddingLRUCache(
+                math.ceil(maxsize / n),
+                math.ceil(max_bytes / n),
+                {model: math.ceil(quota / n) for model, quota in quotas.items()},
+                policy,
+            )
+            for _ in range(n)
+        ]
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def _shard(self, key: str) -> EmbeddingLRUCache:
+        # crc32 rather than the per-process salted hash(), so placement is reproducible.
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def get(self, key: str) -> Optional[EmbedResult]:
+        return self._shard(key).get(key)
+
+    def put(self, key: str, value: EmbedResult) -> None:
+        self._shard(key).put(key, value)
+
+    def entries(self) -> List[Tuple[str, np.ndarray, str, str, int]]:
+        """Entries of every segment, each segment least recent first."""
+        return [entry for shard in self._shards for entry in shard.entries()]
+
+    def trim(self, fraction: float) -> int:
+        return sum(shard.trim(fraction) for shard in self._shards)
+
+    def info(self) -> dict:
+        """Segment stats summed into the ``EmbeddingLRUCache.info()`` shape, plus ``shards``."""
+        parts = [shard.info() for shard in self._shards]
+        totals = {
+            field: sum(part[field] for part in parts)
+            for field in ("size", "hits", "misses", "evictions", "bytes", "reserved_bytes")
+        }
+        models: Dict[str, dict] = {}
+        for part in parts:
+            for model, stats in part["models"].items():
+                merged = models.setdefault(model, {
+                    "size": 0,
+                    "bytes": 0,
+                    "reserved_bytes": 0,
+                    "quota_bytes": self._quotas.get(model, 0),
+                })
+                for field in ("size", "bytes", "reserved_bytes"):
+                    merged[field] += stats[field]
+        lookups = totals["hits"] + totals["misses"]
+        admission: Optional[dict] = None
+        for part in parts:
+            if "admission" in part:
+                if admission is None:
+                    admission = dict(part["admission"])
+                else:
+                    for name, value in part["admission"].items():
+                        if name != "policy":
+                            admission[name] += value
+        return {
+            "size": totals["size"],
+            "maxsize": self._maxsize,
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "evictions": totals["evictions"],
+            "hit_rate": round(totals["hits"] / lookups, 4) if lookups > 0 else 0.0,
+            "bytes": totals["bytes"],
+            "max_bytes": self._max_bytes,
+            "reserved_bytes": totals["reserved_bytes"],
+            "models": models,
+            "shards": len(self._shards),
+            **({"admission": admission} if admission is not None else {}),
+        }
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+
+class _Flight:
+    """One in-progress computation; followers block on ``done``."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[EmbedResult] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """In-flight table that coalesces concurrent computations of one cache key.
+
+    The first caller for a key becomes the *leader* and computes the result;
+    callers arriving before it finishes become *followers* and wait for the
+    leader's result (or exception) instead of running their own forward pass.
+    Leaders must always call ``finish()``, including on failure.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    def begin(self, key: str) -> Tuple[_Flight, bool]:
+        """Join the flight for *key*; returns ``(flight, is_leader)``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._coalesced += 1
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            self._leaders += 1
+            return flight, True
+
+    def finish(
+        self,
+        key: str,
+        flight: _Flight,
+        result: Optional[EmbedResult] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Publish the leader's outcome and wake all followers."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.done.set()
+
+    def count_coalesced(self, n: int = 1) -> None:
+        """Record duplicates the caller resolved itself (e.g. repeats within one batch)."""
+        with self._lock:
+            self._coalesced += n
+
+    @staticmethod
+    def wait(flight: _Flight, timeout: Optional[float] = None) -> EmbedResult:
+        """Block until *flight* finishes; re-raise its error or return a copy of its result."""
+        if not flight.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an identical in-flight embed request")
+        if flight.error is not None:
+            raise flight.error
+        assert flight.result is not None
+        embedding, dims, source, model, image_size = flight.result
+        return (list(embedding), dims, source, model, image_size)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+            }
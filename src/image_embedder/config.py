@@ -48,6 +48,14 @@ def _int(env_key: str, section: str, cfg_key: str, default: int) -> int:
     return int(c) if c is not None else default
 
 
+def _float(env_key: str, section: str, cfg_key: str, default: float) -> float:
+    v = os.getenv(env_key)
+    if v is not None:
+        return float(v)
+    c = _c(section, cfg_key)
+    return float(c) if c is not None else default
+
+
 def _bool(env_key: str, section: str, cfg_key: str, default: bool) -> bool:
     v = os.getenv(env_key)
     if v is not None:
@@ -64,12 +72,43 @@ def _get_csv_list(value: str) -> list[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
+def _int_map(env_key: str, section: str, cfg_key: str) -> dict[str, int]:
+    """Parse ``name=value,name=value`` from the env, or a TOML table, into a dict of ints."""
+    v = os.getenv(env_key)
+    if v is not None:
+        pairs = (item.split("=", 1) for item in _get_csv_list(v))
+        return {name.strip(): int(value) for name, value in pairs}
+    c = _c(section, cfg_key)
+    return {str(k): int(val) for k, val in (c or {}).items()}
+
+
 @dataclass
 class Settings:
     host: str = field(default_factory=lambda: _str("IMAGE_EMBEDDER_HOST", "server", "host", "0.0.0.0"))
     port: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_PORT", "server", "port", 8000))
     default_model: str = field(default_factory=lambda: _str("DEFAULT_MODEL", "model", "default_model", "ViT-L-14"))
     device: str = field(default_factory=lambda: _str("DEVICE", "model", "device", "auto"))
+    preprocess_engine: str = field(
+        default_factory=lambda: _str("IMAGE_PREPROCESS_ENGINE", "model", "preprocess_engine", "processor")
+    )
+    pixel_cache_max_mb: int = field(
+        default_factory=lambda: _int("IMAGE_PIXEL_CACHE_MAX_MB", "model", "pixel_cache_max_mb", 0)
+    )
+    ov_performance_hint: str = field(
+        default_factory=lambda: _str("OV_PERFORMANCE_HINT", "model", "ov_performance_hint", "")
+    )
+    ov_infer_requests: int = field(
+        default_factory=lambda: _int("OV_INFER_REQUESTS", "model", "ov_infer_requests", 0)
+    )
+    ov_compile_cache: bool = field(
+        default_factory=lambda: _bool("OV_COMPILE_CACHE", "model", "ov_compile_cache", True)
+    )
+    onnx_intra_op_threads: int = field(
+        default_factory=lambda: _int("ONNX_INTRA_OP_THREADS", "model", "onnx_intra_op_threads", 0)
+    )
+    onnx_inter_op_threads: int = field(
+        default_factory=lambda: _int("ONNX_INTER_OP_THREADS", "model", "onnx_inter_op_threads", 1)
+    )
     allow_remote_urls: bool = field(default_factory=lambda: _bool("ALLOW_REMOTE_IMAGE_URLS", "image", "allow_remote_urls", False))
     allowed_remote_hosts: list[str] = field(
         default_factory=lambda: (
@@ -80,14 +119,65 @@ class Settings:
     )
     max_image_bytes: int = field(default_factory=lambda: _int("MAX_IMAGE_BYTES", "image", "max_image_bytes", 10485760))
     request_timeout_seconds: int = field(default_factory=lambda: _int("REQUEST_TIMEOUT_SECONDS", "image", "request_timeout_seconds", 15))
+    jpeg_draft_decode: bool = field(
+        default_factory=lambda: _bool("IMAGE_JPEG_DRAFT_DECODE", "image", "jpeg_draft_decode", False)
+    )
+    fetch_concurrency: int = field(default_factory=lambda: _int("IMAGE_FETCH_CONCURRENCY", "image", "fetch_concurrency", 16))
+    batch_fetch_concurrency: int = field(
+        default_factory=lambda: _int("IMAGE_BATCH_FETCH_CONCURRENCY", "image", "batch_fetch_concurrency", 8)
+    )
+    http_pool_hosts: int = field(default_factory=lambda: _int("IMAGE_HTTP_POOL_HOSTS", "image", "http_pool_hosts", 10))
+    http_pool_maxsize: int = field(default_factory=lambda: _int("IMAGE_HTTP_POOL_MAXSIZE", "image", "http_pool_maxsize", 16))
+    dns_cache_size: int = field(default_factory=lambda: _int("IMAGE_DNS_CACHE_SIZE", "image", "dns_cache_size", 256))
+    dns_cache_ttl_seconds: float = field(
+        default_factory=lambda: _float("IMAGE_DNS_CACHE_TTL_SECONDS", "image", "dns_cache_ttl_seconds", 60.0)
+    )
+    dns_negative_ttl_seconds: float = field(
+        default_factory=lambda: _float("IMAGE_DNS_NEGATIVE_TTL_SECONDS", "image", "dns_negative_ttl_seconds", 10.0)
+    )
+    url_cache_size: int = field(default_factory=lambda: _int("IMAGE_URL_CACHE_SIZE", "image", "url_cache_size", 4096))
+    failure_cache_size: int = field(
+        default_factory=lambda: _int("IMAGE_FAILURE_CACHE_SIZE", "image", "failure_cache_size", 1024)
+    )
+    failure_ttl_http_seconds: float = field(
+        default_factory=lambda: _float("IMAGE_FAILURE_TTL_HTTP_SECONDS", "image", "failure_ttl_http_seconds", 300.0)
+    )
+    failure_ttl_transient_seconds: float = field(
+        default_factory=lambda: _float(
+            "IMAGE_FAILURE_TTL_TRANSIENT_SECONDS", "image", "failure_ttl_transient_seconds", 30.0
+        )
+    )
+    failure_ttl_decode_seconds: float = field(
+        default_factory=lambda: _float("IMAGE_FAILURE_TTL_DECODE_SECONDS", "image", "failure_ttl_decode_seconds", 3600.0)
+    )
 
     embed_concurrency: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_CONCURRENCY", "queue", "concurrency", 1))
     embed_max_queue: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_MAX_QUEUE", "queue", "max_queue", 100))
     embed_max_wait_seconds: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_MAX_WAIT_SECONDS", "queue", "max_wait_seconds", 60))
+    embed_io_concurrency: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_IO_CONCURRENCY", "queue", "io_concurrency", 8))
+    decode_workers: int = field(default_factory=lambda: _int("IMAGE_EMBEDDER_DECODE_WORKERS", "queue", "decode_workers", 0))
     embed_batch_window_ms: int = field(default_factory=lambda: _int("EMBED_BATCH_WINDOW_MS", "queue", "batch_window_ms", 0))
     embed_batch_max_size: int = field(default_factory=lambda: _int("EMBED_BATCH_MAX_SIZE", "queue", "batch_max_size", 8))
+    embed_batch_pipeline_depth: int = field(
+        default_factory=lambda: _int("EMBED_BATCH_PIPELINE_DEPTH", "queue", "batch_pipeline_depth", 1)
+    )
     embed_batch_api_max_items: int = field(default_factory=lambda: _int("EMBED_BATCH_API_MAX_ITEMS", "queue", "batch_api_max_items", 32))
     embed_cache_size: int = field(default_factory=lambda: _int("EMBED_CACHE_SIZE", "model", "embed_cache_size", 1000))
+    embed_cache_max_mb: int = field(default_factory=lambda: _int("EMBED_CACHE_MAX_MB", "model", "embed_cache_max_mb", 0))
+    embed_cache_policy: str = field(default_factory=lambda: _str("EMBED_CACHE_POLICY", "model", "embed_cache_policy", "lru"))
+    embed_cache_shards: int = field(default_factory=lambda: _int("EMBED_CACHE_SHARDS", "model", "embed_cache_shards", 8))
+    embed_cache_model_quota_mb: dict[str, int] = field(
+        default_factory=lambda: _int_map("EMBED_CACHE_MODEL_QUOTA_MB", "model", "embed_cache_model_quota_mb")
+    )
+    embed_disk_cache_dir: str | None = field(
+        default_factory=lambda: os.getenv("EMBED_DISK_CACHE_DIR") or _c("model", "embed_disk_cache_dir") or None
+    )
+    embed_disk_cache_max_mb: int = field(
+        default_factory=lambda: _int("EMBED_DISK_CACHE_MAX_MB", "model", "embed_disk_cache_max_mb", 1024)
+    )
+    embed_cache_snapshot_path: str | None = field(
+        default_factory=lambda: os.getenv("EMBED_CACHE_SNAPSHOT_PATH") or _c("model", "embed_cache_snapshot_path") or None
+    )
     warmup_on_startup: bool = field(default_factory=lambda: _bool("WARMUP_ON_STARTUP", "model", "warmup_on_startup", True))
 
     log_level: str = field(default_factory=lambda: _str("LOG_LEVEL", "logging", "level", "INFO"))
@@ -109,6 +199,9 @@ class Settings:
     embed_cleanup_every_n: int = field(
         default_factory=lambda: _int("EMBED_CLEANUP_EVERY_N", "memory", "embed_cleanup_every_n", 0)
     )
+    embed_cache_trim_fraction: float = field(
+        default_factory=lambda: _float("EMBED_CACHE_TRIM_FRACTION", "memory", "embed_cache_trim_fraction", 0.25)
+    )
 
     shutdown_timeout_seconds: int = field(
         default_factory=lambda: _int("SHUTDOWN_TIMEOUT_SECONDS", "server", "shutdown_timeout_seconds", 30)
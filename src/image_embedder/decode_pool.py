@@ -0,0 +1,166 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Optional process pool for image decode + preprocessing (``[queue] decode_workers``).
+
+Pillow decoding and CLIP preprocessing hold the GIL for much of their run.
+With several compute slots, threads then serialise on one core.  This pool
+moves "raw bytes -> pixel tensor" into worker processes:
+
+- the parent allocates one ``SharedMemory`` block sized ``(N, 3, S, S)``
+  float32 per batch;
+- each worker decodes one image and writes its preprocessed row in place
+  (``ClipPreprocessor.write_into``), returning only ``None`` or an error
+  message;
+- the parent copies the block out once and unlinks it.
+
+Pixel arrays are never pickled.  Workers use the native preprocessing
+engine (``preprocess.py``); the HuggingFace processor is not loaded in child
+processes, so the pool requires ``IMAGE_PREPROCESS_ENGINE=native``.
+
+A batch waits for its rows up to one overall deadline.  Rows that miss it, or
+that were in flight when a worker died (``BrokenProcessPool``), come back as
+per-row errors listed in ``TRANSIENT_ERRORS``; a broken executor is replaced
+so later batches keep decoding.
+"""
+
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .preprocess import ClipPreprocessor
+
+_preprocessor: Optional[ClipPreprocessor] = None
+
+DECODE_TIMEOUT = "Timed out decoding image"
+WORKER_CRASHED = "Image decode worker crashed"
+# Row errors that say nothing about the image itself; callers should not cache them as decode failures.
+TRANSIENT_ERRORS = frozenset({DECODE_TIMEOUT, WORKER_CRASHED})
+
+
+def _decode_into(
+    shm_name: str,
+    shape: Tuple[int, int, int, int],
+    index: int,
+    data: bytes,
+    draft_size: Optional[int],
+) -> Optional[str]:
+    """Worker: decode *data* into row *index* of the shared block; return an error message or None."""
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = ClipPreprocessor()
+    try:
+        image = Image.open(io.BytesIO(data))
+        if draft_size:
+            image.draft("RGB", (draft_size, draft_size))
+        image = image.convert("RGB")
+    except Exception:
+        return "Unable to decode image bytes"
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        _preprocessor.write_into(image, shape[2], out[index])
+        del out  # release the exported buffer before close()
+    finally:
+        shm.close()
+    return None
+
+
+class DecodePool:
+    """Decode and preprocess images in *workers* processes; results return via shared memory."""
+
+    def __init__(self, workers: int) -> None:
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._restarts = 0
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs torch/OpenVINO threads is unsafe.
+        return ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Replace *broken* unless another caller already did."""
+        with self._lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+                self._restarts += 1
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def restarts(self) -> int:
+        return self._restarts
+
+    def pixels(
+        self,
+        blobs: Sequence[bytes],
+        size: int,
+        draft: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """Return ``(pixel_values, errors)`` for *blobs*.
+
+        *pixel_values* has shape ``(len(blobs), 3, size, size)``; rows whose
+        entry in *errors* is not None are undefined.  *timeout* bounds the
+        whole batch, not each row.
+        """
+        shape = (len(blobs), 3, size, size)
+        nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        try:
+            executor = self._executor
+            try:
+                futures = [
+                    executor.submit(_decode_into, shm.name, shape, i, data, size if draft else None)
+                    for i, data in enumerate(blobs)
+                ]
+            except BrokenProcessPool:
+                # A crash in an earlier batch; resubmit once to a fresh executor.
+                self._restart(executor)
+                executor = self._executor
+                futures = [
+                    executor.submit(_decode_into, shm.name, shape, i, data, size if draft else None)
+                    for i, data in enumerate(blobs)
+                ]
+            # A dead worker fails every pending row at once, so this only runs to the deadline on a hang.
+            done, _pending = wait(futures, timeout=timeout)
+            errors: List[Optional[str]] = []
+            broken = False
+            for future in futures:
+                if future not in done:
+                    future.cancel()
+                    errors.append(DECODE_TIMEOUT)
+                elif isinstance(future.exception(), BrokenProcessPool):
+                    broken = True
+                    errors.append(WORKER_CRASHED)
+                elif future.exception() is not None:
+                    errors.append("Unable to decode image bytes")
+                else:
+                    errors.append(future.result())
+            if broken:
+                self._restart(executor)
+            view = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            pixel_values = view.copy()
+            del view
+        finally:
+            shm.close()
+            shm.unlink()
+        return pixel_values, errors
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
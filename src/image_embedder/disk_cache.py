@@ -0,0 +1,396 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Persistent on-disk second tier for the embedding cache.
+
+Layout of the cache directory::
+
+    CURRENT                 number of the live generation
+    gen-<n>/rows-<dims>.f32 append-only fixed-width float32 rows, one file per width
+    gen-<n>/index.bin       append-only log of (key -> row) records
+
+Rows are read back through a read-only ``numpy.memmap`` of each data file, so
+a hit costs one dictionary lookup plus a ``dims * 4`` byte copy.  The index is
+replayed into memory on startup; the in-memory index keeps LRU order and drives
+eviction.  When the data files would exceed the byte budget, least recently
+used entries are dropped from the index at once and a background thread
+compacts the files down to a low-water mark.
+
+Compaction never touches the live generation: it writes the surviving rows and
+a matching index into ``gen-<n+1>`` and commits by atomically replacing
+``CURRENT``.  A crash at any point leaves either the old or the new generation
+whole; leftover generations are deleted on the next start.
+"""
+
+import io
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# (embedding, dims, provider, model_name, image_size)
+EmbedResult = Tuple[List[float], int, str, str, int]
+
+_INDEX_NAME = "index.bin"
+_CURRENT_NAME = "CURRENT"
+_INDEX_MAGIC = b"CFDC\x00\x01"
+# row, dims, image_size, key_len, model_len
+_RECORD = struct.Struct("<IIIHH")
+# After an over-budget eviction, compact down to this fraction of the budget so
+# the (expensive) rewrite is amortised over many subsequent puts.
+_COMPACT_TARGET = 0.75
+# Rows gathered per write while compacting, bounding the copy's memory use.
+_COMPACT_CHUNK_ROWS = 4096
+
+
+@dataclass(slots=True)
+class _DiskEntry:
+    dims: int
+    row: int
+    model: str
+    image_size: int
+
+
+class DiskEmbeddingCache:
+    """Thread-safe, byte-budgeted, memory-mapped embedding store.
+
+    Keys are the same strings produced by ``EmbeddingLRUCache.make_key`` so the
+    disk tier can sit directly behind the in-memory LRU.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be > 0")
+        self._dir = Path(directory)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Serialises compactions; held without self._lock while rows are copied.
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._gen = 0
+        self._index: "OrderedDict[str, _DiskEntry]" = OrderedDict()
+        self._rows: Dict[int, int] = {}
+        self._writers: Dict[int, io.FileIO] = {}
+        self._maps: Dict[int, np.memmap] = {}
+        self._index_file: Optional[io.FileIO] = None
+        self._live_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._compactions = 0
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._open_generation()
+        self._load_index()
+        if self._file_bytes() > self._max_bytes:
+            self._evict_to(int(self._max_bytes * _COMPACT_TARGET))
+            self.compact()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[EmbedResult]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._index.move_to_end(key)
+            embedding = self._read_row(entry.dims, entry.row).tolist()
+            self._hits += 1
+            return (embedding, entry.dims, "local", entry.model, entry.image_size)
+
+    def put(self, key: str, value: EmbedResult) -> None:
+        embedding, dims, _source, model, image_size = value
+        row_bytes = dims * 4
+        if row_bytes > self._max_bytes:
+            return
+        data = np.asarray(embedding, dtype="<f4").tobytes()
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+                return
+            if self._file_bytes() + row_bytes > self._max_bytes:
+                # Dropping index entries is cheap; the file rewrite runs off this path.
+                self._evict_to(int(self._max_bytes * _COMPACT_TARGET) - row_bytes)
+                self._schedule_compaction()
+            row = self._append_row(dims, data)
+            entry = _DiskEntry(dims, row, model, image_size)
+            self._append_record(key, entry)
+            self._index[key] = entry
+            self._live_bytes += row_bytes
+
+    def info(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._index),
+                "bytes": self._live_bytes,
+                "file_bytes": self._file_bytes(),
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "compactions": self._compactions,
+                "hit_rate": round(self._hits / total, 4) if total > 0 else 0.0,
+            }
+
+    def compact(self) -> bool:
+        """Rewrite the live rows into a new generation; False when nothing was dead.
+
+        Rows are copied without holding the cache lock (data files are
+        append-only, so rows below the snapshot's counts never change).  Puts
+        that landed meanwhile are carried over under the lock, just before the
+        new generation is committed.
+        """
+        with self._compact_lock:
+            with self._lock:
+                if self._file_bytes() <= self._live_bytes:
+                    return False
+                old_gen = self._gen
+                row_counts = dict(self._rows)
+                by_dims: Dict[int, List[int]] = {}
+                for entry in self._index.values():
+                    by_dims.setdefault(entry.dims, []).append(entry.row)
+
+            new_dir = self._gen_dir(old_gen + 1)
+            shutil.rmtree(new_dir, ignore_errors=True)
+            new_dir.mkdir(parents=True)
+            remap: Dict[Tuple[int, int], int] = {}
+            counts: Dict[int, int] = {}
+            outs: Dict[int, io.BufferedWriter] = {}
+            try:
+                for dims, rows in by_dims.items():
+                    old = np.memmap(self._data_path(dims), dtype="<f4", mode="r", shape=(row_counts[dims], dims))
+                    outs[dims] = open(new_dir / f"rows-{dims}.f32", "wb")
+                    for start in range(0, len(rows), _COMPACT_CHUNK_ROWS):
+                        chunk = np.asarray(rows[start:start + _COMPACT_CHUNK_ROWS], dtype=np.int64)
+                        outs[dims].write(old[chunk].tobytes())
+                    del old
+                    remap.update(((dims, row), new_row) for new_row, row in enumerate(rows))
+                    counts[dims] = len(rows)
+
+                with self._lock:
+                    new_rows: Dict[str, int] = {}
+                    for key, entry in self._index.items():
+                        new_row = remap.get((entry.dims, entry.row))
+                        if new_row is None:
+                            # Put after the snapshot: still only in the old generation.
+                            out = outs.get(entry.dims)
+                            if out is None:
+                                out = outs[entry.dims] = open(new_dir / f"rows-{entry.dims}.f32", "wb")
+                            out.write(self._read_row(entry.dims, entry.row).tobytes())
+                            new_row = counts.get(entry.dims, 0)
+                            counts[entry.dims] = new_row + 1
+                        new_rows[key] = new_row
+                    with open(new_dir / _INDEX_NAME, "wb") as index_out:
+                        index_out.write(_INDEX_MAGIC)
+                        for key, entry in self._index.items():
+                            index_out.write(self._encode_record(
+                                key, _DiskEntry(entry.dims, new_rows[key], entry.model, entry.image_size)
+                            ))
+                        index_out.flush()
+                        os.fsync(index_out.fileno())
+                    for out in outs.values():
+                        out.flush()
+                        os.fsync(out.fileno())
+                        out.close()
+                    outs = {}
+
+                    self._close_handles()
+                    self._write_current(old_gen + 1)
+                    self._gen = old_gen + 1
+                    for key, entry in self._index.items():
+                        entry.row = new_rows[key]
+                    self._rows = counts
+                    self._compactions += 1
+            except BaseException:
+                for out in outs.values():
+                    out.close()
+                if self._gen == old_gen:
+                    shutil.rmtree(new_dir, ignore_errors=True)
+                raise
+            shutil.rmtree(self._gen_dir(old_gen), ignore_errors=True)
+            return True
+
+    def flush(self) -> None:
+        """Fsync all open data and index files."""
+        with self._lock:
+            for f in list(self._writers.values()) + [self._index_file]:
+                if f is not None:
+                    os.fsync(f.fileno())
+
+    def close(self) -> None:
+        """Finish any running compaction, then flush and release every file handle and memory map."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        self.flush()
+        with self._lock:
+            self._close_handles()
+
+    # ------------------------------------------------------------------
+    # Storage internals (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _gen_dir(self, gen: int) -> Path:
+        return self._dir / f"gen-{gen}"
+
+    def _data_path(self, dims: int) -> Path:
+        return self._gen_dir(self._gen) / f"rows-{dims}.f32"
+
+    def _open_generation(self) -> None:
+        """Select the committed generation and delete any other (half-written or superseded) one."""
+        try:
+            self._gen = int((self._dir / _CURRENT_NAME).read_text(encoding="ascii").strip())
+        except (OSError, ValueError):
+            self._gen = 0
+        live = self._gen_dir(self._gen)
+        for path in self._dir.glob("gen-*"):
+            if path != live:
+                shutil.rmtree(path, ignore_errors=True)
+        live.mkdir(exist_ok=True)
+
+    def _write_current(self, gen: int) -> None:
+        tmp = self._dir / (_CURRENT_NAME + ".tmp")
+        with open(tmp, "w", encoding="ascii") as out:
+            out.write(f"{gen}\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self._dir / _CURRENT_NAME)
+
+    def _schedule_compaction(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact_in_background, name="disk-cache-compact", daemon=True)
+        self._compactor.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Disk embedding cache compaction failed: {e}")
+
+    def _file_bytes(self) -> int:
+        return sum(rows * dims * 4 for dims, rows in self._rows.items())
+
+    def _read_row(self, dims: int, row: int) -> np.ndarray:
+        mapped = self._maps.get(dims)
+        if mapped is None or row >= mapped.shape[0]:
+            mapped = np.memmap(
+                self._data_path(dims), dtype="<f4", mode="r", shape=(self._rows[dims], dims)
+            )
+            self._maps[dims] = mapped
+        return mapped[row]
+
+    def _append_row(self, dims: int, data: bytes) -> int:
+        writer = self._writers.get(dims)
+        if writer is None:
+            # Unbuffered so freshly appended rows are immediately visible to a new memmap.
+            writer = open(self._data_path(dims), "ab", buffering=0)
+            self._writers[dims] = writer
+        row = self._rows.get(dims, 0)
+        writer.write(data)
+        self._rows[dims] = row + 1
+        return row
+
+    def _append_record(self, key: str, entry: _DiskEntry) -> None:
+        if self._index_file is None:
+            path = self._gen_dir(self._gen) / _INDEX_NAME
+            fresh = not path.exists() or path.stat().st_size == 0
+            self._index_file = open(path, "ab", buffering=0)
+            if fresh:
+                self._index_file.write(_INDEX_MAGIC)
+        self._index_file.write(self._encode_record(key, entry))
+
+    @staticmethod
+    def _encode_record(key: str, entry: _DiskEntry) -> bytes:
+        key_b = key.encode("utf-8")
+        model_b = entry.model.encode("utf-8")
+        header = _RECORD.pack(entry.row, entry.dims, entry.image_size, len(key_b), len(model_b))
+        return header + key_b + model_b
+
+    def _load_index(self) -> None:
+        for path in self._gen_dir(self._gen).glob("rows-*.f32"):
+            try:
+                dims = int(path.stem.split("-", 1)[1])
+            except ValueError:
+                continue
+            if dims <= 0:
+                continue
+            size = path.stat().st_size
+            rows = size // (dims * 4)
+            if size != rows * dims * 4:
+                # Drop a torn trailing row left by a crash mid-append so the
+                # next append stays row-aligned.
+                os.truncate(path, rows * dims * 4)
+            self._rows[dims] = rows
+
+        path = self._gen_dir(self._gen) / _INDEX_NAME
+        if not path.exists():
+            return
+        raw = path.read_bytes()
+        if not raw.startswith(_INDEX_MAGIC):
+            logger.warning(f"Ignoring unrecognised disk cache index at {path}")
+            self._reset_files()
+            return
+
+        pos = len(_INDEX_MAGIC)
+        while pos + _RECORD.size <= len(raw):
+            row, dims, image_size, key_len, model_len = _RECORD.unpack_from(raw, pos)
+            end = pos + _RECORD.size + key_len + model_len
+            if end > len(raw):
+                break  # torn trailing record
+            key = raw[pos + _RECORD.size:pos + _RECORD.size + key_len].decode("utf-8")
+            model = raw[pos + _RECORD.size + key_len:end].decode("utf-8")
+            pos = end
+
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._live_bytes -= old.dims * 4
+            if row >= self._rows.get(dims, 0):
+                continue  # row was lost with a torn data-file append
+            self._index[key] = _DiskEntry(dims, row, model, image_size)
+            self._live_bytes += dims * 4
+
+        logger.info(
+            f"Disk embedding cache loaded: {len(self._index)} entries, "
+            f"{self._live_bytes} bytes live in {self._dir}"
+        )
+
+    def _evict_to(self, target_bytes: int) -> None:
+        while self._index and self._live_bytes > max(0, target_bytes):
+            _key, entry = self._index.popitem(last=False)
+            self._live_bytes -= entry.dims * 4
+            self._evictions += 1
+
+    def _reset_files(self) -> None:
+        self._close_handles()
+        live = self._gen_dir(self._gen)
+        for path in live.glob("rows-*.f32"):
+            path.unlink()
+        (live / _INDEX_NAME).unlink(missing_ok=True)
+        self._index.clear()
+        self._rows = {}
+        self._live_bytes = 0
+
+    def _close_handles(self) -> None:
+        for f in self._writers.values():
+            f.close()
+        self._writers = {}
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        self._maps = {}
@@ -0,0 +1,92 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Bounded TTL cache of SSRF-validated host resolutions.
+
+``_validate_remote_url`` stores the public addresses a host resolved to, so
+repeat fetches from the same image CDN skip ``socket.getaddrinfo``.  Because
+the HTTP pool pins connections to exactly these addresses, a cached entry can
+never be re-resolved to something private behind our back; the TTL only
+bounds how stale the address list may get.  TTLs are clamped to
+``MAX_TTL_SECONDS`` regardless of configuration.
+
+Failures (unresolvable host, private address) are cached too, for a shorter
+negative TTL, and replayed as the same ``ValueError``.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Hard ceiling on how long any resolution (positive or negative) is trusted.
+MAX_TTL_SECONDS = 300.0
+
+
+@dataclass(slots=True)
+class _HostEntry:
+    expires: float
+    addresses: Optional[List[str]] = None
+    error: Optional[str] = None
+
+
+class HostResolutionCache:
+    """Thread-safe LRU of ``(host, port)`` -> validated addresses or validation error."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float, negative_ttl_seconds: float) -> None:
+        self._maxsize = maxsize
+        self._ttl = min(max(ttl_seconds, 0.0), MAX_TTL_SECONDS)
+        self._negative_ttl = min(max(negative_ttl_seconds, 0.0), MAX_TTL_SECONDS)
+        self._entries: "OrderedDict[Tuple[str, int], _HostEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    def lookup(self, host: str, port: int) -> Optional[List[str]]:
+        """Return cached addresses, raise the cached ``ValueError``, or return None on a miss."""
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.error is not None:
+                self._negative_hits += 1
+                error = entry.error
+            else:
+                self._hits += 1
+                return list(entry.addresses or ())
+        raise ValueError(error)
+
+    def put(self, host: str, port: int, addresses: List[str]) -> None:
+        if self._ttl > 0:
+            self._store((host, port), _HostEntry(time.monotonic() + self._ttl, addresses=list(addresses)))
+
+    def put_error(self, host: str, port: int, message: str) -> None:
+        if self._negative_ttl > 0:
+            self._store((host, port), _HostEntry(time.monotonic() + self._negative_ttl, error=message))
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "ttl_seconds": self._ttl,
+                "negative_ttl_seconds": self._negative_ttl,
+            }
+
+    def _store(self, key: Tuple[str, int], entry: _HostEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
@@ -4,121 +4,47 @@
 
 import base64
 import binascii
-import hashlib
 import ipaddress
 import io
 import math
+import os
 import socket
 import sys
 import threading
-from collections import OrderedDict
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from contextlib import closing
-from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
 from urllib.parse import urlparse
 
 import numpy as np
 import requests
 from PIL import Image
 
+from .backends import InferenceBackend, backend_class, ov_performance_hint
+from .cache import CACHE_POLICIES, EmbeddingLRUCache, ShardedEmbeddingLRUCache, SingleFlight
 from .config import Settings
+from .disk_cache import DiskEmbeddingCache
+from .decode_pool import TRANSIENT_ERRORS, DecodePool
+from .dns_cache import HostResolutionCache
+from .failure_cache import FailureCache, kind_for_status
+from .http_pool import ImageHTTPPool
+from .manifest import iter_manifest_blocks, read_manifest_header
+from .pixel_cache import PixelTensorCache
+from .preprocess import ClipPreprocessor
+from .snapshot import iter_snapshot, read_snapshot
+from .url_cache import UrlMetadata, UrlMetadataCache
 
 if TYPE_CHECKING:
     import torch
     from transformers import CLIPVisionModelWithProjection, CLIPProcessor
 
-ModelTuple = Tuple[Any, Any, str]
+# (backend, processor, device_str)
+ModelTuple = Tuple[InferenceBackend, Any, str]
 EmbedResult = Tuple[List[float], int, str, str, int]
 
 
-@dataclass(frozen=True, slots=True)
-class CachedEmbedding:
-    """Immutable cache payload for one embedding result."""
-
-    embedding: Tuple[float, ...]
-    dims: int
-    source: str
-    model: str
-    image_size: int
-
-    @classmethod
-    def from_result(cls, value: EmbedResult) -> "CachedEmbedding":
-        embedding, dims, source, model, image_size = value
-        return cls(tuple(embedding), dims, source, model, image_size)
-
-    def to_result(self) -> EmbedResult:
-        return (list(self.embedding), self.dims, self.source, self.model, self.image_size)
-
-
-class EmbeddingLRUCache:
-    """Thread-safe in-memory LRU cache for computed embeddings.
-
-    Cache keys encode all axes that affect the output:
-    ``sha256(image_bytes) | model_name | image_size | normalize``
-    where *image_bytes* is the effective image content embedded by the service.
-    """
-
-    def __init__(self, maxsize: int) -> None:
-        self._maxsize = maxsize
-        self._cache: OrderedDict = OrderedDict()
-        self._lock = threading.Lock()
-        self._hits = 0
-        self._misses = 0
-        self._evictions = 0
-
-    @staticmethod
-    def make_key(
-        image_bytes: bytes,
-        model_name: str,
-        image_size: int,
-        normalize: bool,
-    ) -> str:
-        """Return a deterministic, hashable cache key for the given request."""
-        content_hash = hashlib.sha256(image_bytes, usedforsecurity=False).hexdigest()
-        return f"{content_hash}|{model_name}|{image_size}|{normalize}"
-
-    def get(self, key: str) -> Optional[EmbedResult]:
-        with self._lock:
-            if key in self._cache:
-                self._cache.move_to_end(key)
-                self._hits += 1
-                return self._cache[key].to_result()
-            self._misses += 1
-            return None
-
-    def put(self, key: str, value: Union[CachedEmbedding, EmbedResult]) -> None:
-        with self._lock:
-            if key in self._cache:
-                self._cache.move_to_end(key)
-            else:
-                if len(self._cache) >= self._maxsize:
-                    self._cache.popitem(last=False)
-                    self._evictions += 1
-            if isinstance(value, CachedEmbedding):
-                self._cache[key] = value
-            else:
-                self._cache[key] = CachedEmbedding.from_result(value)
-
-    def info(self) -> dict:
-        with self._lock:
-            total = self._hits + self._misses
-            return {
-                "size": len(self._cache),
-                "maxsize": self._maxsize,
-                "hits": self._hits,
-                "misses": self._misses,
-                "evictions": self._evictions,
-                "hit_rate": round(self._hits / total, 4) if total > 0 else 0.0,
-            }
-
-    def clear(self) -> None:
-        with self._lock:
-            self._cache.clear()
-            self._hits = 0
-            self._misses = 0
-            self._evictions = 0
-
-
 @dataclass
 class BatchItem:
     """Descriptor for a single image within a batch embed call."""
@@ -134,6 +60,44 @@ class ModelSpec:
     hf_id: str
     dims: int
     image_size: int
+    # "fp32", or "int8" for dynamic int8 quantization of the Linear layers (CPU torch only).
+    precision: str = "fp32"
+
+
+@dataclass
+class PreparedEmbed:
+    """Output of the pre-inference stage (``prepare``/``prepare_batch``).
+
+    Holds the resolved image bytes and cache key so the inference stage does
+    no network I/O; *result* is set when the request was served from cache.
+    """
+
+    spec: ModelSpec
+    target_size: int
+    normalize: bool
+    image_bytes: bytes = b""
+    cache_key: str = ""
+    result: Optional[EmbedResult] = None
+    # SHA-256 of image_bytes when prepare() already computed it.
+    digest: str = ""
+
+
+@dataclass
+class DecodedBatch:
+    """Model inputs for a list of payloads, produced ahead of the forward pass."""
+
+    model: "ModelTuple"
+    # None when no payload decoded; otherwise one row per payload without a load error.
+    inputs: Optional[Dict[str, Any]]
+    load_errors: List[Optional[Exception]]
+
+
+@dataclass
+class StagedBatch:
+    """Output of ``stage_prepared_batch()``: the items needing compute, already decoded."""
+
+    payloads: List[PreparedEmbed]
+    decoded: DecodedBatch
 
 
 MODEL_CATALOG: Dict[str, ModelSpec] = {
@@ -148,6 +112,21 @@ MODEL_CATALOG: Dict[str, ModelSpec] = {
         hf_id="openai/clip-vit-base-patch16",
         dims=512,
         image_size=224
+    ),
+    # Quantized variants: distinct names, so their cache keys never mix with fp32 rows.
+    "ViT-L-14-int8": ModelSpec(
+        name="ViT-L-14-int8",
+        hf_id="openai/clip-vit-large-patch14",
+        dims=768,
+        image_size=224,
+        precision="int8"
+    ),
+    "ViT-B-16-int8": ModelSpec(
+        name="ViT-B-16-int8",
+        hf_id="openai/clip-vit-base-patch16",
+        dims=512,
+        image_size=224,
+        precision="int8"
     )
 }
 
@@ -160,11 +139,108 @@ class ImageEmbedder:
         self._model_locks_guard = threading.Lock()
         self._embed_count = 0
         self._embed_count_lock = threading.Lock()
-        self._embedding_cache: Optional[EmbeddingLRUCache] = (
-            EmbeddingLRUCache(self.settings.embed_cache_size)
-            if self.settings.embed_cache_size > 0
+        # Load/warmup timings per model, recorded by warmup(); GET /health "startup".
+        self._startup: Dict[str, Dict[str, Any]] = {}
+        self._embedding_cache: Optional[Union[EmbeddingLRUCache, ShardedEmbeddingLRUCache]] = (
+            self._make_embedding_cache(self.settings)
+        )
+        ov_performance_hint(self.settings)
+        engine = (self.settings.preprocess_engine or "processor").strip().lower()
+        if engine not in ("processor", "native"):
+            raise ValueError(f"Unsupported IMAGE_PREPROCESS_ENGINE value: {self.settings.preprocess_engine}")
+        self._preprocessor: Optional[ClipPreprocessor] = ClipPreprocessor() if engine == "native" else None
+        # Decoded + preprocessed rows, shared by every model with the same image_size.
+        self._pixel_cache: Optional[PixelTensorCache] = (
+            PixelTensorCache(self.settings.pixel_cache_max_mb * 1024 * 1024)
+            if self.settings.pixel_cache_max_mb > 0
+            else None
+        )
+        self._pixel_recipe = f"clip:{engine}:{'draft' if self.settings.jpeg_draft_decode else 'full'}"
+        # Worker processes that turn image bytes into pixel tensors off the GIL.
+        if self.settings.decode_workers > 0 and engine != "native":
+            # Workers only run the native preprocessor; the processor engine would silently differ.
+            raise ValueError("IMAGE_EMBEDDER_DECODE_WORKERS requires IMAGE_PREPROCESS_ENGINE=native")
+        self._decode_pool: Optional[DecodePool] = (
+            DecodePool(self.settings.decode_workers) if self.settings.decode_workers > 0 else None
+        )
+        self._disk_cache: Optional[DiskEmbeddingCache] = (
+            DiskEmbeddingCache(
+                self.settings.embed_disk_cache_dir,
+                self.settings.embed_disk_cache_max_mb * 1024 * 1024,
+            )
+            if self.settings.embed_disk_cache_dir and self.settings.embed_disk_cache_max_mb > 0
             else None
         )
+        # Coalesces concurrent computations of the same cache key.
+        self._inflight = SingleFlight()
+        # Shared by all batches; max_workers is the global remote-fetch fan-out.
+        self._fetch_pool: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(
+                max_workers=self.settings.fetch_concurrency,
+                thread_name_prefix="image-fetch",
+            )
+            if self.settings.fetch_concurrency > 1
+            else None
+        )
+        self._http_pool = ImageHTTPPool(
+            pool_hosts=self.settings.http_pool_hosts,
+            pool_maxsize=self.settings.http_pool_maxsize,
+        )
+        # Validated host resolutions; the pool pins connections to these addresses.
+        self._host_cache: Optional[HostResolutionCache] = (
+            HostResolutionCache(
+                self.settings.dns_cache_size,
+                self.settings.dns_cache_ttl_seconds,
+                self.settings.dns_negative_ttl_seconds,
+            )
+            if self.settings.dns_cache_size > 0
+            else None
+        )
+        # ETag/Last-Modified per URL; only useful when there is an embedding cache to revalidate.
+        self._url_cache: Optional[UrlMetadataCache] = (
+            UrlMetadataCache(self.settings.url_cache_size)
+            if self.settings.url_cache_size > 0
+            and (self._embedding_cache is not None or self._disk_cache is not None)
+            else None
+        )
+        # Validators of the last body _stream_image downloaded on this thread;
+        # _prepare_source records them under the digest it computes anyway.
+        self._fetched = threading.local()
+        self._failure_cache: Optional[FailureCache] = (
+            FailureCache(
+                self.settings.failure_cache_size,
+                {
+                    "http": self.settings.failure_ttl_http_seconds,
+                    "transient": self.settings.failure_ttl_transient_seconds,
+                    "decode": self.settings.failure_ttl_decode_seconds,
+                },
+            )
+            if self.settings.failure_cache_size > 0
+            else None
+        )
+
+    @staticmethod
+    def _make_embedding_cache(
+        settings: Settings,
+    ) -> Optional[Union[EmbeddingLRUCache, ShardedEmbeddingLRUCache]]:
+        """Build the memory tier: byte-budgeted when ``embed_cache_max_mb`` is set, else entry-counted.
+
+        Split into ``embed_cache_shards`` independently locked segments when that is > 1.
+        """
+        mb = 1024 * 1024
+        quotas = {name: q * mb for name, q in settings.embed_cache_model_quota_mb.items() if q > 0}
+        if settings.embed_cache_max_mb > 0:
+            maxsize, max_bytes = 0, settings.embed_cache_max_mb * mb
+        elif settings.embed_cache_size > 0:
+            maxsize, max_bytes = settings.embed_cache_size, 0
+        else:
+            return None
+        policy = (settings.embed_cache_policy or "lru").strip().lower()
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unsupported EMBED_CACHE_POLICY value: {settings.embed_cache_policy}")
+        if settings.embed_cache_shards > 1:
+            return ShardedEmbeddingLRUCache(settings.embed_cache_shards, maxsize, max_bytes, quotas, policy)
+        return EmbeddingLRUCache(maxsize, max_bytes=max_bytes, model_quota_bytes=quotas, policy=policy)
 
     def list_models(self) -> List[ModelSpec]:
         return list(MODEL_CATALOG.values())
@@ -172,29 +248,10 @@ class ImageEmbedder:
     def get_device_info(self) -> dict:
         try:
             device = self._resolve_device()
-            device_str = str(device)
-            if device_str.startswith("ov:"):
-                ov_device = device_str[len("ov:"):]
-                info: dict = {"type": "openvino", "ov_device": ov_device}
-                try:
-                    import openvino as ov
-                    core = ov.Core()
-                    available = core.available_devices
-                    info["available_devices"] = available
-                except Exception:
-                    pass
-                return info
-            info = {"type": device_str.split(":")[0]}
-            if device_str.startswith("cuda"):
-                try:
-                    import torch
-                    if torch.cuda.is_available():
-                        info["name"] = torch.cuda.get_device_name(device)
-                        if getattr(torch.version, "hip", None) is not None:
-                            info["type"] = "rocm"
-                            info["hip_version"] = torch.version.hip
-                except Exception:
-                    pass
+            info = backend_class(device).device_info(device)
+            backends = {name: model[0].info() for name, model in list(self._models.items())}
+            if backends:
+                info["backends"] = backends
             return info
         except Exception:
             return {"type": "unknown"}
@@ -208,28 +265,177 @@ class ImageEmbedder:
             })
         return result
 
+    def get_startup_info(self) -> Optional[dict]:
+        """Load and warmup timings for models warmed so far; None before any warmup."""
+        if not self._startup:
+            return None
+        return {"models": {name: dict(timings) for name, timings in self._startup.items()}}
+
     def get_memory_info(self) -> Optional[dict]:
         try:
             device = self._resolve_device()
-            device_str = str(device)
-            if device_str.startswith("ov:"):
-                # OpenVINO does not expose a Python API for GPU memory stats.
-                return None
-            import torch
-            if device_str.startswith("cuda") and torch.cuda.is_available():
-                return {
-                    "allocated_mb": torch.cuda.memory_allocated(device) / (1024 * 1024),
-                    "reserved_mb": torch.cuda.memory_reserved(device) / (1024 * 1024),
-                }
+            # OpenVINO does not expose a Python API for GPU memory stats;
+            # the ONNX Runtime backend is CPU-only.
+            return backend_class(device).device_memory(device)
         except Exception:
             pass
         return None
 
     def get_cache_info(self) -> Optional[dict]:
         """Return cache statistics, or None when caching is disabled."""
-        if self._embedding_cache is None:
+        if self._embedding_cache is None and self._disk_cache is None:
+            return None
+        info = self._embedding_cache.info() if self._embedding_cache is not None else {}
+        if self._disk_cache is not None:
+            info["disk"] = self._disk_cache.info()
+        info["inflight"] = self._inflight.info()
+        return info
+
+    def get_http_info(self) -> dict:
+        """Return connection-pool and DNS cache statistics for remote image downloads."""
+        info = self._http_pool.info()
+        info["dns"] = self._host_cache.info() if self._host_cache is not None else None
+        info["url_cache"] = self._url_cache.info() if self._url_cache is not None else None
+        return info
+
+    def get_pixel_cache_info(self) -> Optional[dict]:
+        """Return preprocessed-tensor cache statistics, or None when it is disabled."""
+        return self._pixel_cache.info() if self._pixel_cache is not None else None
+
+    def get_failure_cache_info(self) -> Optional[dict]:
+        """Return negative-cache statistics, or None when it is disabled."""
+        return self._failure_cache.info() if self._failure_cache is not None else None
+
+    def trim_caches(self, fraction: Optional[float] = None) -> int:
+        """Release a share of the in-memory caches under memory pressure; returns bytes freed."""
+        if fraction is None:
+            fraction = self.settings.embed_cache_trim_fraction
+        freed = 0
+        if self._embedding_cache is not None:
+            freed += self._embedding_cache.trim(fraction)
+        if self._pixel_cache is not None:
+            freed += self._pixel_cache.trim(fraction)
+        return freed
+
+    def export_cache(self) -> Iterator[bytes]:
+        """Serialize the in-memory cache as a ``snapshot.py`` stream, least recent first."""
+        entries = self._embedding_cache.entries() if self._embedding_cache is not None else []
+        return iter_snapshot(entries)
+
+    def import_cache(self, fp: BinaryIO) -> dict:
+        """Load a snapshot into the cache tiers; returns ``{"imported", "skipped"}`` counts.
+
+        Entries for models outside the catalog, with mismatched dims or size,
+        or with non-finite values are skipped, as are entries whose key does
+        not name the record's own model and size, and ``normalize`` entries
+        whose vector is not unit length.  Raises ValueError when caching is
+        disabled or the stream is malformed.
+        """
+        if self._embedding_cache is None and self._disk_cache is None:
+            raise ValueError("Embedding cache is disabled; nothing to import into")
+        imported = skipped = 0
+        for key, vector, source, model, image_size in read_snapshot(fp):
+            spec = MODEL_CATALOG.get(model)
+            parts = EmbeddingLRUCache.split_key(key)
+            if (
+                spec is None
+                or parts is None
+                or parts[1:3] != (spec.name, spec.image_size)
+                or vector.shape[0] != spec.dims
+                or image_size != spec.image_size
+                or not np.isfinite(vector).all()
+                or (parts[3] and abs(float(np.linalg.norm(vector)) - 1.0) > 1e-3)
+            ):
+                skipped += 1
+                continue
+            # Both tiers copy the float32 row; no list round-trip needed.
+            self._cache_put(key, (vector, spec.dims, source, model, image_size))  # type: ignore[arg-type]
+            imported += 1
+        return {"imported": imported, "skipped": skipped}
+
+    def ingest_manifest(self, fp: BinaryIO) -> dict:
+        """Load an NDJSON manifest of precomputed embeddings (``manifest.py``) into the cache tiers.
+
+        Rows are validated per block like ``_validate_embedding_result``
+        (catalog dims, finite values) and, for ``normalize`` manifests, must
+        have unit L2 norm.  Returns ``{"imported", "skipped"}`` counts.
+        """
+        if self._embedding_cache is None and self._disk_cache is None:
+            raise ValueError("Embedding cache is disabled; nothing to ingest into")
+        header = read_manifest_header(fp)
+        # No fallback to the default model: vectors from another model must not be keyed as this one.
+        spec = MODEL_CATALOG.get(header.model)
+        if spec is None:
+            raise ValueError(f"Manifest model {header.model!r} is not in the model catalog")
+        if header.image_size != spec.image_size:
+            raise ValueError(
+                f"Manifest image_size={header.image_size} does not match {spec.name} image_size={spec.image_size}"
+            )
+        if header.hash != "sha256":
+            raise ValueError(f"Manifest hash {header.hash} is not supported; cache keys use sha256 digests")
+        imported = skipped = 0
+        for digests, rows, malformed in iter_manifest_blocks(fp, spec.dims):
+            valid = np.isfinite(rows).all(axis=1)
+            if header.normalize:
+                valid &= np.abs(np.linalg.norm(rows, axis=1) - 1.0) <= 1e-3
+            skipped += malformed + int((~valid).sum())
+            for digest, row in zip(np.asarray(digests)[valid], rows[valid]):
+                key = EmbeddingLRUCache.make_key_from_digest(digest, spec.name, spec.image_size, header.normalize)
+                self._cache_put(key, (row, spec.dims, "local", spec.name, spec.image_size))  # type: ignore[arg-type]
+                imported += 1
+        return {"imported": imported, "skipped": skipped}
+
+    def save_cache_snapshot(self) -> Optional[int]:
+        """Write the memory tier to ``embed_cache_snapshot_path`` atomically; returns bytes written."""
+        path = self.settings.embed_cache_snapshot_path
+        if not path or self._embedding_cache is None:
+            return None
+        tmp = f"{path}.tmp"
+        written = 0
+        with open(tmp, "wb") as fp:
+            for chunk in self.export_cache():
+                fp.write(chunk)
+                written += len(chunk)
+        os.replace(tmp, path)
+        return written
+
+    def load_cache_snapshot(self) -> Optional[dict]:
+        """Warm the cache from ``embed_cache_snapshot_path``; None when unset or not yet written."""
+        path = self.settings.embed_cache_snapshot_path
+        if not path or not os.path.exists(path):
             return None
-        return self._embedding_cache.info()
+        with open(path, "rb") as fp:
+            return self.import_cache(fp)
+
+    def close(self) -> None:
+        """Flush persistent state on shutdown; the disk cache is kept for the next start."""
+        if self._fetch_pool is not None:
+            self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+        if self._decode_pool is not None:
+            self._decode_pool.close()
+        self._http_pool.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+
+    def _cache_get(self, key: str) -> Optional[EmbedResult]:
+        """Look *key* up in the memory tier, then the disk tier (promoting disk hits)."""
+        if self._embedding_cache is not None:
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                return cached
+        if self._disk_cache is not None:
+            cached = self._disk_cache.get(key)
+            if cached is not None:
+                if self._embedding_cache is not None:
+                    self._embedding_cache.put(key, cached)
+                return cached
+        return None
+
+    def _cache_put(self, key: str, result: EmbedResult) -> None:
+        if self._embedding_cache is not None:
+            self._embedding_cache.put(key, result)
+        if self._disk_cache is not None:
+            self._disk_cache.put(key, result)
 
     def is_default_model_loaded(self) -> bool:
         spec = self.resolve_model(None)
@@ -237,7 +443,14 @@ class ImageEmbedder:
 
     def warmup(self, model_name: Optional[str] = None) -> ModelSpec:
         spec = self.resolve_model(model_name or self.settings.default_model)
-        self._load_model(spec)
+        started = time.perf_counter()
+        backend, _processor, _device = self._load_model(spec)
+        loaded = time.perf_counter()
+        timings: Dict[str, Any] = {"load_seconds": round(loaded - started, 3)}
+        backend.warmup(spec.image_size)
+        timings["warmup_seconds"] = round(time.perf_counter() - loaded, 3)
+        timings.update(backend.load_timings)
+        self._startup.setdefault(spec.name, timings)
         return spec
 
     def resolve_model(self, model_name: Optional[str]) -> ModelSpec:
@@ -261,6 +474,10 @@ class ImageEmbedder:
                 ov_device = self.settings.device.split(":", 1)[1].upper()  # type: ignore[union-attr]
             return f"ov:{ov_device}"
 
+        # ONNX Runtime on CPU ("onnx" or "onnx:cpu"); like "ov:", needs no torch.
+        if device_setting in ("onnx", "onnx:cpu"):
+            return "ort:CPU"
+
         if device_setting == "rocm":
             if sys.platform == "win32":
                 raise ValueError(
@@ -304,68 +521,30 @@ class ImageEmbedder:
 
             device = self._resolve_device()
 
-            if isinstance(device, str) and device.startswith("ov:"):
-                return self._load_model_openvino(spec, device)
+            if spec.precision == "int8" and str(device) != "cpu":
+                raise ValueError(
+                    f"Model {spec.name} uses dynamic int8 quantization, which requires DEVICE=cpu "
+                    f"(current device: {device})"
+                )
 
-            from transformers import CLIPVisionModelWithProjection, CLIPProcessor
+            from transformers import CLIPProcessor
 
-            model = CLIPVisionModelWithProjection.from_pretrained(spec.hf_id)
+            backend = backend_class(device).load(spec, device, self.settings)
             processor = CLIPProcessor.from_pretrained(spec.hf_id)
-            model.to(device)  # type: ignore[arg-type]
-            model.eval()  # type: ignore[union-attr]
 
-            self._models[spec.name] = (model, processor, str(device))
+            self._models[spec.name] = (backend, processor, str(device))
             return self._models[spec.name]
 
-    def _load_model_openvino(self, spec: ModelSpec, ov_device_str: str):
-        """Load (or export-then-cache) a CLIP model for OpenVINO inference.
-
-        On the first call the HuggingFace model is loaded via PyTorch, converted
-        to OpenVINO IR format (.xml + .bin) with ``openvino.convert_model()``,
-        saved to *OV_MODEL_CACHE*, and compiled for the requested device.
-        Subsequent calls find the cached IR on disk and skip the export step,
-        so torch is not needed on the hot path after the first startup.
-
-        The stored tuple is ``(compiled_model, processor, ov_device_str)`` where
-        ``compiled_model`` is an ``openvino.CompiledModel``.  The rest of the
-        inference code detects the OV path by checking whether the device string
-        starts with ``"ov:"``.
-        """
-        import os
-        import pathlib
-        import openvino as ov
-        from transformers import CLIPProcessor
-
-        ov_device = ov_device_str[len("ov:"):]
-
-        cache_dir = pathlib.Path(
-            os.environ.get("OV_MODEL_CACHE", "/app/.cache/ov_ir")
-        ) / spec.name.replace("/", "_")
-        xml_path = cache_dir / "model.xml"
-
-        if not xml_path.exists():
-            # Export: load PyTorch model, trace + convert to OV IR, save to disk.
-            import torch
-            from transformers import CLIPVisionModelWithProjection
-
-            torch_model = CLIPVisionModelWithProjection.from_pretrained(spec.hf_id)
-            torch_model.eval()
-
-            dummy_input = {"pixel_values": torch.zeros(1, 3, spec.image_size, spec.image_size)}
-            ov_model = ov.convert_model(torch_model, example_input=dummy_input)
-
-            cache_dir.mkdir(parents=True, exist_ok=True)
-            ov.save_model(ov_model, str(xml_path))
-        else:
-            core_tmp = ov.Core()
-            ov_model = core_tmp.read_model(str(xml_path))
-
-        core = ov.Core()
-        compiled = core.compile_model(ov_model, ov_device)
-
-        processor = CLIPProcessor.from_pretrained(spec.hf_id)
-        self._models[spec.name] = (compiled, processor, ov_device_str)
-        return self._models[spec.name]
+    @staticmethod
+    def _run_backend(spec: ModelSpec, backend: InferenceBackend, inputs: Dict[str, Any], rows: int) -> "np.ndarray":
+        """Raw ``(rows, spec.dims)`` float32 embeddings from *backend*; any other shape raises ValueError."""
+        raw_output = backend.run(inputs)
+        if raw_output.ndim != 2 or raw_output.shape[0] != rows or raw_output.shape[1] != spec.dims:
+            raise ValueError(
+                f"{backend.label} model returned unexpected output shape {raw_output.shape!r} "
+                f"(expected ({rows}, {spec.dims})) for model={spec.name}"
+            )
+        return raw_output
 
     def _is_public_ip(self, ip_str: str) -> bool:
         ip = ipaddress.ip_address(ip_str)
@@ -378,7 +557,8 @@ class ImageEmbedder:
             or ip.is_unspecified
         )
 
-    def _validate_remote_url(self, image_url: str) -> None:
+    def _validate_remote_url(self, image_url: str) -> List[str]:
+        """Check *image_url* against the SSRF policy; return the public addresses it may use."""
         parsed = urlparse(image_url)
         if parsed.scheme not in {"http", "https"}:
             raise ValueError("Only http(s) image URLs are supported")
@@ -401,35 +581,85 @@ class ImageEmbedder:
             ipaddress.ip_address(host)
             if not self._is_public_ip(host):
                 raise ValueError("Remote image host resolves to a private address")
-            return
+            return [host]
         except ValueError:
             pass
 
-        # Resolve DNS and block private/reserved ranges.
+        port = parsed.port or 443
+        if self._host_cache is None:
+            return self._resolve_public_addresses(host, port)
+        cached = self._host_cache.lookup(host, port)  # raises a cached rejection
+        if cached is not None:
+            return cached
         try:
-            infos = socket.getaddrinfo(host, parsed.port or 443, type=socket.SOCK_STREAM)
+            addresses = self._resolve_public_addresses(host, port)
+        except ValueError as exc:
+            self._host_cache.put_error(host, port, str(exc))
+            raise
+        self._host_cache.put(host, port, addresses)
+        return addresses
+
+    def _resolve_public_addresses(self, host: str, port: int) -> List[str]:
+        """Resolve DNS and block private/reserved ranges."""
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
         except socket.gaierror as exc:
             raise ValueError("Unable to resolve remote image host") from exc
 
+        addresses: List[str] = []
         for info in infos:
             sockaddr = info[4]
-            ip_str = sockaddr[0]
-            if not self._is_public_ip(str(ip_str)):  # type: ignore[arg-type]
+            ip_str = str(sockaddr[0])
+            if not self._is_public_ip(ip_str):
                 raise ValueError("Remote image host resolves to a private address")
+            if ip_str not in addresses:
+                addresses.append(ip_str)
+        if not addresses:
+            raise ValueError("Unable to resolve remote image host")
+        return addresses
 
     def _fetch_image_bytes(self, image_url: str) -> bytes:
-        if not self.settings.allow_remote_urls:
-            raise ValueError("Remote image URLs are disabled")
+        data = self._download_image(image_url)
+        assert data is not None  # only conditional downloads can be "not modified"
+        return data
 
-        self._validate_remote_url(image_url)
+    def _download_image(self, image_url: str, revalidate: Optional[UrlMetadata] = None) -> Optional[bytes]:
+        """Download *image_url*; with *revalidate*, send its validators and return None on 304.
 
-        response = requests.get(
+        Transport and HTTP errors surface as ``ValueError`` (HTTP 400) and are
+        remembered in the failure cache, so retries fail fast.
+        """
+        if not self.settings.allow_remote_urls:
+            raise ValueError("Remote image URLs are disabled")
+        if self._failure_cache is not None:
+            self._failure_cache.check(("url", image_url))
+        try:
+            return self._stream_image(image_url, revalidate)
+        except requests.RequestException as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            if status is not None:
+                message = f"Remote image request failed with HTTP {status}"
+            elif isinstance(exc, requests.Timeout):
+                message = "Timed out fetching remote image"
+            else:
+                message = "Unable to fetch remote image"
+            if self._failure_cache is not None:
+                self._failure_cache.put(("url", image_url), kind_for_status(status), message)
+            raise ValueError(message) from exc
+
+    def _stream_image(self, image_url: str, revalidate: Optional[UrlMetadata]) -> Optional[bytes]:
+        # The pool validates every hop (including redirects) and pins new
+        # connections to the addresses _validate_remote_url approved.
+        response = self._http_pool.get(
             image_url,
+            self._validate_remote_url,
             timeout=self.settings.request_timeout_seconds,
-            stream=True,
+            headers=revalidate.conditional_headers() if revalidate is not None else None,
         )
 
         with closing(response):
+            if revalidate is not None and response.status_code == 304:
+                return None
             response.raise_for_status()
 
             content_length = response.headers.get("content-length")
@@ -446,6 +676,10 @@ class ImageEmbedder:
                     raise ValueError("Image payload exceeds maximum size")
                 buf.write(chunk)
 
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            if self._url_cache is not None and (etag or last_modified):
+                self._fetched.validators = (etag, last_modified)
             return buf.getvalue()
 
     def _decode_base64(self, image_base64: str) -> bytes:
@@ -466,12 +700,36 @@ class ImageEmbedder:
             return self._fetch_image_bytes(image_url)
         raise ValueError("image_url or image_base64 is required")
 
-    def _image_from_bytes(self, data: bytes) -> Image.Image:
+    def _image_from_bytes(self, data: bytes, min_size: Optional[int] = None) -> Image.Image:
+        """Decode *data* to RGB.
+
+        With *min_size*, JPEGs are decoded in draft mode: libjpeg scales by
+        1/2, 1/4 or 1/8 during the DCT, picking the smallest scale that
+        keeps both edges >= *min_size*.  Other formats ignore it.
+        """
         try:
-            return Image.open(io.BytesIO(data)).convert("RGB")
+            image = Image.open(io.BytesIO(data))
+            if min_size:
+                image.draft("RGB", (min_size, min_size))
+            return image.convert("RGB")
         except Exception as exc:
             raise ValueError("Unable to decode image bytes") from exc
 
+    def _decode_image(self, image_bytes: bytes, target_size: int) -> Image.Image:
+        """``_image_from_bytes`` that remembers undecodable content in the failure cache."""
+        try:
+            if self.settings.jpeg_draft_decode:
+                return self._image_from_bytes(image_bytes, target_size)
+            return self._image_from_bytes(image_bytes)
+        except ValueError as exc:
+            self._remember_decode_failure(image_bytes, str(exc))
+            raise
+
+    def _remember_decode_failure(self, image_bytes: bytes, message: str) -> None:
+        if self._failure_cache is not None:
+            digest = EmbeddingLRUCache.content_digest(image_bytes)
+            self._failure_cache.put(("decode", digest), "decode", message)
+
     def _load_image(self, image_url: Optional[str], image_base64: Optional[str]) -> Image.Image:
         data = self._resolve_image_bytes(image_url, image_base64)
         return self._image_from_bytes(data)
@@ -526,6 +784,22 @@ class ImageEmbedder:
         normalize: bool,
         image_size: Optional[int]
     ) -> Tuple[List[float], int, str, str, int]:
+        return self.embed_prepared(self.prepare(image_url, image_base64, model, normalize, image_size))
+
+    def prepare(
+        self,
+        image_url: Optional[str],
+        image_base64: Optional[str],
+        model: Optional[str],
+        normalize: bool,
+        image_size: Optional[int]
+    ) -> PreparedEmbed:
+        """Pre-inference stage: validate, resolve image bytes, hash, and check the cache.
+
+        Does network and CPU work but never touches the model, so routes run it
+        outside the inference concurrency slot.  A cache hit is returned in
+        ``PreparedEmbed.result``; otherwise pass the result to ``embed_prepared``.
+        """
         spec = self.resolve_model(model)
         if image_size is not None and image_size != spec.image_size:
             raise ValueError(
@@ -536,57 +810,190 @@ class ImageEmbedder:
         if target_size <= 0:
             raise ValueError("image_size must be a positive integer")
 
-        image_bytes = self._resolve_image_bytes(image_url, image_base64)
+        return self._prepare_source(spec, target_size, normalize, image_url, image_base64)
 
-        # Cache check — skip inference entirely on a hit.
-        if self._embedding_cache is not None:
-            cache_key = EmbeddingLRUCache.make_key(
-                image_bytes, spec.name, target_size, normalize
-            )
-            cached = self._embedding_cache.get(cache_key)
-            if cached is not None:
-                return cached
-        else:
-            cache_key = ""
+    def _prepare_source(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        normalize: bool,
+        image_url: Optional[str],
+        image_base64: Optional[str],
+    ) -> PreparedEmbed:
+        if image_url and not image_base64 and self._url_cache is not None:
+            self._fetched.validators = None
+            prepared = self._revalidate_url(spec, target_size, normalize, image_url)
+            if prepared is None:
+                prepared = self._prepare_bytes(
+                    spec, target_size, normalize, self._resolve_image_bytes(image_url, None)
+                )
+            # Reuse the digest _prepare_bytes computed rather than hashing the body again.
+            validators = self._fetched.validators
+            if validators is not None:
+                self._url_cache.put(image_url, UrlMetadata(prepared.digest, *validators))
+            return prepared
+        return self._prepare_bytes(
+            spec, target_size, normalize, self._resolve_image_bytes(image_url, image_base64)
+        )
 
-        model_obj, processor, device = self._load_model(spec)
-        image = self._image_from_bytes(image_bytes)
+    def _revalidate_url(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        normalize: bool,
+        image_url: str,
+    ) -> Optional[PreparedEmbed]:
+        """Conditional GET for a URL whose embedding is cached; None when a plain fetch is needed."""
+        assert self._url_cache is not None
+        meta = self._url_cache.get(image_url)
+        if meta is None:
+            return None
+        cache_key = EmbeddingLRUCache.make_key_from_digest(meta.digest, spec.name, target_size, normalize)
+        cached = self._cache_get(cache_key)
+        if cached is None:
+            return None
+        data = self._download_image(image_url, revalidate=meta)
+        self._url_cache.record_revalidation(not_modified=data is None)
+        if data is None:
+            return PreparedEmbed(spec, target_size, normalize, cache_key=cache_key, result=cached)
+        return self._prepare_bytes(spec, target_size, normalize, data)
 
-        if device.startswith("ov:"):
-            # OpenVINO path: processor returns numpy tensors; compiled model
-            # returns output[0] which is image_embeds from CLIPVisionModelWithProjection.
-            inputs = processor(  # type: ignore[operator]
-                images=image,
-                return_tensors="np",
-                size={"shortest_edge": target_size},
+    def _prepare_bytes(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        normalize: bool,
+        image_bytes: bytes,
+    ) -> PreparedEmbed:
+        prepared = PreparedEmbed(spec, target_size, normalize, image_bytes)
+        caching = self._embedding_cache is not None or self._disk_cache is not None
+        if not caching and self._failure_cache is None and self._pixel_cache is None:
+            return prepared
+        digest = EmbeddingLRUCache.content_digest(image_bytes)
+        prepared.digest = digest
+        if self._failure_cache is not None:
+            # Content that failed to decode recently fails again without a slot.
+            self._failure_cache.check(("decode", digest))
+        # Cache check — skip inference entirely on a hit in either tier.
+        if caching:
+            prepared.cache_key = EmbeddingLRUCache.make_key_from_digest(
+                digest, spec.name, target_size, normalize
             )
-            raw_result = model_obj(dict(inputs))  # type: ignore[operator]
-            raw_output = raw_result[0].astype(np.float32)  # expected shape (1, dims)
-            if raw_output.ndim != 2 or raw_output.shape[0] != 1 or raw_output.shape[1] != spec.dims:
-                raise ValueError(
-                    f"OpenVINO model returned unexpected output shape {raw_output.shape!r} "
-                    f"(expected (1, {spec.dims})) for model={spec.name}"
-                )
-            feat = raw_output[0]  # shape (dims,)
-            if normalize:
-                feat = self._normalize_embedding_np(feat)
-            embedding = feat.tolist()
-        else:
-            inputs = processor(  # type: ignore[operator]
-                images=image,
-                return_tensors="pt",
+            prepared.result = self._cache_get(prepared.cache_key)
+        return prepared
+
+    def embed_prepared(self, prepared: PreparedEmbed) -> EmbedResult:
+        """Inference stage for one ``prepare()`` result; call while holding a compute slot."""
+        if prepared.result is not None:
+            return prepared.result
+        spec, target_size = prepared.spec, prepared.target_size
+        cache_key = prepared.cache_key
+        if not cache_key:
+            return self._embed_uncached(prepared)
+
+        # Single-flight: identical concurrent requests wait for the first one.
+        flight, leader = self._inflight.begin(cache_key)
+        if not leader:
+            return self._inflight.wait(flight, self._inflight_wait_timeout())
+        try:
+            result = self._embed_uncached(prepared)
+        except BaseException as exc:
+            self._inflight.finish(cache_key, flight, error=exc)
+            raise
+        # Fill the cache before releasing the flight so later arrivals hit it.
+        self._cache_put(cache_key, result)
+        self._inflight.finish(cache_key, flight, result=result)
+        return result
+
+    def _inflight_wait_timeout(self) -> Optional[float]:
+        """Upper bound on how long a follower waits for its leader's result."""
+        limit = self.settings.embed_max_wait_seconds + self.settings.request_timeout_seconds
+        return float(limit) if limit > 0 else None
+
+    def _pixel_inputs(
+        self,
+        processor: Any,
+        images: Union[Image.Image, List[Image.Image]],
+        target_size: int,
+        return_tensors: str,
+        own_buffer: bool = False,
+    ) -> Dict[str, Any]:
+        """Model inputs for *images* from the configured preprocessing engine.
+
+        The native engine reuses a per-thread buffer; pass *own_buffer* when
+        the inputs must outlive the next call on this thread.
+        """
+        if self._preprocessor is None:
+            return processor(  # type: ignore[operator]
+                images=images,
+                return_tensors=return_tensors,
                 size={"shortest_edge": target_size},
             )
-            inputs = {k: v.to(device) for k, v in inputs.items()}
+        batch = images if isinstance(images, list) else [images]
+        out = np.empty((len(batch), 3, target_size, target_size), dtype=np.float32) if own_buffer else None
+        return self._pixel_values_input(self._preprocessor(batch, target_size, out), return_tensors)
 
+    @staticmethod
+    def _pixel_values_input(pixel_values: "np.ndarray", return_tensors: str) -> Dict[str, Any]:
+        if return_tensors == "pt":
             import torch
 
-            with torch.no_grad():
-                features = model_obj(**inputs).image_embeds  # type: ignore[operator]
-                if normalize:
-                    features = torch.nn.functional.normalize(features, p=2, dim=-1)
+            return {"pixel_values": torch.from_numpy(pixel_values)}
+        return {"pixel_values": pixel_values}
+
+    def _pooled_inputs(
+        self,
+        blobs: List[bytes],
+        target_size: int,
+        return_tensors: str,
+    ) -> Tuple[Optional[Dict[str, Any]], List[Optional[Exception]]]:
+        """Decode and preprocess *blobs* in the decode pool.
+
+        Returns model inputs for the rows that decoded (None if none did) and
+        one error-or-None per blob.
+        """
+        assert self._decode_pool is not None
+        pixel_values, messages = self._decode_pool.pixels(
+            blobs,
+            target_size,
+            draft=self.settings.jpeg_draft_decode,
+            timeout=float(self.settings.request_timeout_seconds) or None,
+        )
+        errors: List[Optional[Exception]] = []
+        for data, message in zip(blobs, messages):
+            if message is not None and message not in TRANSIENT_ERRORS:
+                self._remember_decode_failure(data, message)
+            errors.append(ValueError(message) if message is not None else None)
+        valid = [i for i, err in enumerate(errors) if err is None]
+        if not valid:
+            return None, errors
+        if len(valid) < len(blobs):
+            pixel_values = pixel_values[valid]
+        return self._pixel_values_input(pixel_values, return_tensors), errors
+
+    def _embed_uncached(self, prepared: PreparedEmbed) -> EmbedResult:
+        """Decode *prepared*'s bytes and run one forward pass, bypassing the embedding cache.
+
+        The pixel cache reuses ``prepared.digest``, so the payload is not hashed again.
+        """
+        spec, target_size, normalize = prepared.spec, prepared.target_size, prepared.normalize
+        image_bytes = prepared.image_bytes
+        backend, processor, device = self._load_model(spec)
+        return_tensors = backend.input_format
+        if self._pixel_cache is not None or self._decode_pool is not None:
+            decoded, errors = self._payload_inputs(processor, [prepared], target_size, return_tensors)
+            if errors[0] is not None:
+                raise errors[0]
+            assert decoded is not None
+            inputs = decoded
+        else:
+            image = self._decode_image(image_bytes, target_size)
+            inputs = self._pixel_inputs(processor, image, target_size, return_tensors)
 
-            embedding = features[0].detach().cpu().numpy().astype(np.float32).tolist()
+        feat = self._run_backend(spec, backend, inputs, 1)[0]  # shape (dims,)
+        if normalize:
+            feat = self._normalize_embedding_np(feat)
+        embedding = feat.tolist()
 
         dims = len(embedding)
         self._validate_embedding_result(spec, embedding, dims)
@@ -599,10 +1006,7 @@ class ImageEmbedder:
                 from .memory import cleanup_gpu_memory
                 cleanup_gpu_memory(device)
 
-        result = (embedding, dims, "local", spec.name, target_size)
-        if self._embedding_cache is not None and cache_key:
-            self._embedding_cache.put(cache_key, result)
-        return result
+        return (embedding, dims, "local", spec.name, target_size)
 
     def embed_batch(
         self,
@@ -616,136 +1020,336 @@ class ImageEmbedder:
         Returns one result (or ``Exception``) per item, in the same order.
         Per-item image-load errors are returned as exceptions rather than
         aborting the whole batch.
+
+        When caching is enabled, each distinct cache key is computed at most
+        once: repeats within *items* reuse the first occurrence's outcome, and
+        keys already being computed by another request wait for that result.
         """
-        if not items:
-            return []
+        return self.embed_prepared_batch(spec, target_size, self.prepare_batch(spec, target_size, items))
+
+    def prepare_batch(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        items: List[BatchItem],
+    ) -> List[Union[PreparedEmbed, Exception]]:
+        """Pre-inference stage for a batch: one ``PreparedEmbed`` (or ``Exception``) per item.
 
-        # Pre-check cache: items already computed don't need model inference.
-        outcomes: List[Any] = [None] * len(items)
+        When more than one item needs a remote fetch, items are resolved
+        concurrently on the shared fetch pool, with at most
+        ``batch_fetch_concurrency`` of this batch's items in flight at once.
+        """
+        remote = sum(1 for item in items if item.image_url and not item.image_base64)
+        limit = min(self.settings.batch_fetch_concurrency, len(items))
+        if self._fetch_pool is None or remote <= 1 or limit <= 1:
+            return [self._prepare_item(spec, target_size, item) for item in items]
+
+        slots = threading.BoundedSemaphore(limit)
+        futures = []
+        for item in items:
+            slots.acquire()
+            future = self._fetch_pool.submit(self._prepare_item, spec, target_size, item)
+            future.add_done_callback(lambda _f: slots.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _prepare_item(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        item: BatchItem,
+    ) -> Union[PreparedEmbed, Exception]:
+        try:
+            return self._prepare_source(spec, target_size, item.normalize, item.image_url, item.image_base64)
+        except Exception as exc:
+            return exc
+
+    def stage_prepared_batch(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        prepared: List[Union[PreparedEmbed, Exception]],
+    ) -> StagedBatch:
+        """Decode and preprocess the items of *prepared* that will need the model.
+
+        CPU-only and safe to run without a compute slot, so a pipelined caller
+        can stage batch N+1 while batch N is on the model.  It loads the model,
+        so callers hold the queue's shared lock across it.  Pass the result to
+        ``embed_prepared_batch(..., staged=...)``.  Single-flight leadership is
+        only claimed there, under the slot.
+        """
+        payloads: List[PreparedEmbed] = []
+        seen_keys: set = set()
+        for entry in prepared:
+            if isinstance(entry, Exception) or entry.result is not None:
+                continue
+            if entry.cache_key:
+                if entry.cache_key in seen_keys:
+                    continue
+                seen_keys.add(entry.cache_key)
+            payloads.append(entry)
+        # Own the pixel buffer: the forward pass runs later, on another thread.
+        return StagedBatch(payloads, self._decode_batch(spec, target_size, payloads, own_buffer=True))
+
+    def embed_prepared_batch(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        prepared: List[Union[PreparedEmbed, Exception]],
+        staged: Optional[StagedBatch] = None,
+    ) -> List[Union[EmbedResult, Exception]]:
+        """Inference stage for ``prepare_batch()`` output; call while holding a compute slot.
+
+        With *staged* (from ``stage_prepared_batch``), decoding is skipped.
+        """
+        outcomes: List[Any] = [None] * len(prepared)
         uncached_indices: List[int] = []
-        uncached_payloads: List[Tuple[BatchItem, bytes]] = []
+        uncached_payloads: List[PreparedEmbed] = []
         uncached_cache_keys: List[str] = []
-        if self._embedding_cache is not None:
-            for i, item in enumerate(items):
-                try:
-                    image_bytes = self._resolve_image_bytes(item.image_url, item.image_base64)
-                except Exception as exc:
-                    outcomes[i] = exc
+        # Flights this batch leads, parallel to uncached_cache_keys.
+        led_flights: List[Any] = []
+        # key -> original index of the item computing it in this batch.
+        batch_leaders: Dict[str, int] = {}
+        duplicates: List[Tuple[int, int]] = []
+        followers: List[Tuple[int, Any]] = []
+        for i, entry in enumerate(prepared):
+            if isinstance(entry, Exception):
+                outcomes[i] = entry
+                continue
+            if entry.result is not None:
+                outcomes[i] = entry.result
+                continue
+            key = entry.cache_key
+            if key:
+                if key in batch_leaders:
+                    duplicates.append((i, batch_leaders[key]))
+                    continue
+                flight, leader = self._inflight.begin(key)
+                if not leader:
+                    followers.append((i, flight))
                     continue
+                batch_leaders[key] = i
+                if staged is not None:
+                    # Staged batches wait behind the previous one, which may have filled the cache.
+                    cached = self._cache_get(key)
+                    if cached is not None:
+                        self._inflight.finish(key, flight, result=cached)
+                        outcomes[i] = cached
+                        continue
+                uncached_cache_keys.append(key)
+                led_flights.append(flight)
+            uncached_indices.append(i)
+            uncached_payloads.append(entry)
+
+        # If everything was cached or in flight elsewhere, skip model loading entirely.
+        if uncached_indices:
+            try:
+                if staged is not None:
+                    decoded = self._select_decoded(spec, target_size, staged, uncached_payloads)
+                    uncached_outcomes = self._forward_batch(spec, target_size, uncached_payloads, decoded)
+                else:
+                    uncached_outcomes = self._embed_batch_uncached(spec, target_size, uncached_payloads)
+            except BaseException as exc:
+                for key, flight in zip(uncached_cache_keys, led_flights):
+                    self._inflight.finish(key, flight, error=exc)
+                raise
 
-                key = EmbeddingLRUCache.make_key(
-                    image_bytes, spec.name, target_size, item.normalize
-                )
-                cached = self._embedding_cache.get(key)
-                if cached is not None:
-                    outcomes[i] = cached
+            # Merge uncached results back into the full outcomes list.
+            for sub_idx, orig_idx in enumerate(uncached_indices):
+                outcomes[orig_idx] = uncached_outcomes[sub_idx]
+
+            # Populate cache with new successful results, then release waiters.
+            for sub_idx, key in enumerate(uncached_cache_keys):
+                outcome = uncached_outcomes[sub_idx]
+                if isinstance(outcome, Exception):
+                    self._inflight.finish(key, led_flights[sub_idx], error=outcome)
                 else:
-                    uncached_indices.append(i)
-                    uncached_payloads.append((item, image_bytes))
-                    uncached_cache_keys.append(key)
-        else:
-            for i, item in enumerate(items):
-                try:
-                    image_bytes = self._resolve_image_bytes(item.image_url, item.image_base64)
-                except Exception as exc:
-                    outcomes[i] = exc
-                    continue
-                uncached_indices.append(i)
-                uncached_payloads.append((item, image_bytes))
+                    self._cache_put(key, outcome)
+                    self._inflight.finish(key, led_flights[sub_idx], result=outcome)
+
+        if duplicates:
+            self._inflight.count_coalesced(len(duplicates))
+        for orig_idx, first_idx in duplicates:
+            first = outcomes[first_idx]
+            if isinstance(first, Exception):
+                outcomes[orig_idx] = first
+            else:
+                embedding, dims, source, model_name, size = first
+                outcomes[orig_idx] = (list(embedding), dims, source, model_name, size)
+
+        timeout = self._inflight_wait_timeout()
+        for orig_idx, flight in followers:
+            try:
+                outcomes[orig_idx] = self._inflight.wait(flight, timeout)
+            except Exception as exc:
+                outcomes[orig_idx] = exc
+
+        return outcomes
+
+    def _embed_batch_uncached(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        uncached_payloads: List[PreparedEmbed],
+    ) -> List[Union[EmbedResult, Exception]]:
+        """Decode and embed *uncached_payloads* in one forward pass, bypassing the cache."""
+        decoded = self._decode_batch(spec, target_size, uncached_payloads)
+        return self._forward_batch(spec, target_size, uncached_payloads, decoded)
 
-        # If everything was cached, skip model loading entirely.
-        if not uncached_indices:
-            return outcomes
+    def _decode_batch(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        payloads: List[PreparedEmbed],
+        own_buffer: bool = False,
+    ) -> DecodedBatch:
+        """Decode and preprocess *payloads*, capturing per-item errors so one
+        bad image doesn't abort the whole batch."""
+        model = self._load_model(spec)
+        backend, processor, _device = model
+        return_tensors = backend.input_format
+
+        inputs, load_errors = self._payload_inputs(processor, payloads, target_size, return_tensors, own_buffer)
+        return DecodedBatch(model, inputs, load_errors)
+
+    def _payload_inputs(
+        self,
+        processor: Any,
+        payloads: List[PreparedEmbed],
+        target_size: int,
+        return_tensors: str,
+        own_buffer: bool = False,
+    ) -> Tuple[Optional[Dict[str, Any]], List[Optional[Exception]]]:
+        """Model inputs for the payloads that decode (None if none do), plus one error-or-None each.
 
-        uncached_items = [payload[0] for payload in uncached_payloads]
-        model_obj, processor, device = self._load_model(spec)
+        Rows come from the pixel cache when it is enabled; only misses are decoded.
+        """
+        if self._pixel_cache is None:
+            return self._decoded_inputs(
+                processor, [payload.image_bytes for payload in payloads], target_size, return_tensors, own_buffer
+            )
 
-        # Decode images, capturing per-item errors so one bad image
-        # doesn't abort the whole batch.
-        pil_images: List[Optional[Image.Image]] = []
+        keys = [
+            (
+                payload.digest or EmbeddingLRUCache.content_digest(payload.image_bytes),
+                target_size,
+                self._pixel_recipe,
+            )
+            for payload in payloads
+        ]
+        rows: List[Optional[np.ndarray]] = [self._pixel_cache.get(key) for key in keys]
+        errors: List[Optional[Exception]] = [None] * len(payloads)
+        # Decode each missing key once, even when a batch repeats it (e.g. normalize on and off).
+        miss_of: Dict[Any, List[int]] = {}
+        for i, row in enumerate(rows):
+            if row is None:
+                miss_of.setdefault(keys[i], []).append(i)
+        if miss_of:
+            firsts = [indices[0] for indices in miss_of.values()]
+            decoded, miss_errors = self._decoded_inputs(
+                processor, [payloads[i].image_bytes for i in firsts], target_size, "np", own_buffer=True
+            )
+            decoded_rows = iter(decoded["pixel_values"] if decoded is not None else ())
+            for indices, err in zip(miss_of.values(), miss_errors):
+                row = None
+                if err is None:
+                    row = np.asarray(next(decoded_rows), dtype=np.float32)
+                    self._pixel_cache.put(keys[indices[0]], row)
+                for i in indices:
+                    rows[i], errors[i] = row, err
+        valid = [row for row in rows if row is not None]
+        if not valid:
+            return None, errors
+        return self._pixel_values_input(np.stack(valid), return_tensors), errors
+
+    def _decoded_inputs(
+        self,
+        processor: Any,
+        blobs: List[bytes],
+        target_size: int,
+        return_tensors: str,
+        own_buffer: bool = False,
+    ) -> Tuple[Optional[Dict[str, Any]], List[Optional[Exception]]]:
+        """Decode and preprocess *blobs* in the decode pool or on this thread."""
+        if self._decode_pool is not None:
+            return self._pooled_inputs(blobs, target_size, return_tensors)
+        valid_images: List[Image.Image] = []
         load_errors: List[Optional[Exception]] = []
-        for _item, image_bytes in uncached_payloads:
+        for data in blobs:
             try:
-                pil_images.append(self._image_from_bytes(image_bytes))
+                valid_images.append(self._decode_image(data, target_size))
                 load_errors.append(None)
             except Exception as exc:
-                pil_images.append(None)
                 load_errors.append(exc)
+        inputs = (
+            self._pixel_inputs(processor, valid_images, target_size, return_tensors, own_buffer)
+            if valid_images
+            else None
+        )
+        return inputs, load_errors
 
-        valid_sub_idx = [i for i, img in enumerate(pil_images) if img is not None]
-        valid_images = [pil_images[i] for i in valid_sub_idx]
+    def _select_decoded(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        staged: StagedBatch,
+        payloads: List[PreparedEmbed],
+    ) -> DecodedBatch:
+        """Restrict *staged* to *payloads* (the items this batch ended up leading)."""
+        position = {id(p): pos for pos, p in enumerate(staged.payloads)}
+        if any(id(p) not in position for p in payloads):
+            return self._decode_batch(spec, target_size, payloads)
+        positions = [position[id(p)] for p in payloads]
+        decoded = staged.decoded
+        if positions == list(range(len(staged.payloads))):
+            return decoded
+        row_of: Dict[int, int] = {}
+        for pos, err in enumerate(decoded.load_errors):
+            if err is None:
+                row_of[pos] = len(row_of)
+        rows = [row_of[pos] for pos in positions if pos in row_of]
+        inputs = (
+            {k: v[rows] for k, v in decoded.inputs.items()}
+            if rows and decoded.inputs is not None
+            else None
+        )
+        return DecodedBatch(decoded.model, inputs, [decoded.load_errors[pos] for pos in positions])
+
+    def _forward_batch(
+        self,
+        spec: ModelSpec,
+        target_size: int,
+        uncached_payloads: List[PreparedEmbed],
+        decoded: DecodedBatch,
+    ) -> List[Union[EmbedResult, Exception]]:
+        """Run the decoded rows through the model and post-process each result."""
+        backend, _processor, device = decoded.model
+        inputs = decoded.inputs
+        load_errors = decoded.load_errors
 
-        # Partial outcomes for uncached items (index within uncached_items).
+        valid_sub_idx = [i for i, err in enumerate(load_errors) if err is None]
+
+        # Partial outcomes for uncached items (index within uncached_payloads).
         uncached_outcomes: List[Any] = list(load_errors)
 
-        if valid_images:
-            if device.startswith("ov:"):
-                # OpenVINO path: batch all valid images in one compiled model call.
-                inputs = processor(  # type: ignore[operator]
-                    images=valid_images,
-                    return_tensors="np",
-                    size={"shortest_edge": target_size},
-                )
-                raw_result = model_obj(dict(inputs))  # type: ignore[operator]
-                n_valid = len(valid_images)
-                raw_output = raw_result[0].astype(np.float32)  # expected shape (N, dims)
-                if raw_output.ndim != 2 or raw_output.shape[0] != n_valid or raw_output.shape[1] != spec.dims:
-                    raise ValueError(
-                        f"OpenVINO model returned unexpected output shape {raw_output.shape!r} "
-                        f"(expected ({n_valid}, {spec.dims})) for model={spec.name}"
-                    )
-                features_np = raw_output
-
-                for batch_pos, sub_idx in enumerate(valid_sub_idx):
-                    feat = features_np[batch_pos]
-                    try:
-                        if uncached_items[sub_idx].normalize:
-                            feat = self._normalize_embedding_np(feat)
-                        embedding_list = feat.tolist()
-                        dims = len(embedding_list)
-                        self._validate_embedding_result(spec, embedding_list, dims)
-                        uncached_outcomes[sub_idx] = (embedding_list, dims, "local", spec.name, target_size)
-                    except ValueError as exc:
-                        uncached_outcomes[sub_idx] = exc
-            else:
-                import torch
+        if inputs is not None:
+            # One call for all valid images; shape checks and normalization are backend-independent.
+            features_np = self._run_backend(spec, backend, inputs, len(valid_sub_idx))
 
-                inputs = processor(  # type: ignore[operator]
-                    images=valid_images,
-                    return_tensors="pt",
-                    size={"shortest_edge": target_size},
-                )
-                inputs = {k: v.to(device) for k, v in inputs.items()}
-
-                with torch.no_grad():
-                    features = model_obj(**inputs).image_embeds  # type: ignore[operator]
-
-                for batch_pos, sub_idx in enumerate(valid_sub_idx):
-                    feat = features[batch_pos]
-                    if uncached_items[sub_idx].normalize:
-                        feat = torch.nn.functional.normalize(
-                            feat.unsqueeze(0), p=2, dim=-1
-                        ).squeeze(0)
-                    embedding = feat.detach().cpu().numpy().astype(np.float32).tolist()
-                    try:
-                        self._validate_embedding_result(spec, embedding, len(embedding))
-                        uncached_outcomes[sub_idx] = (embedding, len(embedding), "local", spec.name, target_size)
-                    except ValueError as exc:
-                        uncached_outcomes[sub_idx] = exc
-
-        # Merge uncached results back into the full outcomes list.
-        for sub_idx, orig_idx in enumerate(uncached_indices):
-            outcomes[orig_idx] = uncached_outcomes[sub_idx]
-
-        # Populate cache with new successful results.
-        if self._embedding_cache is not None:
-            for sub_idx, key in enumerate(uncached_cache_keys):
-                outcome = uncached_outcomes[sub_idx]
-                if not isinstance(outcome, Exception) and outcome is not None:
-                    self._embedding_cache.put(key, outcome)
+            for batch_pos, sub_idx in enumerate(valid_sub_idx):
+                feat = features_np[batch_pos]
+                try:
+                    if uncached_payloads[sub_idx].normalize:
+                        feat = self._normalize_embedding_np(feat)
+                    embedding_list = feat.tolist()
+                    dims = len(embedding_list)
+                    self._validate_embedding_result(spec, embedding_list, dims)
+                    uncached_outcomes[sub_idx] = (embedding_list, dims, "local", spec.name, target_size)
+                except ValueError as exc:
+                    uncached_outcomes[sub_idx] = exc
 
         # Cleanup tracking — count successful embeds.
-        n_success = sum(1 for o in outcomes if not isinstance(o, Exception) and o is not None)
+        n_success = sum(1 for o in uncached_outcomes if not isinstance(o, Exception) and o is not None)
         if self.settings.embed_cleanup_every_n > 0 and n_success > 0:
             n = self.settings.embed_cleanup_every_n
             with self._embed_count_lock:
@@ -756,4 +1360,4 @@ class ImageEmbedder:
                 from .memory import cleanup_gpu_memory
                 cleanup_gpu_memory(device)
 
-        return outcomes
+        return uncached_outcomes
@@ -0,0 +1,89 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Bounded negative cache for image sources that recently failed.
+
+Classifarr re-sends the same broken poster URLs on every library scan.
+Without this cache each retry pays a full ``request_timeout_seconds`` fetch or
+another decode attempt.  A failure is remembered for a short,
+per-error-class TTL and replayed as the same ``ValueError`` (HTTP 400):
+
+- ``http``      - the origin answered 4xx; keyed by URL.
+- ``transient`` - timeout, connection failure or 5xx; keyed by URL, shortest TTL.
+- ``decode``    - bytes that ``_image_from_bytes`` rejected; keyed by content
+  digest, so the same broken file is refused wherever it is served from.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+FAILURE_KINDS = ("http", "transient", "decode")
+
+# ("url", image_url) or ("decode", content_digest)
+FailureKey = Tuple[str, str]
+
+
+@dataclass(slots=True)
+class _Failure:
+    expires: float
+    kind: str
+    message: str
+
+
+class FailureCache:
+    """Thread-safe LRU of recent failures with per-kind TTLs (seconds; 0 = never cache)."""
+
+    def __init__(self, maxsize: int, ttl_seconds: Mapping[str, float]) -> None:
+        self._maxsize = maxsize
+        self._ttl: Dict[str, float] = {kind: max(float(ttl_seconds.get(kind, 0.0)), 0.0) for kind in FAILURE_KINDS}
+        self._entries: "OrderedDict[FailureKey, _Failure]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stored: Dict[str, int] = {kind: 0 for kind in FAILURE_KINDS}
+
+    def check(self, key: FailureKey) -> None:
+        """Raise the cached ``ValueError`` if *key* failed recently."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if entry.expires <= time.monotonic():
+                del self._entries[key]
+                return
+            self._entries.move_to_end(key)
+            self._hits += 1
+            message = entry.message
+        raise ValueError(message)
+
+    def put(self, key: FailureKey, kind: str, message: str) -> None:
+        ttl = self._ttl[kind]
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _Failure(time.monotonic() + ttl, kind, message)
+            self._entries.move_to_end(key)
+            self._stored[kind] += 1
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "hits": self._hits,
+                "stored": dict(self._stored),
+                "ttl_seconds": dict(self._ttl),
+            }
+
+
+def kind_for_status(status_code: Optional[int]) -> str:
+    """Failure kind for an HTTP error status (``None`` = no response at all)."""
+    # 408/429 are the origin asking us to come back later, not a broken URL.
+    if status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429):
+        return "http"
+    return "transient"
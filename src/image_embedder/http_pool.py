@@ -0,0 +1,188 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Shared keep-alive HTTP connection pool for remote image downloads.
+
+Every download goes through one ``requests.Session`` so repeat fetches from
+the same image CDN reuse TCP/TLS connections instead of handshaking per poster.
+
+SSRF protection: new connections are *pinned* to the addresses the caller
+validated, rather than letting urllib3 resolve the hostname a second time
+(which a DNS-rebinding host could answer with a private address).  The pin is
+bound to the request being sent (a context variable set around each hop), and
+a new connection without a pin for its host is refused instead of resolved.
+TLS still uses the original hostname for SNI and certificate checks.
+Redirects are followed manually so every hop is validated and pinned the same
+way.
+
+HTTP/2 is not offered: ``requests``/urllib3 only speak HTTP/1.1, so reuse
+comes from keep-alive.
+"""
+
+import http.cookiejar
+import threading
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+# Validates a URL and returns the public addresses its host may connect to.
+Resolver = Callable[[str], Sequence[str]]
+
+# (host, validated addresses) of the hop being sent; connections are opened on the sending thread.
+_hop_pin: ContextVar[Optional[Tuple[str, Tuple[str, ...]]]] = ContextVar("image_hop_pin", default=None)
+
+
+def _pin_host(host: str) -> str:
+    return host.lower().rstrip(".")
+
+
+class _PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.connections_opened = 0
+        self.redirects = 0
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _PinnedConnectionMixin:
+    """Connect to the current hop's validated address for ``self.host``; never re-resolve it."""
+
+    stats: _PoolStats
+
+    def _new_conn(self):  # type: ignore[no-untyped-def]
+        pin = _hop_pin.get()
+        if pin is None or pin[0] != _pin_host(self.host):  # type: ignore[attr-defined]
+            raise NewConnectionError(self, "Refusing to connect: no validated address for this host")
+        host = self._dns_host  # type: ignore[has-type]
+        last_exc: Optional[Exception] = None
+        for address in pin[1]:
+            # urllib3 connects to _dns_host; self.host (SNI, certificate checks)
+            # is derived from it, so the hostname is restored once connected.
+            self._dns_host = address
+            try:
+                sock = super()._new_conn()  # type: ignore[misc]
+            except Exception as exc:
+                last_exc = exc
+                continue
+            finally:
+                self._dns_host = host
+            self.stats.incr("connections_opened")
+            return sock
+        assert last_exc is not None
+        raise last_exc
+
+
+class _CountingPoolMixin:
+    stats: _PoolStats
+
+    def _get_conn(self, timeout=None):  # type: ignore[no-untyped-def]
+        conn = super()._get_conn(timeout=timeout)  # type: ignore[misc]
+        # urllib3 discards dropped connections here, so a live socket means reuse.
+        self.stats.incr("pool_hits" if getattr(conn, "sock", None) is not None else "pool_misses")
+        return conn
+
+
+class _PinnedAdapter(HTTPAdapter):
+    def __init__(self, stats: _PoolStats, **kwargs) -> None:
+        conn_attrs = {"stats": stats}
+        http_conn = type("PinnedHTTPConnection", (_PinnedConnectionMixin, HTTPConnection), conn_attrs)
+        https_conn = type("PinnedHTTPSConnection", (_PinnedConnectionMixin, HTTPSConnection), conn_attrs)
+        self._pool_classes = {
+            "http": type("PinnedHTTPConnectionPool", (_CountingPoolMixin, HTTPConnectionPool),
+                         {"ConnectionCls": http_conn, "stats": stats}),
+            "https": type("PinnedHTTPSConnectionPool", (_CountingPoolMixin, HTTPSConnectionPool),
+                          {"ConnectionCls": https_conn, "stats": stats}),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class ImageHTTPPool:
+    """Thread-safe keep-alive session whose connections are pinned to validated addresses.
+
+    *pool_hosts* is the number of per-host connection pools kept alive and
+    *pool_maxsize* the number of idle connections kept per host.
+    """
+
+    def __init__(self, pool_hosts: int = 10, pool_maxsize: int = 10, max_redirects: int = 5) -> None:
+        self._stats = _PoolStats()
+        self._pool_hosts = pool_hosts
+        self._pool_maxsize = pool_maxsize
+        self._max_redirects = max_redirects
+        self._adapter = _PinnedAdapter(
+            self._stats,
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_maxsize,
+            max_retries=0,
+        )
+        self._session = requests.Session()
+        # Image CDNs have no business setting cookies on a shared server-side session.
+        self._session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+
+    def get(
+        self,
+        url: str,
+        resolve: Resolver,
+        timeout: float,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """Stream *url*, validating and pinning every hop with *resolve*.
+
+        *resolve* raises ``ValueError`` for URLs that must not be fetched and
+        returns the addresses new connections for this hop may use.  Extra
+        request *headers* (e.g. conditional validators) go to every hop.
+        """
+        for _hop in range(self._max_redirects + 1):
+            addresses = resolve(url)
+            host = urlparse(url).hostname
+            if not addresses or not host:
+                raise ValueError("Unable to resolve remote image host")
+            self._stats.incr("requests")
+            token = _hop_pin.set((_pin_host(host), tuple(addresses)))
+            try:
+                response = self._session.get(
+                    url, headers=headers, timeout=timeout, stream=True, allow_redirects=False
+                )
+            finally:
+                _hop_pin.reset(token)
+            if not response.is_redirect:
+                return response
+            location = response.headers.get("location", "")
+            response.close()
+            self._stats.incr("redirects")
+            url = urljoin(url, location)
+        raise ValueError("Too many redirects fetching remote image")
+
+    def info(self) -> dict:
+        stats = self._stats
+        with stats._lock:
+            return {
+                "requests": stats.requests,
+                "pool_hits": stats.pool_hits,
+                "pool_misses": stats.pool_misses,
+                "connections_opened": stats.connections_opened,
+                "redirects": stats.redirects,
+                "pool_hosts": self._pool_hosts,
+                "pool_maxsize": self._pool_maxsize,
+            }
+
+    def close(self) -> None:
+        self._session.close()
@@ -2,7 +2,7 @@
 # Copyright (C) 2024-2026 Classifarr Contributors
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-"""App lifespan: signal handling, model warmup, and background memory cleanup."""
+"""App lifespan: signal handling, cache snapshots, model warmup, and background memory cleanup."""
 
 import asyncio
 import signal
@@ -30,6 +30,8 @@ def make_lifespan(embedder_instance, settings, logger, batch_window=None):
                     )
                     if not is_healthy:
                         logger.warning(f"Memory health check failed: {issues}")
+                        freed = embedder_instance.trim_caches()
+                        logger.info(f"Trimmed embedding cache: freed {freed / (1024 * 1024):.1f} MB")
                         result = cleanup_gpu_memory()
                         logger.info(f"Periodic cleanup: {result}")
             except asyncio.CancelledError:
@@ -52,11 +54,22 @@ def make_lifespan(embedder_instance, settings, logger, batch_window=None):
         except (NotImplementedError, RuntimeError):
             pass
 
+        # Warm the cache before warmup, so it is full by the time /ready turns true.
+        try:
+            loaded = await anyio.to_thread.run_sync(embedder_instance.load_cache_snapshot)
+            if loaded is not None:
+                logger.info(f"Loaded cache snapshot: {loaded}")
+        except Exception as e:
+            logger.error(f"Failed to load cache snapshot: {e}")
+
         if settings.warmup_on_startup:
             logger.info("Warming up default model...")
             try:
                 await anyio.to_thread.run_sync(embedder_instance.warmup)  # type: ignore[union-attr]
                 logger.info("Model warmup complete")
+                startup = embedder_instance.get_startup_info()
+                if startup:
+                    logger.info(f"Startup timings: {startup['models']}")
             except Exception as e:
                 logger.error(f"Model warmup failed: {e}")
                 raise
@@ -82,6 +95,20 @@ def make_lifespan(embedder_instance, settings, logger, batch_window=None):
             except (asyncio.CancelledError, asyncio.TimeoutError):
                 pass
 
+        # Snapshot after the batch window drained.
+        try:
+            written = await anyio.to_thread.run_sync(embedder_instance.save_cache_snapshot)
+            if written is not None:
+                logger.info(f"Saved cache snapshot: {written / (1024 * 1024):.1f} MB")
+        except Exception as e:
+            logger.error(f"Failed to save cache snapshot: {e}")
+
+        # Flush persistent caches before memory cleanup.
+        try:
+            await anyio.to_thread.run_sync(embedder_instance.close)
+        except Exception as e:
+            logger.error(f"Error closing embedder: {e}")
+
         if settings.cleanup_on_shutdown:
             logger.info("Performing cleanup on shutdown")
             try:
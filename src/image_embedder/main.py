@@ -42,6 +42,7 @@ def create_app(embedder: ImageEmbedder | None = None, settings: Settings | None
         concurrency=settings.embed_concurrency,
         max_queue=settings.embed_max_queue,
         max_wait_seconds=settings.embed_max_wait_seconds,
+        io_concurrency=settings.embed_io_concurrency,
     )
 
     limiter = make_limiter(settings)
@@ -53,6 +54,7 @@ def create_app(embedder: ImageEmbedder | None = None, settings: Settings | None
             queue,
             batch_window_ms=settings.embed_batch_window_ms,
             batch_max_size=settings.embed_batch_max_size,
+            pipeline_depth=settings.embed_batch_pipeline_depth,
         )
         if settings.embed_batch_window_ms > 0
         else None
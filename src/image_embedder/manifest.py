@@ -0,0 +1,99 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""NDJSON manifests of precomputed embeddings (``POST /admin/cache/ingest``).
+
+The first line is a header naming the model and request axes every record
+shares; each following line is one record::
+
+    {"model": "ViT-L-14", "image_size": 224, "normalize": true, "hash": "sha256"}
+    {"digest": "<64 hex chars>", "embedding": [0.0123, -0.0456, ...]}
+    {"digest": "<64 hex chars>", "embedding_b64": "<base64 of little-endian float32>"}
+
+``hash`` (default ``sha256``) names the algorithm the digests were computed
+with; only ``sha256``, the cache-key hash, is accepted.
+``embedding_b64`` is the fast path: it decodes straight into the batch
+matrix with no per-float parsing.
+
+Records are parsed into ``(N, dims)`` float32 blocks so validation runs
+vectorized per block; a malformed record is counted and skipped without
+failing the rest of the manifest.
+"""
+
+import base64
+import binascii
+import json
+import string
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Tuple
+
+import numpy as np
+
+# Records validated and inserted per block.
+BLOCK_ROWS = 1024
+
+_HEX = frozenset(string.hexdigits.lower())
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestHeader:
+    model: str
+    image_size: int
+    normalize: bool
+    hash: str = "sha256"
+
+
+def read_manifest_header(fp: BinaryIO) -> ManifestHeader:
+    """Parse the first line; raises ValueError when it is missing or incomplete."""
+    line = fp.readline()
+    try:
+        header = json.loads(line)
+        if not isinstance(header["normalize"], bool):
+            # bool("false") is True; only a JSON boolean says which vectors these are.
+            raise TypeError("normalize must be a JSON boolean")
+        return ManifestHeader(
+            model=str(header["model"]),
+            image_size=int(header["image_size"]),
+            normalize=header["normalize"],
+            hash=str(header.get("hash", "sha256")).lower(),
+        )
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError(
+            "Invalid manifest header: expected {\"model\", \"image_size\", \"normalize\"} on the first line"
+        ) from exc
+
+
+def iter_manifest_blocks(fp: BinaryIO, dims: int) -> Iterator[Tuple[List[str], np.ndarray, int]]:
+    """Yield ``(digests, rows, skipped)`` blocks of up to ``BLOCK_ROWS`` well-formed records.
+
+    *rows* is ``(len(digests), dims)`` float32.  *skipped* counts records in
+    this block that were malformed (bad JSON, digest or vector length).
+    """
+    digests: List[str] = []
+    rows = np.empty((BLOCK_ROWS, dims), dtype=np.float32)
+    skipped = 0
+    for line in fp:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            digest = str(record["digest"]).lower()
+            if len(digest) != 64 or not _HEX.issuperset(digest):
+                raise ValueError("digest is not 64 hex chars")
+            if "embedding_b64" in record:
+                vector = np.frombuffer(base64.b64decode(record["embedding_b64"], validate=True), dtype="<f4")
+            else:
+                vector = np.asarray(record["embedding"], dtype=np.float32)
+            if vector.shape != (dims,):
+                raise ValueError("wrong vector length")
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            skipped += 1
+            continue
+        rows[len(digests)] = vector
+        digests.append(digest)
+        if len(digests) == BLOCK_ROWS:
+            yield digests, rows, skipped
+            digests, rows, skipped = [], np.empty((BLOCK_ROWS, dims), dtype=np.float32), 0
+    if digests or skipped:
+        yield digests, rows[:len(digests)], skipped
@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from typing import List, Optional, Self
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class ModelInfo(BaseModel):
@@ -11,6 +11,7 @@ class ModelInfo(BaseModel):
     name: str
     dims: int
     image_size: int
+    precision: str = "fp32"
 
 
 class EmbedImageRequest(BaseModel):
@@ -86,6 +87,10 @@ class ModelStatus(BaseModel):
 
 
 class DeviceInfo(BaseModel):
+    # Backend-specific keys (ov_device, available_devices, hip_version, and the
+    # per-model ``backends`` entries) pass through as reported by get_device_info().
+    model_config = ConfigDict(extra="allow")
+
     type: str
     name: Optional[str] = None
 
@@ -104,6 +109,19 @@ class HealthResponse(BaseModel):
     memory: Optional[MemoryInfo] = None
     queue: dict = Field(default_factory=dict, description="Queue status and concurrency hints")
     cache: Optional[dict] = Field(default=None, description="Embedding cache statistics; null when caching is disabled")
+    http: Optional[dict] = Field(default=None, description="Remote image connection-pool statistics")
+    failures: Optional[dict] = Field(
+        default=None, description="Negative cache of failing image sources; null when disabled"
+    )
+    pixel_cache: Optional[dict] = Field(
+        default=None, description="Preprocessed pixel-tensor cache statistics; null when disabled"
+    )
+    batch_window: Optional[dict] = Field(
+        default=None, description="Batch-window pipeline occupancy; null when the batch window is disabled"
+    )
+    startup: Optional[dict] = Field(
+        default=None, description="Per-model load, compile and warmup timings; null until warmup has run"
+    )
 
 
 class ReadyResponse(BaseModel):
@@ -112,6 +130,11 @@ class ReadyResponse(BaseModel):
     device: Optional[DeviceInfo] = None
 
 
+class CacheImportResponse(BaseModel):
+    imported: int
+    skipped: int = Field(description="Malformed entries, or entries with mismatched dims or non-finite values")
+
+
 class CleanupResponse(BaseModel):
     gc_collected: int
     gpu_freed_mb: float
@@ -0,0 +1,84 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Preprocessed pixel tensors keyed by content hash, size and recipe.
+
+Decode + CLIP preprocessing is the same for every catalog model at a given
+``image_size``: both ViT-L-14 and ViT-B-16 take 224x224 inputs normalized with
+the CLIP mean/std.  A poster classified by two models, or re-embedded after its
+embedding was evicted, can therefore reuse its ``(3, S, S)`` float32 row
+instead of decoding the image again.
+
+Keys are ``(sha256, image_size, recipe)``; the recipe names the preprocessing
+engine and decode mode, so switching either never serves stale rows.  The
+cache has its own byte budget (``IMAGE_PIXEL_CACHE_MAX_MB``), separate from the
+embedding cache: a 224x224 row costs 588 KiB, so 64 MiB holds ~110 posters.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+PixelKey = Tuple[str, int, str]
+
+
+class PixelTensorCache:
+    """Thread-safe byte-budgeted LRU of preprocessed ``(3, S, S)`` float32 rows."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[PixelKey, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: PixelKey) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._entries.get(key)
+            if row is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return row
+
+    def put(self, key: PixelKey, row: np.ndarray) -> None:
+        """Store a private read-only copy of *row*; rows larger than the budget are skipped."""
+        if row.nbytes > self._max_bytes:
+            return
+        row = np.array(row, dtype=np.float32, copy=True)
+        row.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = row
+            self._bytes += row.nbytes
+            while self._bytes > self._max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def trim(self, fraction: float) -> int:
+        """Evict the least recently used *fraction* of cached bytes; return bytes freed."""
+        with self._lock:
+            target = self._bytes * (1.0 - min(max(fraction, 0.0), 1.0))
+            freed = 0
+            while self._entries and self._bytes > target:
+                _key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                freed += evicted.nbytes
+            return freed
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
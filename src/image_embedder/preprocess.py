@@ -0,0 +1,90 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Native CLIP image preprocessing (``IMAGE_PREPROCESS_ENGINE=native``).
+
+Reproduces ``CLIPImageProcessor`` for the catalog models without its
+per-image Python overhead.  Three steps:
+
+1. bicubic resize so the shortest edge equals the target size, using the same
+   PIL call and output-size rounding as the processor;
+2. center crop to ``S x S`` as a NumPy view (no copy);
+3. rescale (1/255) and normalize with the CLIP mean/std in one fused
+   multiply-subtract, written directly into a reused ``(N, 3, S, S)`` float32
+   buffer.
+
+Output matches the HuggingFace processor within float32 rounding (see
+``tests/test_preprocess.py``).
+"""
+
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+# OpenAI CLIP normalization constants (shared by every catalog model).
+CLIP_MEAN = (0.48145466, 0.4578275, 0.40821073)
+CLIP_STD = (0.26862954, 0.26130258, 0.27577711)
+
+
+class ClipPreprocessor:
+    """Thread-safe replacement for ``CLIPProcessor(images=..., size={"shortest_edge": S})``.
+
+    The returned array lives in a per-thread buffer that is reused by the next
+    call on the same thread; consume it (run the forward pass) before then.
+    """
+
+    def __init__(
+        self,
+        mean: Sequence[float] = CLIP_MEAN,
+        std: Sequence[float] = CLIP_STD,
+    ) -> None:
+        std_arr = np.asarray(std, dtype=np.float32)
+        # (x / 255 - mean) / std  ==  x * scale - shift
+        self._scale = (1.0 / (255.0 * std_arr)).reshape(3, 1, 1).astype(np.float32)
+        self._shift = (np.asarray(mean, dtype=np.float32) / std_arr).reshape(3, 1, 1).astype(np.float32)
+        self._local = threading.local()
+
+    def __call__(self, images: Sequence[Image.Image], size: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return pixel values of shape ``(len(images), 3, size, size)``, float32.
+
+        Pass *out* to write into a caller-owned array instead of the per-thread buffer.
+        """
+        if out is None:
+            out = self._buffer(len(images), size)
+        for i, image in enumerate(images):
+            self.write_into(image, size, out[i])
+        return out
+
+    def write_into(self, image: Image.Image, size: int, out: np.ndarray) -> None:
+        """Preprocess one *image* into *out*, a ``(3, size, size)`` float32 array."""
+        pixels = self._resize_and_crop(image, size)
+        # uint8 HWC view -> CHW, scaled straight into the destination.
+        np.multiply(pixels.transpose(2, 0, 1), self._scale, out=out, casting="unsafe")
+        np.subtract(out, self._shift, out=out)
+
+    def _buffer(self, n: int, size: int) -> np.ndarray:
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n or buf.shape[2] != size:
+            buf = np.empty((n, 3, size, size), dtype=np.float32)
+            self._local.buf = buf
+        return buf[:n]
+
+    @staticmethod
+    def _resize_and_crop(image: Image.Image, size: int) -> np.ndarray:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        width, height = image.size
+        # Same rounding as transformers' get_resize_output_image_size(default_to_square=False).
+        if width <= height:
+            new_w, new_h = size, int(size * height / width)
+        else:
+            new_w, new_h = int(size * width / height), size
+        if (new_w, new_h) != (width, height):
+            image = image.resize((new_w, new_h), resample=Image.BICUBIC)
+        pixels = np.asarray(image)
+        top = (new_h - size) // 2
+        left = (new_w - size) // 2
+        return pixels[top:top + size, left:left + size]
@@ -6,6 +6,9 @@ from __future__ import annotations
 
 import asyncio
 from dataclasses import dataclass
+from typing import Any, Callable
+
+import anyio
 
 
 class QueueFullError(RuntimeError):
@@ -26,6 +29,9 @@ class QueueStats:
     rw_readers: int
     rw_writer: bool
     rw_writer_waiters: int
+    io_concurrency: int
+    io_in_flight: int
+    io_waiting: int
 
 
 class RWLock:
@@ -86,11 +92,24 @@ class EmbedQueue:
     - max_queue: maximum number of requests allowed to wait for a slot.
       max_queue = 0 means "no waiting allowed" (fail fast with 429 mapping).
     - max_wait_seconds: maximum time a request is allowed to wait for a slot.
+    - io_concurrency: maximum concurrent pre-inference jobs (fetch, decode,
+      hash, cache lookup) run through ``run_io()``.  These never hold a
+      compute slot, so a slow image host cannot stall inference.  Jobs
+      waiting for an I/O slot get their own waiting room, bounded by the
+      same max_queue and max_wait_seconds as the compute stage.
     """
 
-    def __init__(self, concurrency: int, max_queue: int, max_wait_seconds: int) -> None:
+    def __init__(
+        self,
+        concurrency: int,
+        max_queue: int,
+        max_wait_seconds: int,
+        io_concurrency: int = 8,
+    ) -> None:
         if concurrency <= 0:
             raise ValueError("concurrency must be >= 1")
+        if io_concurrency <= 0:
+            raise ValueError("io_concurrency must be >= 1")
         if max_queue < 0:
             raise ValueError("max_queue must be >= 0")
         if max_wait_seconds < 0:
@@ -104,6 +123,11 @@ class EmbedQueue:
         self._in_flight = 0
         self._waiting = 0
 
+        self._io_capacity = io_concurrency
+        self._io_cond = asyncio.Condition()
+        self._io_in_flight = 0
+        self._io_waiting = 0
+
         self._rwlock = RWLock()
 
     async def acquire(self) -> None:
@@ -144,6 +168,36 @@ class EmbedQueue:
             self._in_flight -= 1
             self._cond.notify(1)
 
+    async def run_io(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking pre-inference work in a worker thread, bounded by ``io_concurrency``."""
+        async with self._io_cond:
+            if self._io_in_flight >= self._io_capacity:
+                if self._max_queue == 0:
+                    raise QueueFullError("service is busy")
+                if self._io_waiting >= self._max_queue:
+                    raise QueueFullError("service is busy (I/O queue full)")
+
+                self._io_waiting += 1
+                try:
+                    try:
+                        await asyncio.wait_for(
+                            self._io_cond.wait_for(lambda: self._io_in_flight < self._io_capacity),
+                            timeout=self._max_wait_seconds,
+                        )
+                    except TimeoutError as exc:
+                        raise QueueWaitTimeoutError(
+                            f"timed out waiting for an I/O slot after {self._max_wait_seconds}s"
+                        ) from exc
+                finally:
+                    self._io_waiting -= 1
+            self._io_in_flight += 1
+        try:
+            return await anyio.to_thread.run_sync(func, *args)
+        finally:
+            async with self._io_cond:
+                self._io_in_flight -= 1
+                self._io_cond.notify(1)
+
     async def acquire_shared(self) -> None:
         await self._rwlock.acquire_shared()
 
@@ -167,5 +221,8 @@ class EmbedQueue:
             rw_readers=readers,
             rw_writer=writer,
             rw_writer_waiters=writer_waiters,
+            io_concurrency=self._io_capacity,
+            io_in_flight=self._io_in_flight,
+            io_waiting=self._io_waiting,
         )
 
@@ -2,12 +2,35 @@
 # Copyright (C) 2024-2026 Classifarr Contributors
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-"""Admin endpoints: POST /admin/cleanup."""
+"""Admin endpoints: POST /admin/cleanup and the /admin/cache export, import and ingest routes."""
 
-from fastapi import APIRouter, Depends, Request
+import tempfile
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from ..memory import force_cleanup, get_memory_usage
-from ..models import CleanupResponse
+from ..models import CacheImportResponse, CleanupResponse
+
+# Snapshot/manifest uploads larger than this spill from memory to a temporary file.
+_UPLOAD_SPOOL_BYTES = 16 * 1024 * 1024
+
+
+async def _load_upload(request: Request, loader, what: str) -> CacheImportResponse:
+    """Spool the request body and hand it to ``loader(fp)`` on a worker thread."""
+    logger = request.app.state.logger
+    with tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            result = await anyio.to_thread.run_sync(loader, spool)
+        except ValueError as exc:
+            logger.warning(f"Cache {what} rejected: {exc}")
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    logger.info(f"Cache {what} complete: {result}")
+    return CacheImportResponse(**result)
 
 
 def make_router(auth) -> APIRouter:
@@ -27,4 +50,23 @@ def make_router(auth) -> APIRouter:
             gpu_reserved_mb=mem_usage["gpu_reserved_mb"],
         )
 
+    @router.get("/admin/cache/export", dependencies=[Depends(auth)])
+    async def export_cache(request: Request):
+        # Rows are copied out up front; the generator then streams from the threadpool.
+        chunks = await anyio.to_thread.run_sync(request.app.state.embedder.export_cache)
+        return StreamingResponse(
+            chunks,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="embedding-cache.snap"'},
+        )
+
+    @router.post("/admin/cache/import", response_model=CacheImportResponse, dependencies=[Depends(auth)])
+    async def import_cache(request: Request):
+        return await _load_upload(request, request.app.state.embedder.import_cache, "import")
+
+    @router.post("/admin/cache/ingest", response_model=CacheImportResponse, dependencies=[Depends(auth)])
+    async def ingest_manifest(request: Request):
+        """Bulk-load an NDJSON manifest of precomputed embeddings (see ``manifest.py``)."""
+        return await _load_upload(request, request.app.state.embedder.ingest_manifest, "ingest")
+
     return router
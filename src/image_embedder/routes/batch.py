@@ -10,7 +10,7 @@ import functools
 import anyio
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
-from ..embedder import BatchItem, ImageEmbedder
+from ..embedder import BatchItem, ImageEmbedder, PreparedEmbed
 from ..models import (
     EmbedBatchItemResult,
     EmbedBatchRequest,
@@ -66,19 +66,20 @@ def make_router(limiter, rate_limit_embed: str, auth) -> APIRouter:
 
             async def _do_embed():
                 nonlocal acquired, shared
+                # Pre-inference stage on the I/O pool; fully cached or failed
+                # batches never take a compute slot.
+                prepared = await queue.run_io(embedder_instance.prepare_batch, spec, target_size, batch_items)
+                if not any(isinstance(p, PreparedEmbed) and p.result is None for p in prepared):
+                    return [p.result if isinstance(p, PreparedEmbed) else p for p in prepared]
+                compute = functools.partial(
+                    embedder_instance.embed_prepared_batch, spec, target_size, prepared
+                )
                 try:
                     await queue.acquire()
                     acquired = True
                     await queue.acquire_shared()
                     shared = True
-                    return await anyio.to_thread.run_sync(
-                        functools.partial(
-                            embedder_instance.embed_batch,
-                            spec,
-                            target_size,
-                            batch_items,
-                        )
-                    )
+                    return await anyio.to_thread.run_sync(compute)
                 finally:
                     if shared:
                         await queue.release_shared()
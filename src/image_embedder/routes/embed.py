@@ -5,6 +5,7 @@
 """Embedding endpoint: POST /embed-image."""
 
 import asyncio
+import functools
 
 import anyio
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
@@ -23,6 +24,8 @@ def _queue_headers(queue: EmbedQueue, *, retry_after_seconds: int | None = None)
         "X-Queue-Waiting": str(stats.waiting),
         "X-Queue-Max-Queue": str(stats.max_queue),
         "X-Queue-Max-Wait-Seconds": str(stats.max_wait_seconds),
+        "X-Queue-IO-In-Flight": str(stats.io_in_flight),
+        "X-Queue-IO-Waiting": str(stats.io_waiting),
     }
     if retry_after_seconds is not None:
         headers["Retry-After"] = str(max(1, int(retry_after_seconds)))
@@ -49,6 +52,19 @@ def make_router(limiter, rate_limit_embed: str, auth) -> APIRouter:
         batch_window = getattr(request.app.state, "batch_window", None)
 
         async def _do_embed():
+            # Pre-inference stage: fetch/decode/hash/cache lookup on the I/O pool,
+            # so only requests that need the model take a compute slot.
+            prepared = await queue.run_io(
+                embedder_instance.prepare,
+                payload.image_url,
+                payload.image_base64,
+                payload.model,
+                payload.normalize,
+                payload.image_size,
+            )
+            if prepared.result is not None:
+                return prepared.result
+
             if batch_window is not None:
                 job = EmbedJob(
                     image_url=payload.image_url,
@@ -56,9 +72,12 @@ def make_router(limiter, rate_limit_embed: str, auth) -> APIRouter:
                     model=payload.model,
                     normalize=payload.normalize,
                     image_size=payload.image_size,
+                    prepared=prepared,
                 )
                 return await batch_window.submit(job)
 
+            compute = functools.partial(embedder_instance.embed_prepared, prepared)
+
             # Standard single-request path.
             acquired = False
             shared = False
@@ -67,14 +86,7 @@ def make_router(limiter, rate_limit_embed: str, auth) -> APIRouter:
                 acquired = True
                 await queue.acquire_shared()
                 shared = True
-                return await anyio.to_thread.run_sync(  # type: ignore[union-attr]
-                    embedder_instance.embed,
-                    payload.image_url,
-                    payload.image_base64,
-                    payload.model,
-                    payload.normalize,
-                    payload.image_size,
-                )
+                return await anyio.to_thread.run_sync(compute)  # type: ignore[union-attr]
             finally:
                 if shared:
                     await queue.release_shared()
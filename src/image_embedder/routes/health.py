@@ -25,6 +25,7 @@ def make_router(limiter, rate_limit_health: str) -> APIRouter:
         model_status = embedder_instance.get_model_status()
         memory_info = embedder_instance.get_memory_info()
         cache_info = embedder_instance.get_cache_info()
+        batch_window = getattr(request.app.state, "batch_window", None)
 
         return HealthResponse(
             status="ok",
@@ -35,6 +36,11 @@ def make_router(limiter, rate_limit_health: str) -> APIRouter:
             memory=MemoryInfo(**memory_info) if memory_info else None,
             queue=queue.stats().__dict__,
             cache=cache_info,
+            http=embedder_instance.get_http_info(),
+            failures=embedder_instance.get_failure_cache_info(),
+            pixel_cache=embedder_instance.get_pixel_cache_info(),
+            batch_window=batch_window.stats() if batch_window is not None else None,
+            startup=embedder_instance.get_startup_info(),
         )
 
     @router.get("/ready", response_model=ReadyResponse)
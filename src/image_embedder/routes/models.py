@@ -22,6 +22,7 @@ def make_router(auth) -> APIRouter:
                 name=spec.name,
                 dims=spec.dims,
                 image_size=spec.image_size,
+                precision=spec.precision,
             )
             for spec in embedder_instance.list_models()
         ]
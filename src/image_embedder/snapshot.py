@@ -0,0 +1,83 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Binary snapshots of the in-memory embedding cache.
+
+Used for warm starts (``EMBED_CACHE_SNAPSHOT_PATH``, written on shutdown and
+read before warmup) and for seeding a new replica from an existing one via
+``GET /admin/cache/export`` and ``POST /admin/cache/import``.
+
+Layout (little-endian)::
+
+    magic     b"CFSN\\x00\\x01"
+    record*   key_len u16 | model_len u16 | source_len u16 | dims u32 | image_size u32
+              key | model | source (UTF-8) | dims x float32
+    end       a record header with key_len == 0
+
+Records are written oldest first, so importing them in order rebuilds the
+LRU recency of the source cache.  A missing end record means the stream was
+truncated and is rejected.  The reader only checks framing; the importer
+(``ImageEmbedder.import_cache``) checks each key against its record's model,
+``image_size`` and vector before inserting it.
+"""
+
+import struct
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+import numpy as np
+
+_MAGIC = b"CFSN\x00\x01"
+# key_len, model_len, source_len, dims, image_size
+_RECORD = struct.Struct("<HHHII")
+# Sanity bound on a record's vector width; catalog models use 512 or 768.
+_MAX_DIMS = 1 << 16
+# Records per yielded chunk when streaming an export.
+_CHUNK_RECORDS = 256
+
+# (key, vector, source, model_name, image_size)
+SnapshotEntry = Tuple[str, np.ndarray, str, str, int]
+
+
+def iter_snapshot(entries: Iterable[SnapshotEntry]) -> Iterator[bytes]:
+    """Serialize *entries* as a snapshot stream, in chunks."""
+    chunk = [_MAGIC]
+    for key, vector, source, model, image_size in entries:
+        key_b, model_b, source_b = key.encode("utf-8"), model.encode("utf-8"), source.encode("utf-8")
+        row = np.ascontiguousarray(vector, dtype="<f4")
+        chunk.append(_RECORD.pack(len(key_b), len(model_b), len(source_b), row.shape[0], image_size))
+        chunk.extend((key_b, model_b, source_b, row.tobytes()))
+        if len(chunk) >= _CHUNK_RECORDS * 5:
+            yield b"".join(chunk)
+            chunk = []
+    chunk.append(_RECORD.pack(0, 0, 0, 0, 0))
+    yield b"".join(chunk)
+
+
+def read_snapshot(fp: BinaryIO) -> Iterator[SnapshotEntry]:
+    """Parse a snapshot stream; raises ValueError on a bad header or truncation."""
+    if fp.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("Invalid cache snapshot: bad header")
+    while True:
+        header = _read_exact(fp, _RECORD.size)
+        key_len, model_len, source_len, dims, image_size = _RECORD.unpack(header)
+        if key_len == 0:
+            return
+        if dims == 0 or dims > _MAX_DIMS:
+            raise ValueError(f"Invalid cache snapshot: implausible dims {dims}")
+        text = _read_exact(fp, key_len + model_len + source_len)
+        try:
+            key = text[:key_len].decode("utf-8")
+            model = text[key_len:key_len + model_len].decode("utf-8")
+            source = text[key_len + model_len:].decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise ValueError("Invalid cache snapshot: undecodable record") from exc
+        vector = np.frombuffer(_read_exact(fp, dims * 4), dtype="<f4").astype(np.float32)
+        yield key, vector, source, model, image_size
+
+
+def _read_exact(fp: BinaryIO, n: int) -> bytes:
+    data = fp.read(n)
+    if len(data) != n:
+        raise ValueError("Invalid cache snapshot: truncated stream")
+    return data
@@ -0,0 +1,74 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""URL -> HTTP validators + content digest, for conditional revalidation.
+
+After a remote image is downloaded, its ``ETag``/``Last-Modified`` headers are
+stored with the SHA-256 digest of the bytes.  A later request for the same URL
+whose embedding is still cached sends ``If-None-Match``/``If-Modified-Since``;
+on ``304 Not Modified`` the stored digest rebuilds the embedding cache key and
+no body is transferred.  Embedding cache keys stay byte-derived: a 304 only
+ever reuses the digest of bytes this service actually downloaded.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class UrlMetadata:
+    digest: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class UrlMetadataCache:
+    """Thread-safe bounded LRU of URL -> ``UrlMetadata``."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, UrlMetadata]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._not_modified = 0
+        self._changed = 0
+
+    def get(self, url: str) -> Optional[UrlMetadata]:
+        with self._lock:
+            meta = self._entries.get(url)
+            if meta is not None:
+                self._entries.move_to_end(url)
+            return meta
+
+    def put(self, url: str, meta: UrlMetadata) -> None:
+        with self._lock:
+            self._entries[url] = meta
+            self._entries.move_to_end(url)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def record_revalidation(self, not_modified: bool) -> None:
+        with self._lock:
+            if not_modified:
+                self._not_modified += 1
+            else:
+                self._changed += 1
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self._maxsize,
+                "not_modified": self._not_modified,
+                "changed": self._changed,
+            }
@@ -5,10 +5,13 @@
 """Shared fake/stub classes and helper functions used across the test suite."""
 
 import io
+from dataclasses import dataclass
+from typing import Any
 
 from PIL import Image
 
 from image_embedder.config import Settings
+from image_embedder.embedder import PreparedEmbed, StagedBatch
 
 
 def _no_auth_settings(**kwargs) -> Settings:
@@ -29,8 +32,19 @@ def _png_bytes() -> bytes:
     return buf.getvalue()
 
 
+@dataclass
+class FakePrepared(PreparedEmbed):
+    """PreparedEmbed that remembers the call, so the inference stage can replay it on the fake."""
+
+    request: Any = None
+
+
 class FakeEmbedder:
-    """Minimal in-process stub for ImageEmbedder, suitable for API-layer tests."""
+    """Minimal in-process stub for ImageEmbedder, suitable for API-layer tests.
+
+    The staged methods (``prepare``/``embed_prepared`` and the batch variants)
+    replay into ``embed``/``embed_batch``, so subclasses only override those.
+    """
 
     def __init__(self):
         self.models = [
@@ -45,6 +59,7 @@ class FakeEmbedder:
                 self.name = name
                 self.dims = dims
                 self.image_size = image_size
+                self.precision = "fp32"
 
         return [Spec(m["name"], m["dims"], m["image_size"]) for m in self.models]
 
@@ -69,6 +84,23 @@ class FakeEmbedder:
         embedding = [0.1] * spec.dims
         return [(embedding, spec.dims, "local", spec.name, target_size) for _ in items]
 
+    def prepare(self, image_url, image_base64, model, normalize, image_size):
+        spec = self.resolve_model(model)
+        request = (image_url, image_base64, model, normalize, image_size)
+        return FakePrepared(spec, image_size or spec.image_size, normalize, request=request)
+
+    def embed_prepared(self, prepared):
+        return self.embed(*prepared.request)
+
+    def prepare_batch(self, spec, target_size, items):
+        return [FakePrepared(spec, target_size, item.normalize, request=item) for item in items]
+
+    def stage_prepared_batch(self, spec, target_size, prepared):
+        return StagedBatch(list(prepared), None)
+
+    def embed_prepared_batch(self, spec, target_size, prepared, staged=None):
+        return self.embed_batch(spec, target_size, [p.request for p in prepared])
+
     def warmup(self, model_name=None):
         pass
 
@@ -89,3 +121,27 @@ class FakeEmbedder:
 
     def get_cache_info(self):
         return None
+
+    def get_http_info(self):
+        return None
+
+    def get_failure_cache_info(self):
+        return None
+
+    def get_pixel_cache_info(self):
+        return None
+
+    def get_startup_info(self):
+        return None
+
+    def trim_caches(self, fraction=None):
+        return 0
+
+    def load_cache_snapshot(self):
+        return None
+
+    def save_cache_snapshot(self):
+        return None
+
+    def close(self):
+        pass
@@ -0,0 +1,282 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import base64
+import io
+import pathlib
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_embedder.backends import InferenceBackend, OnnxRuntimeBackend, OpenVinoBackend
+from image_embedder.config import Settings
+from image_embedder.embedder import BatchItem, ImageEmbedder, MODEL_CATALOG
+
+
+class _FakeSession:
+    """Returns row i as a constant vector of (i + 1) values."""
+
+    def __init__(self, dims, path=None, sess_options=None, providers=None):
+        self.dims, self.path, self.options, self.providers = dims, path, sess_options, providers
+        self.calls = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="pixel_values")]
+
+    def get_outputs(self):
+        return [types.SimpleNamespace(name="image_embeds")]
+
+    def get_providers(self):
+        return self.providers or ["CPUExecutionProvider"]
+
+    def get_session_options(self):
+        return self.options
+
+    def run(self, names, feeds):
+        pixel_values = feeds["pixel_values"]
+        self.calls.append((names, pixel_values.shape, pixel_values.dtype))
+        rows = np.arange(1, pixel_values.shape[0] + 1, dtype=np.float64)[:, None]
+        return [np.repeat(rows, self.dims, axis=1)]
+
+
+def _png_b64(seed=0):
+    rng = np.random.default_rng(seed)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, size=(64, 48, 3), dtype=np.uint8), "RGB").save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def test_onnx_device_resolves_without_torch(monkeypatch):
+    monkeypatch.setitem(sys.modules, "torch", None)
+    assert ImageEmbedder(settings=Settings(device="onnx"))._resolve_device() == "ort:CPU"
+    assert ImageEmbedder(settings=Settings(device="ONNX:CPU"))._resolve_device() == "ort:CPU"
+
+
+def test_onnx_backend_loads_cached_export_into_a_tuned_session(monkeypatch, tmp_path):
+    cached = tmp_path / "ViT-B-16" / "model.onnx"
+    cached.parent.mkdir()
+    cached.write_bytes(b"onnx")
+    monkeypatch.setenv("ONNX_MODEL_CACHE", str(tmp_path))
+    monkeypatch.setattr("image_embedder.backends.export_onnx", lambda *_a: pytest.fail("re-exported"))
+    fake_ort = types.SimpleNamespace(
+        SessionOptions=lambda: types.SimpleNamespace(),
+        GraphOptimizationLevel=types.SimpleNamespace(ORT_ENABLE_ALL="all"),
+        ExecutionMode=types.SimpleNamespace(ORT_SEQUENTIAL="seq", ORT_PARALLEL="par"),
+        InferenceSession=lambda path, sess_options, providers: _FakeSession(512, path, sess_options, providers),
+    )
+    monkeypatch.setitem(sys.modules, "onnxruntime", fake_ort)
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(
+        CLIPProcessor=types.SimpleNamespace(from_pretrained=lambda _hf_id: None)
+    ))
+    embedder = ImageEmbedder(settings=Settings(device="onnx", onnx_intra_op_threads=4))
+
+    backend = embedder._load_model(MODEL_CATALOG["ViT-B-16"])[0]
+    session = backend._session
+
+    assert session.path == str(cached)
+    assert session.providers == ["CPUExecutionProvider"]
+    assert vars(session.options) == {
+        "graph_optimization_level": "all",
+        "intra_op_num_threads": 4,
+        "inter_op_num_threads": 1,
+        "execution_mode": "seq",
+    }
+    out = backend.run({"pixel_values": np.zeros((3, 3, 224, 224), dtype=np.float64)})
+    assert out.dtype == np.float32 and out.shape == (3, 512)
+    assert session.calls == [(["image_embeds"], (3, 3, 224, 224), np.float32)]
+    assert embedder.get_device_info() == {
+        "type": "onnxruntime",
+        "backends": {
+            "ViT-B-16": {
+                "device": "ort:CPU",
+                "providers": ["CPUExecutionProvider"],
+                "intra_op_threads": 4,
+                "inter_op_threads": 1,
+            }
+        },
+    }
+
+
+def test_embed_and_embed_batch_run_through_the_backend(monkeypatch):
+    spec = MODEL_CATALOG["ViT-B-16"]
+    session = _FakeSession(spec.dims)
+    backend = OnnxRuntimeBackend(session)
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, preprocess_engine="native"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (backend, None, "ort:CPU"))
+
+    embedding, dims, *_ = embedder.embed(
+        image_url=None, image_base64=_png_b64(), model="ViT-B-16", normalize=False, image_size=224
+    )
+    assert (dims, embedding[:2]) == (spec.dims, [1.0, 1.0])
+
+    items = [BatchItem(None, _png_b64(1), True), BatchItem(None, "!!", True), BatchItem(None, _png_b64(2), False)]
+    results = embedder.embed_batch(spec, 224, items)
+    assert np.linalg.norm(results[0][0]) == pytest.approx(1.0)
+    assert isinstance(results[1], Exception)
+    assert results[2][0][:2] == [2.0, 2.0]
+    assert session.calls[-1][1] == (2, 3, 224, 224)
+
+    session.dims = 7
+    with pytest.raises(ValueError, match="ONNX Runtime model returned unexpected output shape"):
+        embedder.embed(image_url=None, image_base64=_png_b64(3), model="ViT-B-16", normalize=False, image_size=224)
+
+
+def test_warmup_runs_a_blank_image_through_the_backend(monkeypatch):
+    class _Recording(InferenceBackend):
+        def __init__(self):
+            super().__init__("cpu")
+            self.shapes = []
+
+        def run(self, inputs):
+            self.shapes.append(inputs["pixel_values"].shape)
+            return np.zeros((1, 512), dtype=np.float32)
+
+    recording = _Recording()
+    embedder = ImageEmbedder(settings=Settings(default_model="ViT-B-16"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (recording, None, "cpu"))
+    assert embedder.warmup().name == "ViT-B-16"
+    assert recording.shapes == [(1, 3, 224, 224)]
+
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "ort:CPU")
+    assert embedder.get_memory_info() is None
+
+
+class _FakeInferQueue:
+    """Runs each job on its own thread, then calls the callback like AsyncInferQueue."""
+
+    def __init__(self, compiled, jobs):
+        self.compiled, self.jobs, self.chunks, self.callback = compiled, jobs, [], None
+
+    def __len__(self):
+        return self.jobs
+
+    def set_callback(self, callback):
+        self.callback = callback
+
+    def start_async(self, inputs, userdata):
+        pixel_values = inputs["pixel_values"]
+        self.chunks.append(len(pixel_values))
+        # Row i of the output is filled with the first pixel of input row i.
+        out = np.repeat(pixel_values[:, :1, 0, 0], 512, axis=1)
+        request = types.SimpleNamespace(get_output_tensor=lambda _i: types.SimpleNamespace(data=out))
+        threading.Thread(target=self.callback, args=(request, userdata)).start()
+
+
+def test_openvino_throughput_hint_spreads_batches_over_an_infer_queue(monkeypatch, tmp_path):
+    (tmp_path / "ViT-B-16").mkdir()
+    (tmp_path / "ViT-B-16" / "model.xml").write_text("<xml/>")
+    monkeypatch.setenv("OV_MODEL_CACHE", str(tmp_path))
+    compiled_with = []
+
+    class _Compiled:
+        def get_property(self, name):
+            assert name == "OPTIMAL_NUMBER_OF_INFER_REQUESTS"
+            return 2
+
+    class _Core:
+        def read_model(self, path):
+            return path
+
+        def compile_model(self, model, device, config=None):
+            compiled_with.append((device, config))
+            return _Compiled()
+
+    monkeypatch.setitem(sys.modules, "openvino", types.SimpleNamespace(Core=_Core, AsyncInferQueue=_FakeInferQueue))
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(
+        CLIPProcessor=types.SimpleNamespace(from_pretrained=lambda _hf_id: None)
+    ))
+    spec = MODEL_CATALOG["ViT-B-16"]
+    embedder = ImageEmbedder(settings=Settings(ov_performance_hint="throughput", preprocess_engine="native"))
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "ov:CPU")
+
+    backend = embedder._load_model(spec)[0]
+    assert compiled_with == [("CPU", {"PERFORMANCE_HINT": "THROUGHPUT"})]
+    assert embedder.get_device_info()["backends"] == {
+        "ViT-B-16": {"device": "ov:CPU", "infer_requests": 2, "performance_hint": "THROUGHPUT"}
+    }
+
+    pixel_values = np.arange(5, dtype=np.float32)[:, None, None, None] * np.ones((5, 3, 4, 4), dtype=np.float32)
+    out = backend.run({"pixel_values": pixel_values})
+    assert backend._queue.chunks == [3, 2]
+    np.testing.assert_array_equal(out[:, 0], np.arange(5, dtype=np.float32))
+
+    items = [BatchItem(None, _png_b64(i), False) for i in range(3)]
+    results = embedder.embed_batch(spec, 224, items)
+    assert [len(r[0]) for r in results] == [512] * 3
+    assert backend._queue.chunks[2:] == [2, 1]
+
+    with pytest.raises(ValueError, match="OV_PERFORMANCE_HINT"):
+        ImageEmbedder(settings=Settings(ov_performance_hint="fastest"))
+
+
+def test_openvino_compiled_blobs_are_cached_per_version_and_reported(monkeypatch, tmp_path):
+    model_dir = tmp_path / "ViT-B-16"
+    model_dir.mkdir()
+    (model_dir / "model.xml").write_text("<xml/>")
+    monkeypatch.setenv("OV_MODEL_CACHE", str(tmp_path))
+    compiled_with = []
+    # OpenVINO names each blob after a hash of the IR and compile config.
+    blob_name = ["1234.blob"]
+
+    class _Core:
+        def read_model(self, path):
+            return path
+
+        def compile_model(self, model, device, config=None):
+            compiled_with.append((model, device, dict(config or {})))
+            if config and "CACHE_DIR" in config:
+                blob = pathlib.Path(config["CACHE_DIR"]) / blob_name[0]
+                if not blob.exists():
+                    blob.write_bytes(b"blob")
+            return object()
+
+    fake_ov = types.SimpleNamespace(Core=_Core, get_version=lambda: "2024.4.0-16579")
+    monkeypatch.setitem(sys.modules, "openvino", fake_ov)
+    spec, settings = MODEL_CATALOG["ViT-B-16"], Settings()
+
+    cold = OpenVinoBackend.load(spec, "ov:GPU", settings)
+    blob_dir = model_dir / "compiled" / "GPU-2024.4.0-16579"
+    assert compiled_with == [(str(model_dir / "model.xml"), "GPU", {"CACHE_DIR": str(blob_dir)})]
+    assert cold.load_timings["ir"] == "cached"
+    assert cold.load_timings["compile_cache"] == "miss"
+    assert (blob_dir / "cold_compile.json").exists()
+
+    warm = OpenVinoBackend.load(spec, "ov:GPU", settings)
+    assert warm.load_timings["compile_cache"] == "hit"
+    assert warm.load_timings["saved_seconds"] >= 0
+    assert "cold_compile_seconds" in warm.load_timings
+
+    # A re-exported IR compiles to a new blob next to the old one: that is a miss.
+    blob_name[0] = "5678.blob"
+    recompiled = OpenVinoBackend.load(spec, "ov:GPU", settings)
+    assert recompiled.load_timings["compile_cache"] == "miss"
+    assert sorted(p.name for p in blob_dir.glob("*.blob")) == ["1234.blob", "5678.blob"]
+    blob_name[0] = "1234.blob"
+
+    # An OpenVINO upgrade recompiles and drops the old version's blobs for that device only.
+    (model_dir / "compiled" / "CPU-2024.4.0-16579").mkdir()
+    fake_ov.get_version = lambda: "2025.0.0-17942"
+    upgraded = OpenVinoBackend.load(spec, "ov:GPU", settings)
+    assert upgraded.load_timings["compile_cache"] == "miss"
+    assert sorted(p.name for p in (model_dir / "compiled").iterdir()) == ["CPU-2024.4.0-16579", "GPU-2025.0.0-17942"]
+
+    disabled = OpenVinoBackend.load(spec, "ov:GPU", Settings(ov_compile_cache=False))
+    assert disabled.load_timings["compile_cache"] == "disabled"
+    assert "CACHE_DIR" not in compiled_with[-1][2]
+
+    monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(
+        CLIPProcessor=types.SimpleNamespace(from_pretrained=lambda _hf_id: None)
+    ))
+    monkeypatch.setattr(OpenVinoBackend, "warmup", lambda self, image_size: None)
+    embedder = ImageEmbedder(settings=Settings(default_model="ViT-B-16"))
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "ov:GPU")
+    assert embedder.get_startup_info() is None
+    embedder.warmup()
+    startup = embedder.get_startup_info()["models"]["ViT-B-16"]
+    assert startup["compile_cache"] == "hit"
+    assert {"load_seconds", "warmup_seconds", "compile_seconds", "saved_seconds"} <= startup.keys()
@@ -0,0 +1,222 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import numpy as np
+import pytest
+
+from image_embedder.cache import EmbeddingLRUCache, ShardedEmbeddingLRUCache
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+
+
+def _result(value: float, dims: int = 768, model: str = "ViT-L-14"):
+    return ([value] * dims, dims, "local", model, 224)
+
+
+def test_cache_keeps_vectors_in_float32_slab_rows():
+    cache = EmbeddingLRUCache(100)
+    cache.put("a", _result(0.5))
+    cache.put("b", _result(0.25, dims=512, model="ViT-B-16"))
+
+    slab_l = cache._slabs[("ViT-L-14", 768)]
+    slab_b = cache._slabs[("ViT-B-16", 512)]
+    assert slab_l.rows.dtype == np.float32
+    assert slab_l.rows.shape[1] == 768
+    assert slab_b.rows.shape[1] == 512
+
+    info = cache.info()
+    assert info["bytes"] == 768 * 4 + 512 * 4
+    assert info["reserved_bytes"] == slab_l.rows.nbytes + slab_b.rows.nbytes
+
+
+def test_cache_recycles_evicted_rows():
+    cache = EmbeddingLRUCache(2)
+    cache.put("a", _result(1.0, dims=4))
+    cache.put("b", _result(2.0, dims=4))
+    slab = cache._slabs[("ViT-L-14", 4)]
+    row_a = cache._cache["a"].row
+
+    cache.put("c", _result(3.0, dims=4))
+
+    assert cache.get("a") is None
+    assert cache._cache["c"].row == row_a
+    assert slab.capacity == 2
+    assert cache.get("b") == _result(2.0, dims=4)
+    assert cache.get("c") == _result(3.0, dims=4)
+    assert cache.info()["evictions"] == 1
+
+
+def test_cache_slab_grows_geometrically_up_to_maxsize():
+    cache = EmbeddingLRUCache(200)
+    for i in range(130):
+        cache.put(str(i), _result(float(i), dims=2))
+
+    slab = cache._slabs[("ViT-L-14", 2)]
+    assert slab.capacity == 200
+    assert cache.get("0") == _result(0.0, dims=2)
+    assert cache.get("129") == _result(129.0, dims=2)
+
+
+def test_cache_clear_releases_slabs():
+    cache = EmbeddingLRUCache(8)
+    cache.put("a", _result(1.0, dims=4))
+    cache.clear()
+
+    info = cache.info()
+    assert info["size"] == 0
+    assert info["bytes"] == 0
+    assert info["reserved_bytes"] == 0
+
+
+def test_cache_byte_budget_evicts_by_bytes_across_models():
+    # 8 KiB budget: two 768-dim rows (3 KiB each) + one 512-dim row (2 KiB) fit exactly.
+    cache = EmbeddingLRUCache(0, max_bytes=8 * 1024)
+    cache.put("l1", _result(1.0))
+    cache.put("l2", _result(2.0))
+    cache.put("b1", _result(3.0, dims=512, model="ViT-B-16"))
+    assert cache.info()["bytes"] == 8 * 1024
+
+    cache.put("b2", _result(4.0, dims=512, model="ViT-B-16"))
+
+    assert cache.get("l1") is None
+    assert cache.get("l2") is not None
+    info = cache.info()
+    assert info["bytes"] == 768 * 4 + 2 * 512 * 4
+    assert info["max_bytes"] == 8 * 1024
+    assert info["models"]["ViT-L-14"]["bytes"] == 768 * 4
+    assert info["models"]["ViT-B-16"]["size"] == 2
+
+
+def test_cache_per_model_quota_only_evicts_that_model():
+    cache = EmbeddingLRUCache(0, max_bytes=1024 * 1024, model_quota_bytes={"ViT-B-16": 2 * 512 * 4})
+    cache.put("l1", _result(1.0))
+    for i in range(3):
+        cache.put(f"b{i}", _result(float(i), dims=512, model="ViT-B-16"))
+
+    assert cache.get("b0") is None
+    assert cache.get("b1") is not None
+    assert cache.get("l1") is not None
+    models = cache.info()["models"]
+    assert models["ViT-B-16"]["bytes"] == 2 * 512 * 4
+    assert models["ViT-B-16"]["quota_bytes"] == 2 * 512 * 4
+    # The quota also caps how far the model's slab may grow.
+    assert models["ViT-B-16"]["reserved_bytes"] == 2 * 512 * 4
+
+
+def test_cache_skips_rows_larger_than_budget():
+    cache = EmbeddingLRUCache(0, max_bytes=100)
+    cache.put("big", _result(1.0))
+    assert cache.get("big") is None
+    assert cache.info()["size"] == 0
+
+
+def test_cache_trim_evicts_lru_share_and_shrinks_slabs():
+    cache = EmbeddingLRUCache(100)
+    for i in range(8):
+        cache.put(str(i), _result(float(i), dims=4))
+    reserved_before = cache.info()["reserved_bytes"]
+
+    freed = cache.trim(0.5)
+
+    info = cache.info()
+    assert info["size"] == 4
+    assert cache.get("0") is None
+    assert cache.get("7") == _result(7.0, dims=4)
+    assert info["reserved_bytes"] == 4 * 4 * 4
+    assert freed == reserved_before - info["reserved_bytes"]
+
+    # Shrunk slabs still accept new rows.
+    cache.put("new", _result(9.0, dims=4))
+    assert cache.get("new") == _result(9.0, dims=4)
+
+
+def test_embedder_builds_byte_budgeted_cache_and_trims():
+    settings = Settings(embed_cache_max_mb=1, embed_cache_model_quota_mb={"ViT-B-16": 1})
+    embedder = ImageEmbedder(settings=settings)
+    for i in range(4):
+        embedder._cache_put(str(i), _result(float(i)))
+
+    info = embedder.get_cache_info()
+    assert info["max_bytes"] == 1024 * 1024
+    assert info["maxsize"] == 0
+    assert info["models"]["ViT-L-14"]["size"] == 4
+
+    assert embedder.trim_caches(1.0) > 0
+    assert embedder.get_cache_info()["size"] == 0
+
+
+def test_sharded_cache_splits_bounds_and_aggregates_info():
+    cache = ShardedEmbeddingLRUCache(4, 400, model_quota_bytes={"ViT-B-16": 8 * 1024 * 1024})
+    for i in range(500):
+        cache.put(f"k{i}", _result(float(i), dims=4))
+
+    assert cache.shards == 4
+    assert cache.get("k499") == _result(499.0, dims=4)
+    assert cache.get("k0") is None
+    info = cache.info()
+    assert info["shards"] == 4
+    assert info["maxsize"] == 400
+    assert 380 <= info["size"] <= 400  # each segment evicts its own LRU at 100 entries
+    assert info["evictions"] == 500 - info["size"]
+    assert (info["hits"], info["misses"]) == (1, 1)
+    assert info["models"]["ViT-L-14"]["bytes"] == info["bytes"] == info["size"] * 16
+    assert cache.trim(1.0) > 0 and cache.info()["size"] == 0
+
+
+def test_sharded_cache_stays_single_segment_when_small():
+    assert ShardedEmbeddingLRUCache(8, 100).shards == 1
+    assert ShardedEmbeddingLRUCache(8, 0, max_bytes=3 * 1024 * 1024).shards == 3
+    assert ImageEmbedder(settings=Settings(embed_cache_size=8)).get_cache_info()["shards"] == 1
+    assert ImageEmbedder(settings=Settings(embed_cache_size=1000, embed_cache_shards=4)).get_cache_info()["shards"] == 4
+
+
+def _hot_survivors_after_scan(cache, hot=50, scan=1000):
+    dims = 4
+    for i in range(hot):
+        cache.put(f"hot{i}", _result(float(i), dims=dims))
+    for _ in range(3):
+        for i in range(hot):
+            cache.get(f"hot{i}")
+    for i in range(scan):
+        if cache.get(f"scan{i}") is None:
+            cache.put(f"scan{i}", _result(-1.0, dims=dims))
+    return sum(cache.get(f"hot{i}") is not None for i in range(hot))
+
+
+def test_tinylfu_admission_keeps_hot_set_through_a_library_scan():
+    lru = EmbeddingLRUCache(100)
+    tinylfu = EmbeddingLRUCache(100, policy="tinylfu")
+
+    assert _hot_survivors_after_scan(lru) == 0
+    assert _hot_survivors_after_scan(tinylfu) == 50
+    admission = tinylfu.info()["admission"]
+    assert admission["policy"] == "tinylfu"
+    assert admission["rejected"] >= 900
+    assert admission["window"] + admission["probation"] + admission["protected"] == tinylfu.info()["size"] <= 100
+
+
+def test_tinylfu_rejection_does_not_evict_for_the_model_quota(monkeypatch):
+    cache = EmbeddingLRUCache(100, model_quota_bytes={"ViT-L-14": 4 * 4 * 4}, policy="tinylfu")
+    for i in range(4):
+        cache.put(f"hot{i}", _result(float(i), dims=4))
+    # The quota is full; a rejected newcomer must not cost a resident its slot.
+    monkeypatch.setattr(cache._policy, "add", lambda key, weight: (False, []))
+    cache.put("scan", _result(-1.0, dims=4))
+
+    assert cache.get("scan") is None
+    assert all(cache.get(f"hot{i}") is not None for i in range(4))
+    assert cache.info()["evictions"] == 0
+
+
+def test_tinylfu_admission_with_byte_budget_and_shards():
+    cache = ShardedEmbeddingLRUCache(2, 0, max_bytes=2 * 1024 * 1024, policy="tinylfu")
+    for i in range(2000):
+        cache.put(f"k{i}", _result(float(i)))
+
+    info = cache.info()
+    assert info["bytes"] <= 2 * 1024 * 1024
+    assert info["admission"]["admitted"] + info["admission"]["rejected"] > 0
+    assert cache.trim(1.0) > 0 and cache.info()["admission"]["probation"] == 0
+    with pytest.raises(ValueError, match="EMBED_CACHE_POLICY"):
+        ImageEmbedder(settings=Settings(embed_cache_policy="arc"))
@@ -88,10 +88,8 @@ def test_fetch_image_bytes_skips_empty_chunks(monkeypatch):
         def close(self):
             self.closed = True
 
-    import requests
-
     fake = FakeResponse()
-    monkeypatch.setattr(requests, "get", lambda *a, **k: fake)
+    monkeypatch.setattr(embedder._http_pool, "get", lambda *a, **k: fake)
 
     data = embedder._fetch_image_bytes("https://image.tmdb.org/t/p/w500/x.png")
     assert data == b"ab"
@@ -0,0 +1,141 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+import os
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_embedder import decode_pool
+from image_embedder.backends import OpenVinoBackend
+from image_embedder.config import Settings
+from image_embedder.decode_pool import DECODE_TIMEOUT, WORKER_CRASHED, DecodePool
+from image_embedder.embedder import ImageEmbedder, PreparedEmbed
+from image_embedder.preprocess import ClipPreprocessor
+
+
+def _encoded(width, height, fmt="PNG", seed=0):
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8), "RGB")
+    buf = io.BytesIO()
+    image.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = DecodePool(workers=2)
+    yield pool
+    pool.close()
+
+
+def test_pool_returns_preprocessed_pixels_through_shared_memory(pool):
+    blobs = [_encoded(300, 450, seed=1), b"not-an-image", _encoded(640, 360, seed=2)]
+
+    pixel_values, errors = pool.pixels(blobs, 224, timeout=60)
+
+    assert pixel_values.shape == (3, 3, 224, 224)
+    assert errors == [None, "Unable to decode image bytes", None]
+    expected = ClipPreprocessor()([Image.open(io.BytesIO(blobs[i])).convert("RGB") for i in (0, 2)], 224)
+    np.testing.assert_allclose(pixel_values[[0, 2]], expected, atol=1e-6)
+
+
+def test_pool_honours_jpeg_draft_decode(pool):
+    blob = _encoded(2000, 3000, fmt="JPEG")
+
+    draft, _ = pool.pixels([blob], 224, draft=True, timeout=60)
+    full, _ = pool.pixels([blob], 224, draft=False, timeout=60)
+
+    assert not np.array_equal(draft, full)
+    assert float(np.abs(draft - full).mean()) < 0.1
+
+
+def test_embed_batch_uses_decode_pool_and_records_failures(monkeypatch):
+    seen = []
+
+    def _model(inputs):
+        seen.append(inputs["pixel_values"].shape)
+        return [np.ones((inputs["pixel_values"].shape[0], 768), dtype=np.float32)]
+
+    def _processor(**_kwargs):
+        raise AssertionError("the decode pool replaces CLIPProcessor")
+
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, decode_workers=1, preprocess_engine="native"))
+    try:
+        monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:CPU"), _processor, "ov:CPU"))
+        spec = embedder.resolve_model("ViT-L-14")
+        payloads = [
+            PreparedEmbed(spec, 224, True, _encoded(300, 450)),
+            PreparedEmbed(spec, 224, True, b"broken"),
+        ]
+
+        outcomes = embedder._embed_batch_uncached(spec, 224, payloads)
+
+        assert seen == [(1, 3, 224, 224)]
+        assert outcomes[0][1] == 768
+        assert isinstance(outcomes[1], ValueError)
+        with pytest.raises(ValueError, match="Unable to decode"):
+            embedder._prepare_bytes(spec, 224, True, b"broken")
+    finally:
+        embedder.close()
+
+
+def _hostile_decode(shm_name, shape, index, data, draft_size):
+    """Worker stand-in: b"crash" kills the process, b"hang" outlives the deadline."""
+    if data == b"crash":
+        os._exit(1)
+    if data == b"hang":
+        time.sleep(3)
+    return decode_pool._decode_into(shm_name, shape, index, data, draft_size)
+
+
+def test_pool_survives_a_worker_crash_and_reports_it_per_row(monkeypatch):
+    monkeypatch.setattr(decode_pool, "_decode_into", _hostile_decode)
+    pool = DecodePool(workers=1)
+    try:
+        _, errors = pool.pixels([b"crash", _encoded(64, 64)], 224, timeout=60)
+        assert errors[0] == WORKER_CRASHED
+        assert pool.restarts == 1
+
+        pixel_values, errors = pool.pixels([_encoded(64, 64)], 224, timeout=60)
+        assert errors == [None]
+        assert pixel_values.shape == (1, 3, 224, 224)
+    finally:
+        pool.close()
+
+
+def test_pool_timeout_is_one_deadline_for_the_whole_batch(monkeypatch):
+    monkeypatch.setattr(decode_pool, "_decode_into", _hostile_decode)
+    pool = DecodePool(workers=2)
+    try:
+        pool.pixels([_encoded(64, 64)] * 2, 224, timeout=60)  # spawn both workers up front
+        started = time.perf_counter()
+        _, errors = pool.pixels([b"hang", b"hang", _encoded(64, 64)], 224, timeout=1)
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close()
+
+    assert errors[:2] == [DECODE_TIMEOUT, DECODE_TIMEOUT]
+    assert elapsed < 1.8
+
+
+def test_decode_pool_requires_the_native_engine_and_keeps_transient_errors_out_of_the_failure_cache(monkeypatch):
+    with pytest.raises(ValueError, match="IMAGE_PREPROCESS_ENGINE=native"):
+        ImageEmbedder(settings=Settings(decode_workers=1))
+
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, decode_workers=1, preprocess_engine="native"))
+    try:
+        blob = _encoded(64, 64)
+        monkeypatch.setattr(
+            embedder._decode_pool, "pixels", lambda blobs, *_a, **_k: (None, [DECODE_TIMEOUT] * len(blobs))
+        )
+        _, errors = embedder._pooled_inputs([blob], 224, "np")
+        assert str(errors[0]) == DECODE_TIMEOUT
+        spec = embedder.resolve_model("ViT-L-14")
+        embedder._prepare_bytes(spec, 224, True, blob)  # not remembered as a decode failure
+    finally:
+        embedder.close()
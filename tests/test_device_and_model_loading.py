@@ -7,6 +7,7 @@ import types
 
 import pytest
 
+from image_embedder.cache import EmbeddingLRUCache
 from image_embedder.config import Settings
 from image_embedder.embedder import ImageEmbedder, MODEL_CATALOG
 
@@ -110,3 +111,38 @@ def test_load_model_is_cached(monkeypatch):
     assert first is second
     assert calls["model"] == 1
     assert calls["proc"] == 1
+
+
+def test_int8_variant_quantizes_on_cpu_and_is_rejected_elsewhere(monkeypatch):
+    fp32, int8 = MODEL_CATALOG["ViT-B-16"], MODEL_CATALOG["ViT-B-16-int8"]
+    assert (int8.hf_id, int8.dims, int8.precision) == (fp32.hf_id, fp32.dims, "int8")
+    assert EmbeddingLRUCache.make_key(b"poster", fp32.name, 224, True) != EmbeddingLRUCache.make_key(
+        b"poster", int8.name, 224, True
+    )
+
+    class FakeModel:
+        @classmethod
+        def from_pretrained(cls, _hf_id):
+            return cls()
+
+        def to(self, _device):
+            return self
+
+        def eval(self):
+            return self
+
+    fake_transformers = types.SimpleNamespace(CLIPVisionModelWithProjection=FakeModel, CLIPProcessor=FakeModel)
+    monkeypatch.setitem(sys.modules, "transformers", fake_transformers)
+    quantized = object()
+    monkeypatch.setattr("image_embedder.backends.quantize_dynamic_int8", lambda model: quantized)
+
+    embedder = ImageEmbedder(settings=Settings(device="cpu"))
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "cpu")
+    assert embedder._load_model(int8)[0].model is quantized
+    assert embedder._load_model(fp32)[0].model is not quantized
+
+    for device in ("cuda", "ov:CPU"):
+        other = ImageEmbedder(settings=Settings(device="cpu"))
+        monkeypatch.setattr(other, "_resolve_device", lambda device=device: device)
+        with pytest.raises(ValueError, match="requires DEVICE=cpu"):
+            other._load_model(int8)
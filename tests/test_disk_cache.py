@@ -0,0 +1,156 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import numpy as np
+import pytest
+
+from image_embedder.config import Settings
+from image_embedder.disk_cache import DiskEmbeddingCache
+from image_embedder.embedder import BatchItem, EmbeddingLRUCache, ImageEmbedder, MODEL_CATALOG
+
+
+def _result(value: float, dims: int = 4, model: str = "ViT-L-14"):
+    return ([value] * dims, dims, "local", model, 224)
+
+
+def _key(payload: bytes, model: str = "ViT-L-14") -> str:
+    return EmbeddingLRUCache.make_key(payload, model, 224, True)
+
+
+def test_disk_cache_roundtrip_and_persistence(tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(_key(b"a"), _result(0.5))
+    cache.put(_key(b"b", "ViT-B-16"), _result(0.25, dims=2, model="ViT-B-16"))
+
+    assert cache.get(_key(b"a")) == _result(0.5)
+    assert cache.get(_key(b"missing")) is None
+    cache.close()
+
+    reopened = DiskEmbeddingCache(str(tmp_path), max_bytes=1024 * 1024)
+    assert reopened.get(_key(b"a")) == _result(0.5)
+    assert reopened.get(_key(b"b", "ViT-B-16")) == _result(0.25, dims=2, model="ViT-B-16")
+    info = reopened.info()
+    assert info["size"] == 2
+    assert info["bytes"] == 4 * 4 + 2 * 4
+    assert info["hits"] == 2
+
+
+def test_disk_cache_stores_float32_rows(tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=1024 * 1024)
+    cache.put(_key(b"a"), ([0.1, 0.2, 0.3], 3, "local", "ViT-L-14", 224))
+
+    assert (tmp_path / "gen-0" / "rows-3.f32").stat().st_size == 3 * 4
+    embedding = cache.get(_key(b"a"))[0]
+    assert embedding == pytest.approx(np.array([0.1, 0.2, 0.3], dtype=np.float32).tolist())
+
+
+def test_disk_cache_evicts_lru_and_compacts_within_budget(tmp_path):
+    # Budget fits four 4-dim rows (64 bytes).
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=64)
+    for i in range(4):
+        cache.put(_key(bytes([i])), _result(float(i)))
+    assert cache.get(_key(bytes([0]))) is not None  # refresh 0 so 1 becomes LRU
+
+    cache.put(_key(b"new"), _result(9.0))
+    cache.compact()  # waits for (or replaces) the background compaction
+
+    info = cache.info()
+    assert info["compactions"] == 1
+    assert info["file_bytes"] <= 64
+    assert cache.get(_key(bytes([1]))) is None
+    assert cache.get(_key(bytes([0]))) == _result(0.0)
+    assert cache.get(_key(b"new")) == _result(9.0)
+
+    cache.close()
+    reopened = DiskEmbeddingCache(str(tmp_path), max_bytes=64)
+    assert reopened.get(_key(b"new")) == _result(9.0)
+    assert reopened.get(_key(bytes([1]))) is None
+
+
+def test_disk_cache_put_leaves_compaction_to_a_background_thread(monkeypatch, tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=64)
+    for i in range(4):
+        cache.put(_key(bytes([i])), _result(float(i)))
+    scheduled = []
+    monkeypatch.setattr(cache, "_schedule_compaction", lambda: scheduled.append(True))
+
+    cache.put(_key(b"new"), _result(9.0))
+
+    assert scheduled == [True]
+    assert cache.info()["compactions"] == 0
+    assert cache.get(_key(b"new")) == _result(9.0)
+    assert cache.get(_key(bytes([3]))) == _result(3.0)
+
+
+def test_disk_cache_crash_before_generation_switch_keeps_old_rows(monkeypatch, tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=64)
+    monkeypatch.setattr(cache, "_schedule_compaction", lambda: None)
+    for i in range(5):
+        cache.put(_key(bytes([i])), _result(float(i)))
+
+    def _crash(_gen):
+        raise OSError("power cut")
+
+    monkeypatch.setattr(cache, "_write_current", _crash)
+    with pytest.raises(OSError):
+        cache.compact()
+    cache.close()
+
+    # The old generation still maps every key to its own row.
+    reopened = DiskEmbeddingCache(str(tmp_path), max_bytes=1024)
+    for i in range(5):
+        assert reopened.get(_key(bytes([i]))) == _result(float(i))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["gen-0"]
+
+
+def test_disk_cache_ignores_torn_trailing_writes(tmp_path):
+    cache = DiskEmbeddingCache(str(tmp_path), max_bytes=1024)
+    cache.put(_key(b"a"), _result(1.0))
+    cache.close()
+    with open(tmp_path / "gen-0" / "rows-4.f32", "ab") as f:
+        f.write(b"\x00\x01")
+    with open(tmp_path / "gen-0" / "index.bin", "ab") as f:
+        f.write(b"\x07")
+
+    reopened = DiskEmbeddingCache(str(tmp_path), max_bytes=1024)
+    reopened.put(_key(b"b"), _result(2.0))
+
+    assert reopened.get(_key(b"a")) == _result(1.0)
+    assert reopened.get(_key(b"b")) == _result(2.0)
+
+
+def test_embed_disk_hit_skips_model_loading_after_restart(monkeypatch, tmp_path):
+    spec = MODEL_CATALOG["ViT-L-14"]
+    settings = Settings(embed_cache_size=8, embed_disk_cache_dir=str(tmp_path))
+    expected = ([0.5] * spec.dims, spec.dims, "local", spec.name, spec.image_size)
+
+    first = ImageEmbedder(settings=settings)
+    first._cache_put(EmbeddingLRUCache.make_key(b"poster", spec.name, spec.image_size, True), expected)
+    first.close()
+
+    second = ImageEmbedder(settings=settings)
+    monkeypatch.setattr(second, "_resolve_image_bytes", lambda *_a, **_k: b"poster")
+    monkeypatch.setattr(second, "_load_model", lambda _s: (_ for _ in ()).throw(AssertionError("should not load model")))
+
+    result = second.embed(image_url=None, image_base64="x", model=spec.name, normalize=True, image_size=None)
+
+    assert result == expected
+    info = second.get_cache_info()
+    assert info["disk"]["hits"] == 1
+    assert info["size"] == 1  # promoted into the memory tier
+
+
+def test_embed_batch_uses_disk_tier_without_memory_cache(monkeypatch, tmp_path):
+    spec = MODEL_CATALOG["ViT-L-14"]
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, embed_disk_cache_dir=str(tmp_path)))
+    expected = ([0.5] * spec.dims, spec.dims, "local", spec.name, spec.image_size)
+    embedder._cache_put(EmbeddingLRUCache.make_key(b"poster", spec.name, spec.image_size, False), expected)
+
+    monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda _u, b64: b64.encode("ascii"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _s: (_ for _ in ()).throw(AssertionError("should not load model")))
+
+    outcomes = embedder.embed_batch(spec, spec.image_size, [BatchItem(None, "poster", False)])
+
+    assert outcomes == [expected]
+    assert set(embedder.get_cache_info()) == {"disk", "inflight"}
@@ -7,8 +7,11 @@ import io
 import sys
 import types
 
+import numpy as np
+import pytest
 from PIL import Image
 
+from image_embedder.backends import TorchBackend
 from image_embedder.config import Settings
 from image_embedder.embedder import ImageEmbedder
 
@@ -31,17 +34,6 @@ class FakeProcessor:
         return {"pixel_values": FakeInput()}
 
 
-class FakeNumpy:
-    def __init__(self, arr):
-        self._arr = arr
-
-    def astype(self, _dtype):
-        return self
-
-    def tolist(self):
-        return self._arr
-
-
 class FakeTensor:
     def __init__(self, arr):
         self._arr = arr
@@ -53,7 +45,7 @@ class FakeTensor:
         return self
 
     def numpy(self):
-        return FakeNumpy(self._arr)
+        return np.asarray(self._arr)
 
 
 _FAKE_EMBEDDING = [1.0, 2.0, 3.0] + [0.0] * 765  # 768 dims to match ViT-L-14
@@ -61,7 +53,7 @@ _FAKE_EMBEDDING = [1.0, 2.0, 3.0] + [0.0] * 765  # 768 dims to match ViT-L-14
 
 class _FakeOutput:
     def __init__(self):
-        self.image_embeds = [FakeTensor(_FAKE_EMBEDDING)]
+        self.image_embeds = FakeTensor([_FAKE_EMBEDDING])
 
 
 class FakeModel:
@@ -70,8 +62,6 @@ class FakeModel:
 
 
 def _install_fake_torch(monkeypatch):
-    calls = {"normalize": 0}
-
     class _NoGrad:
         def __enter__(self):
             return None
@@ -79,24 +69,16 @@ def _install_fake_torch(monkeypatch):
         def __exit__(self, exc_type, exc, tb):
             return False
 
-    def _normalize(features, p, dim):
-        calls["normalize"] += 1
-        return features
-
-    fake_torch = types.SimpleNamespace(
-        no_grad=lambda: _NoGrad(),
-        nn=types.SimpleNamespace(functional=types.SimpleNamespace(normalize=_normalize)),
-    )
+    fake_torch = types.SimpleNamespace(no_grad=lambda: _NoGrad())
     monkeypatch.setitem(sys.modules, "torch", fake_torch)
-    return calls
 
 
 def test_embed_flow_offline_with_mocked_torch_and_transformers(monkeypatch):
-    calls = _install_fake_torch(monkeypatch)
+    _install_fake_torch(monkeypatch)
 
     embedder = ImageEmbedder(settings=Settings(allow_remote_urls=False))
 
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (FakeModel(), FakeProcessor(), "cpu"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (TorchBackend(FakeModel(), "cpu"), FakeProcessor(), "cpu"))
 
     embedding, dims, provider, model_name, image_size = embedder.embed(
         image_url=None,
@@ -110,9 +92,9 @@ def test_embed_flow_offline_with_mocked_torch_and_transformers(monkeypatch):
     assert model_name == "ViT-L-14"
     assert image_size == 224
     assert dims == 768
-    assert embedding[:3] == [1.0, 2.0, 3.0]
+    # Normalized above the backend, in numpy.
+    assert embedding[:3] == pytest.approx([v / 14 ** 0.5 for v in (1.0, 2.0, 3.0)])
     assert len(embedding) == 768
-    assert calls["normalize"] == 1
 
 
 def test_embed_cleanup_runs_on_configured_cadence(monkeypatch):
@@ -128,7 +110,7 @@ def test_embed_cleanup_runs_on_configured_cadence(monkeypatch):
         settings=Settings(allow_remote_urls=False, embed_cleanup_every_n=2, embed_cache_size=0)
     )
 
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (FakeModel(), FakeProcessor(), "cpu"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (TorchBackend(FakeModel(), "cpu"), FakeProcessor(), "cpu"))
     monkeypatch.setattr("image_embedder.memory.cleanup_gpu_memory", _cleanup)
 
     for _ in range(3):
@@ -154,7 +136,7 @@ def test_embed_cleanup_disabled_by_default(monkeypatch):
 
     embedder = ImageEmbedder(settings=Settings(allow_remote_urls=False))
 
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (FakeModel(), FakeProcessor(), "cpu"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (TorchBackend(FakeModel(), "cpu"), FakeProcessor(), "cpu"))
     monkeypatch.setattr("image_embedder.memory.cleanup_gpu_memory", _cleanup)
 
     embedder.embed(
@@ -112,12 +112,10 @@ def test_fetch_image_bytes_rejects_remote_urls_when_disabled(monkeypatch):
     embedder = ImageEmbedder(settings=settings)
 
     # Ensure we don't accidentally hit network if behavior regresses.
-    import requests
-
     def _boom(*args, **kwargs):
-        raise AssertionError("requests.get should not be called when remote URLs are disabled")
+        raise AssertionError("remote fetch should not happen when remote URLs are disabled")
 
-    monkeypatch.setattr(requests, "get", _boom)
+    monkeypatch.setattr(embedder._http_pool, "get", _boom)
 
     with pytest.raises(ValueError, match="Remote image URLs are disabled"):
         embedder._fetch_image_bytes("https://example.com/poster.jpg")
@@ -139,9 +137,7 @@ def test_fetch_image_bytes_enforces_max_size_via_content_length(monkeypatch):
         def close(self):
             return None
 
-    import requests
-
-    monkeypatch.setattr(requests, "get", lambda *a, **k: FakeResponse())
+    monkeypatch.setattr(embedder._http_pool, "get", lambda *a, **k: FakeResponse())
     monkeypatch.setattr(embedder, "_validate_remote_url", lambda *_a, **_k: None)
 
     with pytest.raises(ValueError, match="Image payload exceeds maximum size"):
@@ -165,9 +161,7 @@ def test_fetch_image_bytes_enforces_max_size_via_actual_bytes(monkeypatch):
         def close(self):
             return None
 
-    import requests
-
-    monkeypatch.setattr(requests, "get", lambda *a, **k: FakeResponse())
+    monkeypatch.setattr(embedder._http_pool, "get", lambda *a, **k: FakeResponse())
     monkeypatch.setattr(embedder, "_validate_remote_url", lambda *_a, **_k: None)
 
     with pytest.raises(ValueError, match="Image payload exceeds maximum size"):
@@ -9,6 +9,7 @@ from pathlib import Path
 import numpy as np
 import pytest
 
+from image_embedder.backends import OpenVinoBackend
 from image_embedder.config import Settings
 from image_embedder.embedder import BatchItem, EmbeddingLRUCache, ImageEmbedder, MODEL_CATALOG
 
@@ -164,14 +165,19 @@ def test_get_cache_info_returns_none_when_disabled():
 
 
 def test_load_model_routes_openvino_to_openvino_loader(monkeypatch):
+    _install_fake_openvino_transformers(monkeypatch)
     embedder = ImageEmbedder(settings=Settings(device="openvino:gpu"))
     spec = next(iter(MODEL_CATALOG.values()))
     expected = object()
 
     monkeypatch.setattr(embedder, "_resolve_device", lambda: "ov:GPU")
-    monkeypatch.setattr(embedder, "_load_model_openvino", lambda s, device: expected if (s, device) == (spec, "ov:GPU") else None)
+    monkeypatch.setattr(
+        OpenVinoBackend,
+        "load",
+        classmethod(lambda cls, s, device, settings: expected if (s, device, settings) == (spec, "ov:GPU", embedder.settings) else None),
+    )
 
-    assert embedder._load_model(spec) is expected
+    assert embedder._load_model(spec)[0] is expected
 
 
 def test_load_model_openvino_exports_model_when_cache_missing(monkeypatch, tmp_path):
@@ -186,8 +192,9 @@ def test_load_model_openvino_exports_model_when_cache_missing(monkeypatch, tmp_p
 
     embedder = ImageEmbedder(settings=Settings())
     spec = next(iter(MODEL_CATALOG.values()))
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "ov:GPU")
 
-    loaded = embedder._load_model_openvino(spec, "ov:GPU")
+    loaded = embedder._load_model(spec)
 
     xml_path = tmp_path / spec.name.replace("/", "_") / "model.xml"
     assert xml_path.exists()
@@ -195,7 +202,8 @@ def test_load_model_openvino_exports_model_when_cache_missing(monkeypatch, tmp_p
     assert len(state["convert_calls"]) == 1
     assert state["save_calls"] == [("converted-model", str(xml_path))]
     assert state["compile_calls"] == [("converted-model", "GPU")]
-    assert loaded == ({"compiled_model": "converted-model", "device": "GPU"}, loaded[1], "ov:GPU")
+    assert loaded[0].compiled == {"compiled_model": "converted-model", "device": "GPU"}
+    assert loaded[2] == loaded[0].device == "ov:GPU"
 
 
 def test_load_model_openvino_uses_cached_ir_when_present(monkeypatch, tmp_path):
@@ -215,13 +223,15 @@ def test_load_model_openvino_uses_cached_ir_when_present(monkeypatch, tmp_path):
     xml_path.write_text("<xml/>", encoding="utf-8")
 
     embedder = ImageEmbedder(settings=Settings())
-    loaded = embedder._load_model_openvino(spec, "ov:CPU")
+    monkeypatch.setattr(embedder, "_resolve_device", lambda: "ov:CPU")
+    loaded = embedder._load_model(spec)
 
     assert calls == {"torch_model": 0, "processor": 1}
     assert state["convert_calls"] == []
     assert state["read_calls"] == [str(xml_path)]
     assert state["compile_calls"] == [(f"read:{xml_path}", "CPU")]
-    assert loaded == ({"compiled_model": f"read:{xml_path}", "device": "CPU"}, loaded[1], "ov:CPU")
+    assert loaded[0].compiled == {"compiled_model": f"read:{xml_path}", "device": "CPU"}
+    assert loaded[2] == loaded[0].device == "ov:CPU"
 
 
 def test_embed_openvino_path_normalizes_and_uses_cache(monkeypatch):
@@ -234,7 +244,7 @@ def test_embed_openvino_path_normalizes_and_uses_cache(monkeypatch):
         return [_VEC.copy()]
 
     embedder = ImageEmbedder(settings=Settings(embed_cache_size=8))
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (_model, processor, "ov:GPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:GPU"), processor, "ov:GPU"))
     monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda *_a, **_k: b"payload-a")
     monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data: object())
 
@@ -294,7 +304,7 @@ def test_embed_cached_mutation_does_not_poison_future_hits(monkeypatch):
         return [_VEC.copy()]
 
     embedder = ImageEmbedder(settings=Settings(embed_cache_size=8))
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (_model, processor, "ov:GPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:GPU"), processor, "ov:GPU"))
     monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda *_a, **_k: b"payload-a")
     monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data: object())
 
@@ -406,7 +416,7 @@ def test_embed_batch_openvino_mixed_cache_errors_and_cleanup(monkeypatch):
         BatchItem(None, "good-raw", False),
     ]
 
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (_model, processor, "ov:GPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:GPU"), processor, "ov:GPU"))
     monkeypatch.setattr(embedder, "_resolve_image_bytes", _resolve_image_bytes)
     monkeypatch.setattr(embedder, "_image_from_bytes", _image_from_bytes)
     monkeypatch.setattr("image_embedder.memory.cleanup_gpu_memory", lambda device: cleanup_calls.append(device))
@@ -452,7 +462,7 @@ def test_embed_remote_url_cache_keys_follow_fetched_bytes(monkeypatch):
 
     embedder = ImageEmbedder(settings=Settings(embed_cache_size=8))
     monkeypatch.setattr(embedder, "_fetch_image_bytes", _fetch_image_bytes)
-    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (_model, processor, "ov:GPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:GPU"), processor, "ov:GPU"))
     monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data: object())
 
     first = embedder.embed(
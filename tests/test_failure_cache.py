@@ -0,0 +1,95 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+import requests
+
+from image_embedder import failure_cache
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+
+
+def _failing_pool(monkeypatch, embedder, exc):
+    calls = []
+
+    def _get(url, *_a, **_k):
+        calls.append(url)
+        raise exc
+
+    monkeypatch.setattr(embedder._http_pool, "get", _get)
+    monkeypatch.setattr(embedder, "_validate_remote_url", lambda _url: None)
+    return calls
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def test_fetch_failure_is_replayed_as_same_400(monkeypatch):
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True))
+    calls = _failing_pool(monkeypatch, embedder, _http_error(404))
+    url = "https://image.tmdb.org/t/p/w500/missing.jpg"
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="Remote image request failed with HTTP 404"):
+            embedder._fetch_image_bytes(url)
+
+    assert calls == [url]
+    info = embedder.get_failure_cache_info()
+    assert info["hits"] == 2
+    assert info["stored"] == {"http": 1, "transient": 0, "decode": 0}
+
+
+def test_transient_failures_use_the_short_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(failure_cache.time, "monotonic", lambda: now[0])
+    embedder = ImageEmbedder(
+        settings=Settings(allow_remote_urls=True, failure_ttl_transient_seconds=5, failure_ttl_http_seconds=600)
+    )
+    calls = _failing_pool(monkeypatch, embedder, requests.Timeout("read timed out"))
+    url = "https://image.tmdb.org/t/p/w500/slow.jpg"
+
+    with pytest.raises(ValueError, match="Timed out fetching remote image"):
+        embedder._fetch_image_bytes(url)
+    now[0] += 4
+    with pytest.raises(ValueError, match="Timed out"):
+        embedder._fetch_image_bytes(url)
+    assert len(calls) == 1
+
+    now[0] += 2
+    with pytest.raises(ValueError, match="Timed out"):
+        embedder._fetch_image_bytes(url)
+    assert len(calls) == 2
+    assert failure_cache.kind_for_status(429) == "transient"
+    assert failure_cache.kind_for_status(503) == "transient"
+
+
+def test_decode_failure_is_keyed_by_content(monkeypatch):
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0))
+    spec = embedder.resolve_model(None)
+    broken = b"definitely-not-an-image"
+
+    with pytest.raises(ValueError, match="Unable to decode image bytes"):
+        embedder._decode_image(broken, spec.image_size)
+
+    # Any later request carrying the same bytes fails in the I/O stage.
+    monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data: pytest.fail("decode retried"))
+    with pytest.raises(ValueError, match="Unable to decode image bytes"):
+        embedder._prepare_bytes(spec, spec.image_size, True, broken)
+    assert embedder._prepare_bytes(spec, spec.image_size, True, b"other-bytes").image_bytes == b"other-bytes"
+    assert embedder.get_failure_cache_info()["stored"]["decode"] == 1
+
+
+def test_failure_cache_can_be_disabled(monkeypatch):
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True, failure_cache_size=0))
+    calls = _failing_pool(monkeypatch, embedder, requests.ConnectionError("refused"))
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Unable to fetch remote image"):
+            embedder._fetch_image_bytes("https://image.tmdb.org/t/p/w500/x.jpg")
+
+    assert len(calls) == 2
+    assert embedder.get_failure_cache_info() is None
@@ -5,8 +5,11 @@
 import pytest
 from unittest.mock import patch, MagicMock
 
+from fastapi.testclient import TestClient
+
 from image_embedder.config import Settings
 from image_embedder.embedder import ImageEmbedder, MODEL_CATALOG
+from image_embedder.main import create_app
 
 
 def test_get_device_info_cpu():
@@ -62,3 +65,16 @@ def test_is_default_model_loaded_true_after_direct_load():
     embedder._models["ViT-L-14"] = (mock_model, mock_processor, "cpu")
         
     assert embedder.is_default_model_loaded() is True
+
+
+def test_health_passes_backend_specific_device_keys_through(monkeypatch):
+    embedder = ImageEmbedder(settings=Settings(warmup_on_startup=False, require_api_key=False))
+    monkeypatch.setattr(
+        embedder,
+        "get_device_info",
+        lambda: {"type": "openvino", "ov_device": "GPU", "performance_hint": "THROUGHPUT", "infer_requests": {}},
+    )
+    client = TestClient(create_app(embedder=embedder, settings=embedder.settings))
+
+    device = client.get("/health").json()["device"]
+    assert device == {"type": "openvino", "name": None, "ov_device": "GPU", "performance_hint": "THROUGHPUT", "infer_requests": {}}
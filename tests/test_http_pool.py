@@ -0,0 +1,255 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+from image_embedder.http_pool import ImageHTTPPool
+
+
+class _PosterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    etag = '"v1"'
+    etag_requests = 0
+
+    def do_GET(self):
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/poster.jpg")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/evil-redirect":
+            self.send_response(302)
+            self.send_header("Location", "http://internal.test/secret")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/etag-poster.jpg":
+            type(self).etag_requests += 1
+            if self.headers.get("If-None-Match") == type(self).etag:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = type(self).etag.encode()
+            self.send_response(200)
+            self.send_header("ETag", type(self).etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        body = b"poster-bytes"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def poster_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PosterHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _resolver(calls):
+    def _resolve(url):
+        calls.append(url)
+        if "internal.test" in url:
+            raise ValueError("Remote image host resolves to a private address")
+        # "images.test" does not exist in DNS; only the pin makes it reachable.
+        return ["127.0.0.1"]
+
+    return _resolve
+
+
+def test_pool_pins_connections_and_reuses_them(poster_server):
+    pool = ImageHTTPPool(pool_hosts=2, pool_maxsize=2)
+    url = f"http://images.test:{poster_server}/poster.jpg"
+
+    for _ in range(3):
+        response = pool.get(url, _resolver([]), timeout=5)
+        assert response.content == b"poster-bytes"
+        response.close()
+
+    info = pool.info()
+    assert info["requests"] == 3
+    assert info["connections_opened"] == 1
+    assert info["pool_hits"] == 2
+    assert info["pool_misses"] == 1
+    pool.close()
+
+
+def test_pool_validates_every_redirect_hop(poster_server):
+    pool = ImageHTTPPool()
+    calls = []
+
+    response = pool.get(f"http://images.test:{poster_server}/redirect", _resolver(calls), timeout=5)
+    assert response.content == b"poster-bytes"
+    assert [c.rsplit("/", 1)[1] for c in calls] == ["redirect", "poster.jpg"]
+    assert pool.info()["redirects"] == 1
+
+    with pytest.raises(ValueError, match="private address"):
+        pool.get(f"http://images.test:{poster_server}/evil-redirect", _resolver([]), timeout=5)
+    pool.close()
+
+
+def test_validate_remote_url_returns_public_addresses(monkeypatch):
+    import socket
+
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True))
+    monkeypatch.setattr(
+        socket,
+        "getaddrinfo",
+        lambda *a, **k: [(None, None, None, None, ("1.2.3.4", 0)), (None, None, None, None, ("1.2.3.4", 0)),
+                         (None, None, None, None, ("5.6.7.8", 0))],
+    )
+
+    assert embedder._validate_remote_url("https://image.tmdb.org/x.png") == ["1.2.3.4", "5.6.7.8"]
+    assert embedder._validate_remote_url("https://1.2.3.4/x.png") == ["1.2.3.4"]
+    assert embedder.get_http_info()["requests"] == 0
+
+
+def _counting_getaddrinfo(monkeypatch, answers):
+    import socket
+
+    calls = []
+
+    def _getaddrinfo(host, *_a, **_k):
+        calls.append(host)
+        answer = answers[host]
+        if answer is None:
+            raise socket.gaierror("unresolvable")
+        return [(None, None, None, None, (ip, 0)) for ip in answer]
+
+    monkeypatch.setattr(socket, "getaddrinfo", _getaddrinfo)
+    return calls
+
+
+def test_validate_remote_url_caches_resolutions_and_rejections(monkeypatch):
+    calls = _counting_getaddrinfo(
+        monkeypatch, {"image.tmdb.org": ["1.2.3.4"], "gone.example": None, "rebind.example": ["10.0.0.5"]}
+    )
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True))
+
+    for _ in range(3):
+        assert embedder._validate_remote_url("https://image.tmdb.org/a.png") == ["1.2.3.4"]
+    for host, message in (("gone.example", "Unable to resolve"), ("rebind.example", "private address")):
+        for _ in range(2):
+            with pytest.raises(ValueError, match=message):
+                embedder._validate_remote_url(f"https://{host}/a.png")
+
+    assert calls == ["image.tmdb.org", "gone.example", "rebind.example"]
+    dns = embedder.get_http_info()["dns"]
+    assert (dns["hits"], dns["negative_hits"], dns["misses"]) == (2, 2, 3)
+
+
+def test_host_cache_expires_entries_and_caps_ttl(monkeypatch):
+    from image_embedder import dns_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(dns_cache.time, "monotonic", lambda: now[0])
+    cache = dns_cache.HostResolutionCache(maxsize=2, ttl_seconds=86400, negative_ttl_seconds=5)
+    assert cache.info()["ttl_seconds"] == dns_cache.MAX_TTL_SECONDS
+
+    cache.put("a.example", 443, ["1.1.1.1"])
+    cache.put_error("b.example", 443, "Remote image host resolves to a private address")
+    now[0] += 6
+    assert cache.lookup("b.example", 443) is None  # negative entry expired
+    assert cache.lookup("a.example", 443) == ["1.1.1.1"]
+    now[0] += dns_cache.MAX_TTL_SECONDS
+    assert cache.lookup("a.example", 443) is None
+
+    for i in range(3):
+        cache.put(f"h{i}.example", 443, ["1.1.1.1"])
+    assert cache.info()["size"] == 2
+
+
+def test_dns_cache_can_be_disabled(monkeypatch):
+    calls = _counting_getaddrinfo(monkeypatch, {"image.tmdb.org": ["1.2.3.4"]})
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True, dns_cache_size=0))
+
+    embedder._validate_remote_url("https://image.tmdb.org/a.png")
+    embedder._validate_remote_url("https://image.tmdb.org/a.png")
+
+    assert len(calls) == 2
+    assert embedder.get_http_info()["dns"] is None
+
+
+def test_url_cache_revalidates_with_conditional_get(monkeypatch, poster_server):
+    from image_embedder.embedder import EmbedResult
+
+    monkeypatch.setattr(_PosterHandler, "etag", '"v1"')
+    monkeypatch.setattr(_PosterHandler, "etag_requests", 0)
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True))
+    monkeypatch.setattr(embedder, "_validate_remote_url", lambda _url: ["127.0.0.1"])
+    url = f"http://images.test:{poster_server}/etag-poster.jpg"
+
+    first = embedder.prepare(url, None, None, True, None)
+    assert first.result is None and first.image_bytes == b'"v1"'
+    cached: EmbedResult = ([0.5, 0.5], 2, "cpu", first.spec.name, first.target_size)
+    embedder._cache_put(first.cache_key, cached)
+
+    # 304: the cached embedding is reused without a body.
+    second = embedder.prepare(url, None, None, True, None)
+    assert second.result == cached and second.cache_key == first.cache_key
+    assert second.image_bytes == b""
+
+    # Content changed upstream: the new bytes are prepared and the validators updated.
+    monkeypatch.setattr(_PosterHandler, "etag", '"v2"')
+    third = embedder.prepare(url, None, None, True, None)
+    assert third.result is None and third.image_bytes == b'"v2"'
+
+    assert _PosterHandler.etag_requests == 3
+    info = embedder.get_http_info()["url_cache"]
+    assert (info["size"], info["not_modified"], info["changed"]) == (1, 1, 1)
+    embedder.close()
+
+
+def test_url_cache_records_validators_without_rehashing_the_body(monkeypatch, poster_server):
+    from image_embedder.cache import EmbeddingLRUCache
+
+    monkeypatch.setattr(_PosterHandler, "etag", '"v1"')
+    hashed = []
+    digest = EmbeddingLRUCache.content_digest
+    monkeypatch.setattr(
+        EmbeddingLRUCache, "content_digest", staticmethod(lambda data: hashed.append(data) or digest(data))
+    )
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True))
+    monkeypatch.setattr(embedder, "_validate_remote_url", lambda _url: ["127.0.0.1"])
+    url = f"http://images.test:{poster_server}/etag-poster.jpg"
+
+    prepared = embedder.prepare(url, None, None, True, None)
+
+    assert hashed == [b'"v1"']
+    assert embedder._url_cache.get(url).digest == prepared.digest == digest(b'"v1"')
+    embedder.close()
+
+
+def test_pool_refuses_connections_without_a_pin_and_keeps_the_hostname(poster_server):
+    pool = ImageHTTPPool()
+    url = f"http://images.test:{poster_server}/poster.jpg"
+
+    # Outside pool.get() there is no validated address, so urllib3 must not fall back to DNS.
+    with pytest.raises(requests.ConnectionError, match="no validated address"):
+        pool._session.get(url, timeout=5)
+
+    response = pool.get(url, _resolver([]), timeout=5)
+    # SNI and certificate checks read conn.host, which must stay the hostname.
+    assert response.raw.connection.host == "images.test"
+    assert response.content == b"poster-bytes"
+    response.close()
+    pool.close()
@@ -0,0 +1,85 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import base64
+import hashlib
+import io
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from image_embedder.cache import EmbeddingLRUCache
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+from image_embedder.main import create_app
+
+
+def _unit(seed: int, dims: int = 768) -> np.ndarray:
+    vec = np.random.default_rng(seed).standard_normal(dims).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _manifest(records, model="ViT-L-14", normalize=True, **header) -> bytes:
+    lines = [json.dumps({"model": model, "image_size": 224, "normalize": normalize, **header})]
+    lines += [json.dumps(record) for record in records]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _embedder(**overrides) -> ImageEmbedder:
+    return ImageEmbedder(settings=Settings(**{"embed_cache_size": 100, **overrides}))
+
+
+def test_manifest_ingest_loads_valid_rows_and_skips_bad_ones():
+    digest_a = hashlib.sha256(b"poster-a").hexdigest()
+    digest_b = hashlib.sha256(b"poster-b").hexdigest()
+    vec_a, vec_b = _unit(1), _unit(2)
+    nan = _unit(3)
+    nan[5] = np.nan
+    data = _manifest([
+        {"digest": digest_a, "embedding": vec_a.tolist()},
+        {"digest": digest_b, "embedding_b64": base64.b64encode(vec_b.astype("<f4").tobytes()).decode()},
+        {"digest": "not-hex", "embedding": vec_a.tolist()},
+        {"digest": digest_a, "embedding": [0.1] * 512},  # wrong dims
+        {"digest": digest_b, "embedding": nan.tolist()},  # non-finite
+        {"digest": digest_b, "embedding": (vec_a * 2).tolist()},  # not unit norm
+        "garbage",
+    ])
+    embedder = _embedder()
+
+    assert embedder.ingest_manifest(io.BytesIO(data)) == {"imported": 2, "skipped": 5}
+
+    hit = embedder._cache_get(EmbeddingLRUCache.make_key(b"poster-b", "ViT-L-14", 224, True))
+    assert hit is not None
+    np.testing.assert_array_equal(np.asarray(hit[0], dtype=np.float32), vec_b)
+    assert hit[1:] == (768, "local", "ViT-L-14", 224)
+    assert embedder._cache_get(EmbeddingLRUCache.make_key(b"poster-a", "ViT-L-14", 224, False)) is None
+
+
+def test_manifest_header_must_match_catalog_and_hash():
+    embedder = _embedder()
+
+    with pytest.raises(ValueError, match="not in the model catalog"):
+        embedder.ingest_manifest(io.BytesIO(_manifest([], model="RN50")))
+    with pytest.raises(ValueError, match="hash blake2b is not supported"):
+        embedder.ingest_manifest(io.BytesIO(_manifest([], hash="blake2b")))
+    with pytest.raises(ValueError, match="header"):
+        embedder.ingest_manifest(io.BytesIO(b'{"digest": "00"}\n'))
+    for normalize in ("false", 0, None):
+        with pytest.raises(ValueError, match="Invalid manifest header"):
+            embedder.ingest_manifest(io.BytesIO(_manifest([], normalize=normalize)))
+
+
+def test_admin_ingest_endpoint_requires_auth():
+    settings = Settings(embed_cache_size=100, warmup_on_startup=False)
+    settings.service_api_key = "secret-key"
+    client = TestClient(create_app(settings=settings), raise_server_exceptions=False)
+    data = _manifest([{"digest": hashlib.sha256(b"p").hexdigest(), "embedding": _unit(5).tolist()}])
+
+    assert client.post("/admin/cache/ingest", content=data).status_code == 401
+    ok = client.post("/admin/cache/ingest", content=data, headers={"X-Api-Key": "secret-key"})
+    assert ok.json() == {"imported": 1, "skipped": 0}
+    bad = client.post("/admin/cache/ingest", content=b"{}\n", headers={"X-Api-Key": "secret-key"})
+    assert bad.status_code == 400
@@ -22,6 +22,7 @@ import pytest
 from asgi_lifespan import LifespanManager
 from fastapi.testclient import TestClient
 
+from image_embedder.backends import OpenVinoBackend, TorchBackend
 from image_embedder.config import Settings
 from image_embedder.embedder import BatchItem, ImageEmbedder, MODEL_CATALOG
 from image_embedder.main import create_app
@@ -167,7 +168,7 @@ def test_embed_openvino_wrong_output_shape_single_raises(monkeypatch):
         return [np.ones((1, 196, spec.dims), dtype=np.float32)]
 
     embedder = ImageEmbedder(settings=Settings())
-    monkeypatch.setattr(embedder, "_load_model", lambda _s: (_model_3d, processor, "ov:CPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _s: (OpenVinoBackend(_model_3d, "ov:CPU"), processor, "ov:CPU"))
     monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda *_a, **_k: b"img")
     monkeypatch.setattr(embedder, "_image_from_bytes", lambda _d: object())
 
@@ -186,7 +187,7 @@ def test_embed_openvino_correct_shape_single_succeeds(monkeypatch):
         return [np.ones((1, spec.dims), dtype=np.float32)]
 
     embedder = ImageEmbedder(settings=Settings())
-    monkeypatch.setattr(embedder, "_load_model", lambda _s: (_model_ok, processor, "ov:CPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _s: (OpenVinoBackend(_model_ok, "ov:CPU"), processor, "ov:CPU"))
     monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda *_a, **_k: b"img")
     monkeypatch.setattr(embedder, "_image_from_bytes", lambda _d: object())
 
@@ -208,7 +209,7 @@ def test_embed_batch_openvino_wrong_output_shape_raises(monkeypatch):
         return [np.ones((2, 2), dtype=np.float32)]
 
     embedder = ImageEmbedder(settings=Settings())
-    monkeypatch.setattr(embedder, "_load_model", lambda _s: (_model_wrong, processor, "ov:CPU"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _s: (OpenVinoBackend(_model_wrong, "ov:CPU"), processor, "ov:CPU"))
 
     items = [BatchItem(None, "AA==", False), BatchItem(None, "BB==", False)]
     monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda _u, b64: b64.encode())
@@ -243,7 +244,7 @@ class TestImageSizeFreeze:
             proc = types.SimpleNamespace(
                 __call__=lambda *a, **kw: {"pixel_values": _FakePtInput()}
             )
-            return (_M(), proc, "cpu")
+            return (TorchBackend(_M(), "cpu"), proc, "cpu")
 
         monkeypatch.setattr(self.embedder, "_load_model", _fake_load)
         # Should not raise; image_size=None maps to spec default
@@ -388,7 +389,7 @@ def test_embed_route_wrong_model_output_dims_returns_400(monkeypatch):
 
     settings = Settings(allow_remote_urls=False)
     real_embedder = ImageEmbedder(settings=settings)
-    monkeypatch.setattr(real_embedder, "_load_model", lambda _s: (_model_wrong_dims, processor, "ov:CPU"))
+    monkeypatch.setattr(real_embedder, "_load_model", lambda _s: (OpenVinoBackend(_model_wrong_dims, "ov:CPU"), processor, "ov:CPU"))
     monkeypatch.setattr(real_embedder, "_resolve_image_bytes", lambda *_a, **_k: b"img")
     monkeypatch.setattr(real_embedder, "_image_from_bytes", lambda _d: object())
 
@@ -0,0 +1,110 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from image_embedder.backends import OpenVinoBackend
+from image_embedder.cache import EmbeddingLRUCache
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder, PreparedEmbed
+from image_embedder.pixel_cache import PixelTensorCache
+
+
+def _png(seed=0):
+    rng = np.random.default_rng(seed)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, size=(450, 300, 3), dtype=np.uint8), "RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _embedder(monkeypatch, **overrides):
+    seen = []
+
+    def _load_model(spec):
+        def _model(inputs):
+            seen.append(inputs["pixel_values"].copy())
+            return [np.ones((inputs["pixel_values"].shape[0], spec.dims), dtype=np.float32)]
+
+        return OpenVinoBackend(_model, "ov:CPU"), None, "ov:CPU"
+
+    settings = Settings(embed_cache_size=0, preprocess_engine="native", pixel_cache_max_mb=16, **overrides)
+    embedder = ImageEmbedder(settings=settings)
+    decodes = []
+    real = embedder._image_from_bytes
+    monkeypatch.setattr(embedder, "_image_from_bytes", lambda data, *a: decodes.append(data) or real(data, *a))
+    monkeypatch.setattr(embedder, "_load_model", _load_model)
+    return embedder, decodes, seen
+
+
+def test_second_model_reuses_preprocessed_pixels(monkeypatch):
+    embedder, decodes, seen = _embedder(monkeypatch)
+    data = _png()
+
+    for name in ("ViT-L-14", "ViT-B-16"):
+        spec = embedder.resolve_model(name)
+        embedder.embed_prepared(embedder._prepare_bytes(spec, 224, True, data))
+
+    assert decodes == [data]
+    np.testing.assert_array_equal(seen[0], seen[1])
+    info = embedder.get_pixel_cache_info()
+    assert (info["size"], info["hits"], info["misses"]) == (1, 1, 1)
+    assert info["bytes"] == 3 * 224 * 224 * 4
+
+
+def test_batch_decodes_each_image_once_and_keeps_errors(monkeypatch):
+    embedder, decodes, seen = _embedder(monkeypatch)
+    spec = embedder.resolve_model("ViT-L-14")
+    a, b = _png(1), _png(2)
+    payloads = [
+        PreparedEmbed(spec, 224, True, a),
+        PreparedEmbed(spec, 224, False, a),
+        PreparedEmbed(spec, 224, True, b"broken"),
+        PreparedEmbed(spec, 224, True, b),
+    ]
+
+    outcomes = embedder._embed_batch_uncached(spec, 224, payloads)
+    again = embedder._embed_batch_uncached(spec, 224, [PreparedEmbed(spec, 224, True, b)])
+
+    assert decodes == [a, b"broken", b]
+    assert isinstance(outcomes[2], ValueError)
+    assert [len(batch) for batch in seen] == [3, 1]
+    np.testing.assert_array_equal(seen[0][2], seen[1][0])
+    assert again[0][1] == 768
+
+
+def test_uncached_embed_hashes_the_payload_once(monkeypatch):
+    embedder, decodes, _ = _embedder(monkeypatch)
+    hashed = []
+    real = EmbeddingLRUCache.content_digest
+    monkeypatch.setattr(EmbeddingLRUCache, "content_digest", staticmethod(lambda data: hashed.append(data) or real(data)))
+    data = _png(3)
+
+    embedder.embed(None, base64.b64encode(data).decode(), "ViT-L-14", True, 224)
+
+    assert hashed == [data]
+    assert decodes == [data]
+
+
+def test_recipe_change_misses_the_cache(monkeypatch):
+    draft, _, _ = _embedder(monkeypatch, jpeg_draft_decode=True)
+    full, _, _ = _embedder(monkeypatch)
+
+    assert draft._pixel_recipe != full._pixel_recipe
+
+
+def test_pixel_cache_evicts_by_bytes_and_trims():
+    row = np.zeros((3, 8, 8), dtype=np.float32)
+    cache = PixelTensorCache(max_bytes=2 * row.nbytes)
+    for i in range(3):
+        cache.put((str(i), 8, "clip"), row)
+
+    assert cache.get(("0", 8, "clip")) is None
+    stored = cache.get(("2", 8, "clip"))
+    assert stored is not None and not stored.flags.writeable
+    assert cache.trim(0.5) == row.nbytes
+    assert cache.info()["size"] == 1
@@ -0,0 +1,125 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_embedder.backends import OpenVinoBackend
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+from image_embedder.preprocess import CLIP_MEAN, CLIP_STD, ClipPreprocessor
+
+# portrait poster, landscape backdrop, square, already at target size, odd crop offsets
+_SHAPES = [(300, 450), (1280, 720), (512, 512), (224, 224), (225, 333)]
+
+
+def _image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8), "RGB")
+
+
+def _reference(image, size):
+    """Straightforward float64 CLIP preprocessing, one step at a time."""
+    width, height = image.size
+    if width <= height:
+        new_w, new_h = size, int(size * height / width)
+    else:
+        new_w, new_h = int(size * width / height), size
+    pixels = np.asarray(image.resize((new_w, new_h), resample=Image.BICUBIC), dtype=np.float64)
+    top, left = (new_h - size) // 2, (new_w - size) // 2
+    pixels = pixels[top:top + size, left:left + size] / 255.0
+    pixels = (pixels - np.array(CLIP_MEAN)) / np.array(CLIP_STD)
+    return pixels.transpose(2, 0, 1)
+
+
+def test_native_preprocessing_matches_reference():
+    images = [_image(w, h, seed=i) for i, (w, h) in enumerate(_SHAPES)]
+
+    out = ClipPreprocessor()(images, 224)
+
+    assert out.shape == (len(images), 3, 224, 224)
+    assert out.dtype == np.float32
+    for i, image in enumerate(images):
+        np.testing.assert_allclose(out[i], _reference(image, 224), atol=1e-5)
+
+
+def test_native_preprocessing_matches_hf_processor():
+    transformers = pytest.importorskip("transformers")
+    processor = transformers.CLIPImageProcessor()  # OpenAI CLIP defaults, no download
+    images = [_image(w, h, seed=i) for i, (w, h) in enumerate(_SHAPES)]
+
+    expected = processor(images=images, return_tensors="np", size={"shortest_edge": 224})["pixel_values"]
+
+    np.testing.assert_allclose(ClipPreprocessor()(images, 224), expected, atol=1e-4)
+
+
+def test_native_preprocessing_reuses_batch_buffer():
+    pre = ClipPreprocessor()
+    first = pre([_image(300, 450)] * 4, 224)
+    second = pre([_image(300, 450)] * 2, 224)
+
+    assert second.shape[0] == 2
+    assert np.shares_memory(first, second)
+
+
+def test_openvino_path_uses_native_engine(monkeypatch):
+    seen = []
+
+    def _model(inputs):
+        seen.append(inputs["pixel_values"].shape)
+        return [np.ones((inputs["pixel_values"].shape[0], 768), dtype=np.float32)]
+
+    def _processor(**_kwargs):
+        raise AssertionError("CLIPProcessor should not be called with the native engine")
+
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, preprocess_engine="native"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:CPU"), _processor, "ov:CPU"))
+    monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda *_a, **_k: b"poster")
+    monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data: _image(300, 450))
+
+    embedding, dims, *_ = embedder.embed(None, "cG9zdGVy", "ViT-L-14", True, None)
+
+    assert dims == 768
+    assert seen == [(1, 3, 224, 224)]
+    assert np.linalg.norm(embedding) == pytest.approx(1.0)
+
+
+def test_unknown_preprocess_engine_is_rejected():
+    with pytest.raises(ValueError, match="IMAGE_PREPROCESS_ENGINE"):
+        ImageEmbedder(settings=Settings(preprocess_engine="fast"))
+
+
+def _jpeg(width, height):
+    import io
+
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    buf = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8), "RGB").save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def test_jpeg_draft_decode_scales_down_within_tolerance():
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=0))
+    data = _jpeg(2000, 3000)
+
+    full = embedder._image_from_bytes(data)
+    draft = embedder._image_from_bytes(data, 224)
+
+    assert full.size == (2000, 3000)
+    assert draft.size == (250, 375)  # 1/8 DCT scale; shortest edge still >= 224
+    assert embedder._image_from_bytes(_jpeg(300, 400), 224).size == (300, 400)  # 1/2 would undershoot
+    pre = ClipPreprocessor()
+    drift = np.abs(pre([full], 224).copy() - pre([draft], 224))
+    assert float(drift.mean()) < 0.02
+
+
+def test_jpeg_draft_decode_is_opt_in(monkeypatch):
+    calls = []
+    for enabled, expected in ((False, ()), (True, (224,))):
+        embedder = ImageEmbedder(settings=Settings(embed_cache_size=0, jpeg_draft_decode=enabled))
+        monkeypatch.setattr(embedder, "_image_from_bytes", lambda _data, *size: calls.append(size))
+        embedder._decode_image(b"jpeg", 224)
+        assert calls.pop() == expected
@@ -10,11 +10,15 @@ import httpx
 import pytest
 from asgi_lifespan import LifespanManager
 
+from image_embedder.backends import OpenVinoBackend
+from image_embedder.batch import BatchWindow, EmbedJob
+from image_embedder.embedder import DecodedBatch, EmbeddingLRUCache, ImageEmbedder
 from image_embedder.main import create_app
-from fakes import _no_auth_settings
+from image_embedder.queue import EmbedQueue, QueueFullError, QueueWaitTimeoutError
+from fakes import FakeEmbedder, _no_auth_settings
 
 
-class SlowEmbedder:
+class SlowEmbedder(FakeEmbedder):
     def __init__(self, delay_seconds: float, started_event: threading.Event | None = None):
         self._delay_seconds = delay_seconds
         self._started_event = started_event
@@ -52,7 +56,7 @@ class _Spec:
         self.image_size = image_size
 
 
-class BatchAwareEmbedder:
+class BatchAwareEmbedder(FakeEmbedder):
     def __init__(self):
         self.embed_calls = 0
         self.embed_batch_calls = 0
@@ -225,3 +229,320 @@ async def test_batch_window_disabled_uses_single_request_path():
     assert r.status_code == 200
     assert embedder.embed_batch_calls == 0
     assert embedder.embed_calls == 1
+
+
+def _staged_embedder(settings, fetch_delay: float = 0.0) -> ImageEmbedder:
+    """Real ImageEmbedder whose URL fetch sleeps and whose inference is stubbed."""
+    embedder = ImageEmbedder(settings=settings)
+    embedder.batch_payload_sizes = []
+
+    def _resolve(image_url, image_base64):
+        if image_url:
+            time.sleep(fetch_delay)
+            return image_url.encode("ascii")
+        return image_base64.encode("ascii")
+
+    def _batch_uncached(spec, target_size, payloads):
+        embedder.batch_payload_sizes.append(len(payloads))
+        return [([0.1, 0.2], 2, "local", spec.name, target_size) for _ in payloads]
+
+    embedder._resolve_image_bytes = _resolve
+    embedder._embed_uncached = lambda prepared: ([0.1, 0.2], 2, "local", prepared.spec.name, prepared.target_size)
+    embedder._embed_batch_uncached = _batch_uncached
+    # Pipelined batch windows split the same work into decode and forward stages.
+    embedder._decode_batch = lambda spec, size, payloads, own_buffer=False: DecodedBatch(
+        ("model", "processor", "cpu"), None, [None] * len(payloads)
+    )
+    embedder._forward_batch = lambda spec, size, payloads, decoded: _batch_uncached(spec, size, payloads)
+    return embedder
+
+
+@pytest.mark.anyio
+async def test_slow_image_fetch_does_not_hold_compute_slot():
+    settings = _no_auth_settings(
+        embed_concurrency=1, embed_max_queue=0, embed_max_wait_seconds=60, embed_cache_size=0
+    )
+    app = create_app(embedder=_staged_embedder(settings, fetch_delay=0.5), settings=settings)
+    queue = app.state.queue
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        slow = asyncio.create_task(
+            client.post("/embed-image", json={"image_url": "https://img.example/p.jpg", "model": "ViT-L-14"})
+        )
+        for _ in range(200):
+            if queue.stats().io_in_flight:
+                break
+            await asyncio.sleep(0.01)
+        stats = queue.stats()
+        assert stats.io_in_flight == 1
+        assert stats.in_flight == 0
+
+        # max_queue=0 would 429 if the slow fetch were holding the only compute slot.
+        t0 = time.perf_counter()
+        fast = await client.post("/embed-image", json={"image_base64": "AA==", "model": "ViT-L-14"})
+        dt = time.perf_counter() - t0
+        r_slow = await slow
+
+    assert fast.status_code == 200
+    assert dt < 0.4
+    assert r_slow.status_code == 200
+    assert "X-Queue-IO-Waiting" in fast.headers
+
+
+@pytest.mark.anyio
+async def test_cache_hit_never_takes_compute_slot():
+    settings = _no_auth_settings(embed_concurrency=1, embed_max_queue=0, embed_cache_size=8)
+    embedder = _staged_embedder(settings)
+    spec = embedder.resolve_model("ViT-L-14")
+    key = EmbeddingLRUCache.make_key(b"AA==", spec.name, spec.image_size, True)
+    embedder._cache_put(key, ([0.3, 0.4], 2, "local", spec.name, spec.image_size))
+    app = create_app(embedder=embedder, settings=settings)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await app.state.queue.acquire()  # occupy the only compute slot
+        try:
+            r = await client.post("/embed-image", json={"image_base64": "AA==", "model": "ViT-L-14"})
+            rb = await client.post("/embed-batch", json={"items": [{"image_base64": "AA=="}], "model": "ViT-L-14"})
+        finally:
+            await app.state.queue.release()
+
+    assert r.status_code == 200
+    assert r.json()["embedding"] == pytest.approx([0.3, 0.4])
+    assert rb.status_code == 200
+    assert rb.json()["succeeded"] == 1
+
+
+@pytest.mark.anyio
+async def test_batch_window_dispatches_prepared_jobs():
+    settings = _no_auth_settings(
+        embed_concurrency=1, embed_max_queue=10, embed_batch_window_ms=30, embed_batch_max_size=8
+    )
+    embedder = _staged_embedder(settings)
+    app = create_app(embedder=embedder, settings=settings)
+
+    async with LifespanManager(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def call(payload):
+                return await client.post("/embed-image", json={"image_base64": payload, "model": "ViT-L-14"})
+
+            r1, r2 = await asyncio.gather(call("AA=="), call("AQ=="))
+
+    assert r1.status_code == 200
+    assert r2.status_code == 200
+    assert embedder.batch_payload_sizes == [2]
+
+
+@pytest.mark.anyio
+async def test_run_io_reports_io_waiters_separately():
+    queue = EmbedQueue(concurrency=1, max_queue=1, max_wait_seconds=5, io_concurrency=1)
+    gate = threading.Event()
+
+    first = asyncio.create_task(queue.run_io(gate.wait, 5))
+    second = asyncio.create_task(queue.run_io(lambda: "done"))
+    for _ in range(200):
+        if queue.stats().io_waiting:
+            break
+        await asyncio.sleep(0.01)
+
+    stats = queue.stats()
+    assert (stats.io_in_flight, stats.io_waiting) == (1, 1)
+    assert (stats.in_flight, stats.waiting) == (0, 0)
+
+    gate.set()
+    assert await first is True
+    assert await second == "done"
+    assert queue.stats().io_in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_run_io_bounds_waiters_like_the_compute_stage():
+    queue = EmbedQueue(concurrency=1, max_queue=1, max_wait_seconds=0, io_concurrency=1)
+    gate = threading.Event()
+
+    first = asyncio.create_task(queue.run_io(gate.wait, 5))
+    await _wait_for(lambda: queue.stats().io_in_flight == 1)
+    with pytest.raises(QueueWaitTimeoutError):
+        await queue.run_io(lambda: "late")
+
+    queue._max_wait_seconds = 5
+    second = asyncio.create_task(queue.run_io(lambda: "queued"))
+    await _wait_for(lambda: queue.stats().io_waiting == 1)
+    with pytest.raises(QueueFullError, match="I/O queue full"):
+        await queue.run_io(lambda: "rejected")
+
+    gate.set()
+    assert await first is True
+    assert await second == "queued"
+
+
+def test_queue_rejects_non_positive_io_concurrency():
+    with pytest.raises(ValueError):
+        EmbedQueue(concurrency=1, max_queue=0, max_wait_seconds=0, io_concurrency=0)
+
+
+async def _wait_for(predicate, attempts: int = 300):
+    for _ in range(attempts):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.anyio
+async def test_batch_window_stages_next_batch_while_model_runs():
+    embedder = ImageEmbedder(settings=_no_auth_settings(embed_cache_size=0))
+    embedder._resolve_image_bytes = lambda image_url, image_base64: image_base64.encode("ascii")
+    forwarding = threading.Event()
+    release = threading.Event()
+    events = []
+
+    def _decode(spec, size, payloads, own_buffer=False):
+        events.append(("decode", payloads[0].image_bytes, forwarding.is_set()))
+        return DecodedBatch(("model", "processor", "cpu"), None, [None] * len(payloads))
+
+    def _forward(spec, size, payloads, decoded):
+        events.append(("forward", payloads[0].image_bytes))
+        forwarding.set()
+        release.wait(5)
+        return [([0.1, 0.2], 2, "local", spec.name, size) for _ in payloads]
+
+    embedder._decode_batch = _decode
+    embedder._forward_batch = _forward
+    queue = EmbedQueue(concurrency=1, max_queue=10, max_wait_seconds=10, io_concurrency=2)
+    window = BatchWindow(embedder, queue, batch_window_ms=1, batch_max_size=1, pipeline_depth=1)
+
+    def _job(payload):
+        prepared = embedder.prepare(None, payload, "ViT-L-14", True, None)
+        return EmbedJob(None, payload, "ViT-L-14", True, None, prepared=prepared)
+
+    await window.start()
+    try:
+        first = asyncio.create_task(window.submit(_job("AA==")))
+        await _wait_for(forwarding.is_set)
+        rest = [asyncio.create_task(window.submit(_job(p))) for p in ("AQ==", "Ag==")]
+        # Batch 2 is decoded into the second buffer; batch 3 waits for a free one.
+        await _wait_for(lambda: window.stats()["stage_blocked"] == 1)
+        stats = window.stats()
+        assert stats["infer"]["active"] == 1
+        assert stats["staged_batches"] == 1
+        assert stats["stage"]["batches"] == 2
+
+        release.set()
+        results = await asyncio.gather(first, *rest)
+    finally:
+        release.set()
+        await window.stop()
+
+    assert [r[0] for r in results] == [[0.1, 0.2]] * 3
+    assert events[:3] == [("decode", b"AA==", False), ("forward", b"AA=="), ("decode", b"AQ==", True)]
+    assert window.stats()["infer"]["batches"] == 3
+
+
+@pytest.mark.anyio
+async def test_batch_window_staging_skips_io_admission_and_waits_for_exclusive_lock():
+    embedder = ImageEmbedder(settings=_no_auth_settings(embed_cache_size=0))
+    embedder._resolve_image_bytes = lambda image_url, image_base64: image_base64.encode("ascii")
+    decodes = []
+
+    def _decode(spec, size, payloads, own_buffer=False):
+        decodes.append(own_buffer)
+        return DecodedBatch(("model", "processor", "cpu"), None, [None] * len(payloads))
+
+    embedder._decode_batch = _decode
+    embedder._forward_batch = lambda spec, size, payloads, decoded: [
+        ([0.1, 0.2], 2, "local", spec.name, size) for _ in payloads
+    ]
+    # No I/O waiting room, and the only I/O slot is taken.
+    queue = EmbedQueue(concurrency=1, max_queue=0, max_wait_seconds=5, io_concurrency=1)
+    window = BatchWindow(embedder, queue, batch_window_ms=1, batch_max_size=1, pipeline_depth=1)
+    gate = threading.Event()
+    busy = asyncio.create_task(queue.run_io(gate.wait, 5))
+    await _wait_for(lambda: queue.stats().io_in_flight == 1)
+
+    await queue.acquire_exclusive()
+    await window.start()
+    try:
+        prepared = embedder.prepare(None, "AA==", "ViT-L-14", True, None)
+        job = asyncio.create_task(window.submit(EmbedJob(None, "AA==", "ViT-L-14", True, None, prepared=prepared)))
+        await asyncio.sleep(0.05)
+        # A model update holds the lock: the collector waits instead of loading the model.
+        assert decodes == [] and window.stats()["stage"]["active"] == 1
+        await queue.release_exclusive()
+        result = await job
+    finally:
+        gate.set()
+        await window.stop()
+        await busy
+
+    assert result[0] == [0.1, 0.2]
+    assert decodes == [True]
+    assert window.stats()["stage"]["batches"] == 1
+
+
+@pytest.mark.anyio
+async def test_batch_window_decodes_under_the_slot_when_staging_fails():
+    embedder = ImageEmbedder(settings=_no_auth_settings(embed_cache_size=0))
+    embedder._resolve_image_bytes = lambda image_url, image_base64: image_base64.encode("ascii")
+    decodes = []
+
+    def _decode(spec, size, payloads, own_buffer=False):
+        decodes.append(own_buffer)
+        if own_buffer:
+            raise RuntimeError("staging broke")
+        return DecodedBatch(("model", "processor", "cpu"), None, [None] * len(payloads))
+
+    embedder._decode_batch = _decode
+    embedder._forward_batch = lambda spec, size, payloads, decoded: [
+        ([0.1, 0.2], 2, "local", spec.name, size) for _ in payloads
+    ]
+    queue = EmbedQueue(concurrency=1, max_queue=10, max_wait_seconds=10)
+    window = BatchWindow(embedder, queue, batch_window_ms=1, batch_max_size=2, pipeline_depth=1)
+
+    def _job(payload):
+        prepared = embedder.prepare(None, payload, "ViT-L-14", True, None)
+        return EmbedJob(None, payload, "ViT-L-14", True, None, prepared=prepared)
+
+    await window.start()
+    try:
+        results = await asyncio.gather(*(window.submit(_job(p)) for p in ("AA==", "AQ==")))
+    finally:
+        await window.stop()
+
+    assert [r[0] for r in results] == [[0.1, 0.2]] * 2
+    assert decodes == [True, False]
+
+
+def test_staged_batch_skips_keys_cached_while_waiting(monkeypatch):
+    import io
+
+    import numpy as np
+    from PIL import Image
+
+    def _png(seed):
+        rng = np.random.default_rng(seed)
+        buf = io.BytesIO()
+        Image.fromarray(rng.integers(0, 256, size=(40, 30, 3), dtype=np.uint8), "RGB").save(buf, format="PNG")
+        return buf.getvalue()
+
+    rows = []
+
+    def _model(inputs):
+        rows.append(inputs["pixel_values"].shape[0])
+        return [np.ones((inputs["pixel_values"].shape[0], 768), dtype=np.float32)]
+
+    embedder = ImageEmbedder(settings=_no_auth_settings(embed_cache_size=8, preprocess_engine="native"))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(_model, "ov:CPU"), None, "ov:CPU"))
+    spec = embedder.resolve_model("ViT-L-14")
+    prepared = [embedder._prepare_bytes(spec, 224, True, _png(seed)) for seed in range(3)]
+
+    staged = embedder.stage_prepared_batch(spec, 224, prepared)
+    # The batch ahead in the pipeline computed item 1 in the meantime.
+    embedder._cache_put(prepared[1].cache_key, ([0.5] * 768, 768, "local", spec.name, 224))
+    outcomes = embedder.embed_prepared_batch(spec, 224, prepared, staged=staged)
+
+    assert rows == [2]
+    assert outcomes[1][0][0] == 0.5
+    assert [o[1] for o in outcomes] == [768, 768, 768]
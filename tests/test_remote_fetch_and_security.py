@@ -79,10 +79,8 @@ def test_fetch_image_bytes_streaming_enforces_max_size(monkeypatch):
         def close(self):
             self.closed = True
 
-    import requests
-
     fake = FakeResponse()
-    monkeypatch.setattr(requests, "get", lambda *a, **k: fake)
+    monkeypatch.setattr(embedder._http_pool, "get", lambda *a, **k: fake)
 
     with pytest.raises(ValueError, match="Image payload exceeds maximum size"):
         embedder._fetch_image_bytes("https://image.tmdb.org/t/p/w500/x.png")
@@ -110,11 +108,90 @@ def test_fetch_image_bytes_returns_bytes_when_under_limit(monkeypatch):
         def close(self):
             self.closed = True
 
-    import requests
-
     fake = FakeResponse()
-    monkeypatch.setattr(requests, "get", lambda *a, **k: fake)
+    monkeypatch.setattr(embedder._http_pool, "get", lambda *a, **k: fake)
 
     data = embedder._fetch_image_bytes("https://image.tmdb.org/t/p/w500/x.png")
     assert data == b"abcd"
     assert fake.closed is True
+
+
+def _tracking_fetch(delay: float, failing: set[str]):
+    """Return a fake _fetch_image_bytes that sleeps and records peak concurrency."""
+    import threading
+    import time
+
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def _fetch(url):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        try:
+            time.sleep(delay)
+            if url in failing:
+                raise ValueError("Image payload exceeds maximum size")
+            return url.encode("ascii")
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    return _fetch, state
+
+
+def test_prepare_batch_fetches_concurrently_and_keeps_item_errors(monkeypatch):
+    import time
+
+    from image_embedder.embedder import BatchItem, PreparedEmbed
+
+    embedder = ImageEmbedder(
+        settings=Settings(allow_remote_urls=True, fetch_concurrency=16, batch_fetch_concurrency=3)
+    )
+    fetch, state = _tracking_fetch(0.15, failing={"https://img.example/2.png"})
+    monkeypatch.setattr(embedder, "_fetch_image_bytes", fetch)
+    spec = embedder.resolve_model("ViT-L-14")
+    items = [BatchItem(f"https://img.example/{i}.png", None, True) for i in range(6)]
+
+    t0 = time.perf_counter()
+    prepared = embedder.prepare_batch(spec, spec.image_size, items)
+    elapsed = time.perf_counter() - t0
+
+    assert state["peak"] == 3
+    assert elapsed < 0.6  # two waves of three, not six sequential fetches
+    assert isinstance(prepared[2], ValueError)
+    assert [p.image_bytes for i, p in enumerate(prepared) if i != 2] == [
+        f"https://img.example/{i}.png".encode("ascii") for i in (0, 1, 3, 4, 5)
+    ]
+    assert all(isinstance(p, PreparedEmbed) for i, p in enumerate(prepared) if i != 2)
+    embedder.close()
+
+
+def test_prepare_batch_respects_global_fetch_limit(monkeypatch):
+    from image_embedder.embedder import BatchItem
+
+    embedder = ImageEmbedder(
+        settings=Settings(allow_remote_urls=True, fetch_concurrency=2, batch_fetch_concurrency=8)
+    )
+    fetch, state = _tracking_fetch(0.05, failing=set())
+    monkeypatch.setattr(embedder, "_fetch_image_bytes", fetch)
+    spec = embedder.resolve_model("ViT-L-14")
+
+    embedder.prepare_batch(spec, spec.image_size, [BatchItem(f"https://img.example/{i}", None, True) for i in range(6)])
+
+    assert state["peak"] == 2
+    embedder.close()
+
+
+def test_prepare_batch_fetches_sequentially_when_disabled(monkeypatch):
+    from image_embedder.embedder import BatchItem
+
+    embedder = ImageEmbedder(settings=Settings(allow_remote_urls=True, fetch_concurrency=1))
+    fetch, state = _tracking_fetch(0.0, failing=set())
+    monkeypatch.setattr(embedder, "_fetch_image_bytes", fetch)
+    spec = embedder.resolve_model("ViT-L-14")
+
+    embedder.prepare_batch(spec, spec.image_size, [BatchItem(f"https://img.example/{i}", None, True) for i in range(3)])
+
+    assert embedder._fetch_pool is None
+    assert state["peak"] == 1
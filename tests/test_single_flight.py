@@ -0,0 +1,145 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+
+import numpy as np
+import pytest
+
+from image_embedder.backends import OpenVinoBackend
+from image_embedder.cache import SingleFlight
+from image_embedder.config import Settings
+from image_embedder.embedder import BatchItem, ImageEmbedder, MODEL_CATALOG
+
+SPEC = MODEL_CATALOG["ViT-L-14"]
+
+
+class _GatedOvModel:
+    """Fake compiled OpenVINO model that blocks until released and counts forward passes."""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, inputs):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        n = inputs["pixel_values"].shape[0]
+        return [np.full((n, SPEC.dims), 0.5, dtype=np.float32)]
+
+
+def _processor(images, return_tensors, size):
+    n = len(images) if isinstance(images, list) else 1
+    return {"pixel_values": np.zeros((n, 1), dtype=np.float32)}
+
+
+def _embedder(monkeypatch, model):
+    embedder = ImageEmbedder(settings=Settings(embed_cache_size=16))
+    monkeypatch.setattr(embedder, "_load_model", lambda _spec: (OpenVinoBackend(model, "ov:CPU"), _processor, "ov:CPU"))
+    monkeypatch.setattr(embedder, "_resolve_image_bytes", lambda _u, b64: b64.encode("ascii"))
+    monkeypatch.setattr(embedder, "_image_from_bytes", lambda data: object())
+    return embedder
+
+
+def test_single_flight_leader_result_reaches_followers():
+    flights = SingleFlight()
+    flight, leader = flights.begin("k")
+    follower, is_leader = flights.begin("k")
+    assert leader and not is_leader and follower is flight
+
+    flights.finish("k", flight, result=([1.0], 1, "local", "m", 224))
+
+    result = flights.wait(follower)
+    assert result == ([1.0], 1, "local", "m", 224)
+    assert result[0] is not flight.result[0]
+    assert flights.info() == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+
+def test_single_flight_propagates_leader_errors_and_times_out():
+    flights = SingleFlight()
+    flight, _ = flights.begin("k")
+    with pytest.raises(TimeoutError):
+        flights.wait(flight, timeout=0.01)
+
+    flights.finish("k", flight, error=ValueError("corrupt image"))
+    with pytest.raises(ValueError, match="corrupt image"):
+        flights.wait(flight)
+    # Finished keys start a fresh flight.
+    assert flights.begin("k")[1] is True
+
+
+def test_concurrent_identical_embeds_share_one_forward_pass(monkeypatch):
+    model = _GatedOvModel()
+    embedder = _embedder(monkeypatch, model)
+    results = []
+
+    def _call():
+        results.append(embedder.embed(None, "poster", SPEC.name, True, None))
+
+    leader = threading.Thread(target=_call)
+    leader.start()
+    assert model.started.wait(5)
+    followers = [threading.Thread(target=_call) for _ in range(3)]
+    for t in followers:
+        t.start()
+    # Followers must be parked on the flight before the leader finishes.
+    while embedder.get_cache_info()["inflight"]["coalesced"] < 3:
+        threading.Event().wait(0.005)
+    model.release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert model.calls == 1
+    assert len(results) == 4
+    assert all(r == results[0] for r in results)
+    info = embedder.get_cache_info()
+    assert info["inflight"] == {"in_flight": 0, "leaders": 1, "coalesced": 3}
+    assert info["size"] == 1
+
+
+def test_embed_batch_dedupes_repeats_and_waits_on_other_requests(monkeypatch):
+    model = _GatedOvModel()
+    embedder = _embedder(monkeypatch, model)
+    single = []
+
+    t = threading.Thread(target=lambda: single.append(embedder.embed(None, "a", SPEC.name, False, None)))
+    t.start()
+    assert model.started.wait(5)
+
+    batch_done = []
+
+    def _batch():
+        items = [BatchItem(None, "b", False), BatchItem(None, "a", False), BatchItem(None, "b", False)]
+        batch_done.append(embedder.embed_batch(SPEC, SPEC.image_size, items))
+
+    b = threading.Thread(target=_batch)
+    b.start()
+    while model.calls < 2 or embedder.get_cache_info()["inflight"]["coalesced"] < 1:
+        threading.Event().wait(0.005)
+    model.release.set()
+    t.join(5)
+    b.join(5)
+
+    outcomes = batch_done[0]
+    # One pass for the single request ("a"), one for the batch's own leader ("b").
+    assert model.calls == 2
+    assert outcomes[0] == outcomes[2]
+    assert outcomes[0][0] is not outcomes[2][0]
+    assert outcomes[1] == single[0]
+    assert embedder.get_cache_info()["inflight"]["coalesced"] == 2
+
+
+def test_embed_batch_failure_releases_followers(monkeypatch):
+    embedder = _embedder(monkeypatch, model=None)
+
+    def _broken(spec, target_size, payloads):
+        raise RuntimeError("device lost")
+
+    monkeypatch.setattr(embedder, "_embed_batch_uncached", _broken)
+    with pytest.raises(RuntimeError):
+        embedder.embed_batch(SPEC, SPEC.image_size, [BatchItem(None, "x", False)])
+
+    assert embedder.get_cache_info()["inflight"]["in_flight"] == 0
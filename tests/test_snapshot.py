@@ -0,0 +1,104 @@
+# Classifarr Image Embedding Service - companion service for Classifarr
+# Copyright (C) 2024-2026 Classifarr Contributors
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from image_embedder.cache import EmbeddingLRUCache
+from image_embedder.config import Settings
+from image_embedder.embedder import ImageEmbedder
+from image_embedder.main import create_app
+
+
+def _key(payload: bytes, model: str = "ViT-L-14", normalize: bool = False) -> str:
+    return EmbeddingLRUCache.make_key(payload, model, 224, normalize)
+
+
+def _result(value: float, dims: int = 768, model: str = "ViT-L-14"):
+    return ([value] * dims, dims, "local", model, 224)
+
+
+def _settings(**overrides) -> Settings:
+    settings = Settings(**{"embed_cache_size": 100, "warmup_on_startup": False, **overrides})
+    settings.service_api_key = "secret-key"
+    return settings
+
+
+def test_snapshot_round_trip_preserves_entries_and_recency():
+    source = ImageEmbedder(settings=_settings())
+    source._cache_put(_key(b"old"), _result(0.25))
+    source._cache_put(_key(b"b16", "ViT-B-16"), _result(0.5, dims=512, model="ViT-B-16"))
+    source._cache_put(_key(b"new"), _result(0.75))
+    source._cache_put("foreign|key", _result(1.0, dims=4, model="RN50"))
+
+    target = ImageEmbedder(settings=_settings(embed_cache_size=2, embed_cache_shards=1))
+    counts = target.import_cache(io.BytesIO(b"".join(source.export_cache())))
+
+    assert counts == {"imported": 3, "skipped": 1}
+    # Oldest first: the two most recent catalog entries survive a smaller target cache.
+    assert target._cache_get(_key(b"old")) is None
+    assert target._cache_get(_key(b"new")) == _result(0.75)
+    assert target._cache_get(_key(b"b16", "ViT-B-16")) == _result(0.5, dims=512, model="ViT-B-16")
+
+
+def test_truncated_or_foreign_snapshot_is_rejected():
+    source = ImageEmbedder(settings=_settings())
+    source._cache_put(_key(b"poster"), _result(0.5))
+    data = b"".join(source.export_cache())
+    target = ImageEmbedder(settings=_settings())
+
+    with pytest.raises(ValueError, match="truncated"):
+        target.import_cache(io.BytesIO(data[:-20]))
+    with pytest.raises(ValueError, match="bad header"):
+        target.import_cache(io.BytesIO(b"PK\x03\x04" + data))
+    with pytest.raises(ValueError, match="disabled"):
+        ImageEmbedder(settings=_settings(embed_cache_size=0)).import_cache(io.BytesIO(data))
+
+
+def test_import_skips_records_whose_key_disagrees_with_the_record():
+    source = ImageEmbedder(settings=_settings())
+    unit = ([1.0] + [0.0] * 767, 768, "local", "ViT-L-14", 224)
+    source._cache_put(_key(b"unit", normalize=True), unit)
+    source._cache_put(_key(b"scaled", normalize=True), _result(0.5))
+    source._cache_put(_key(b"relabelled", "ViT-B-16"), _result(0.5))
+    source._cache_put("not-a-digest|ViT-L-14|224|False", _result(0.5))
+    source._cache_put(_key(b"poster").replace("|224|", "|336|"), _result(0.5))
+
+    target = ImageEmbedder(settings=_settings())
+    counts = target.import_cache(io.BytesIO(b"".join(source.export_cache())))
+
+    assert counts == {"imported": 1, "skipped": 4}
+    assert target._cache_get(_key(b"unit", normalize=True)) == unit
+    assert target._cache_get(_key(b"relabelled", "ViT-B-16")) is None
+
+
+def test_admin_export_import_seeds_a_new_replica():
+    headers = {"X-Api-Key": "secret-key"}
+    source = TestClient(create_app(settings=_settings()))
+    source.app.state.embedder._cache_put(_key(b"poster"), _result(0.5))
+    replica = TestClient(create_app(settings=_settings()), raise_server_exceptions=False)
+
+    assert source.get("/admin/cache/export").status_code == 401
+    exported = source.get("/admin/cache/export", headers=headers)
+    assert exported.status_code == 200
+    assert exported.headers["content-type"] == "application/octet-stream"
+
+    assert replica.post("/admin/cache/import", content=exported.content).status_code == 401
+    imported = replica.post("/admin/cache/import", content=exported.content, headers=headers)
+    assert imported.json() == {"imported": 1, "skipped": 0}
+    assert replica.app.state.embedder._cache_get(_key(b"poster")) == _result(0.5)
+    bad = replica.post("/admin/cache/import", content=b"junk", headers=headers)
+    assert bad.status_code == 400
+
+
+def test_lifespan_saves_snapshot_on_shutdown_and_loads_it_on_startup(tmp_path):
+    path = str(tmp_path / "cache.snap")
+
+    with TestClient(create_app(settings=_settings(embed_cache_snapshot_path=path))) as client:
+        client.app.state.embedder._cache_put(_key(b"poster"), _result(0.5))
+
+    with TestClient(create_app(settings=_settings(embed_cache_snapshot_path=path))) as client:
+        assert client.app.state.embedder._cache_get(_key(b"poster")) == _result(0.5)